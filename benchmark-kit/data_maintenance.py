@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import time
+import argparse
+import requests
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Shared Dremio client in the repository root; refresh set files are written by tpcds-kit/refresh_data.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tpcds-kit"))
+from dremio_client import DremioError, get_client
+from execute_queries import CATALOG, require_catalog, results_dir
+from refresh_data import REFRESH_DIR, REFRESH_TABLES, read_delete_dates
+
+# Dremio path of the S3 folder (S3_FOLDER_NAME) that refresh_data.py stages the refresh sets under
+REFRESH_SOURCE = os.getenv("DREMIO_REFRESH_SOURCE", "tpcds.tpcds.tpcds.sample")
+TABLES_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "iceberg-kit", "tables.json")
+
+# Views of the TPC-DS data maintenance functions (spec section 5.3), mapping the s_* source rows to fact rows.
+# {s_...} placeholders are replaced with the staged refresh tables; warehouse tables are resolved in CATALOG.
+INSERT_VIEWS = {
+    "store_sales": """
+SELECT d_date_sk, t_time_sk, i_item_sk, c_customer_sk, c_current_cdemo_sk, c_current_hdemo_sk, c_current_addr_sk,
+       s_store_sk, p_promo_sk, purc_purchase_id, plin_quantity, i_wholesale_cost, i_current_price, plin_sale_price,
+       (i_current_price - plin_sale_price) * plin_quantity, plin_sale_price * plin_quantity,
+       i_wholesale_cost * plin_quantity, i_current_price * plin_quantity, i_current_price * s_tax_percentage,
+       plin_coupon_amt, plin_sale_price * plin_quantity - plin_coupon_amt,
+       (plin_sale_price * plin_quantity - plin_coupon_amt) * (1 + s_tax_percentage),
+       plin_sale_price * plin_quantity - plin_coupon_amt - plin_quantity * i_wholesale_cost
+FROM {s_purchase}
+     LEFT OUTER JOIN customer ON purc_customer_id = c_customer_id
+     LEFT OUTER JOIN store ON purc_store_id = s_store_id
+     LEFT OUTER JOIN date_dim ON purc_purchase_date = d_date
+     LEFT OUTER JOIN time_dim ON purc_purchase_time = t_time
+     JOIN {s_purchase_lineitem} ON purc_purchase_id = plin_purchase_id
+     LEFT OUTER JOIN promotion ON plin_promotion_id = p_promo_id
+     LEFT OUTER JOIN item ON plin_item_id = i_item_id
+WHERE i_rec_end_date IS NULL AND s_rec_end_date IS NULL""",
+    "store_returns": """
+SELECT d_date_sk, t_time_sk, i_item_sk, c_customer_sk, c_current_cdemo_sk, c_current_hdemo_sk, c_current_addr_sk,
+       s_store_sk, r_reason_sk, sret_ticket_number, sret_return_qty, sret_return_amt, sret_return_tax,
+       sret_return_amt + sret_return_tax, sret_return_fee, sret_return_ship_cost, sret_refunded_cash,
+       sret_reversed_charge, sret_store_credit,
+       sret_return_amt + sret_return_tax + sret_return_fee - sret_refunded_cash - sret_reversed_charge - sret_store_credit
+FROM {s_store_returns}
+     LEFT OUTER JOIN date_dim ON sret_return_date = d_date
+     LEFT OUTER JOIN time_dim ON sret_return_time = t_time
+     LEFT OUTER JOIN item ON sret_item_id = i_item_id
+     LEFT OUTER JOIN customer ON sret_customer_id = c_customer_id
+     LEFT OUTER JOIN store ON sret_store_id = s_store_id
+     LEFT OUTER JOIN reason ON sret_reason_id = r_reason_id
+WHERE i_rec_end_date IS NULL AND s_rec_end_date IS NULL""",
+    "catalog_sales": """
+SELECT d1.d_date_sk, t_time_sk, d2.d_date_sk, c1.c_customer_sk, c1.c_current_cdemo_sk, c1.c_current_hdemo_sk,
+       c1.c_current_addr_sk, c2.c_customer_sk, c2.c_current_cdemo_sk, c2.c_current_hdemo_sk, c2.c_current_addr_sk,
+       cc_call_center_sk, cp_catalog_page_sk, sm_ship_mode_sk, w_warehouse_sk, i_item_sk, p_promo_sk, cord_order_id,
+       clin_quantity, i_wholesale_cost, i_current_price, clin_sales_price,
+       (i_current_price - clin_sales_price) * clin_quantity, clin_sales_price * clin_quantity,
+       i_wholesale_cost * clin_quantity, i_current_price * clin_quantity, i_current_price * cc_tax_percentage,
+       clin_coupon_amt, clin_ship_cost * clin_quantity, clin_sales_price * clin_quantity - clin_coupon_amt,
+       (clin_sales_price * clin_quantity - clin_coupon_amt) * (1 + cc_tax_percentage),
+       clin_sales_price * clin_quantity - clin_coupon_amt + clin_ship_cost * clin_quantity,
+       clin_sales_price * clin_quantity - clin_coupon_amt + clin_ship_cost * clin_quantity + i_current_price * cc_tax_percentage,
+       clin_sales_price * clin_quantity - clin_coupon_amt - clin_quantity * i_wholesale_cost
+FROM {s_catalog_order}
+     LEFT OUTER JOIN date_dim d1 ON cord_order_date = d1.d_date
+     LEFT OUTER JOIN time_dim ON cord_order_time = t_time
+     LEFT OUTER JOIN customer c1 ON cord_bill_customer_id = c1.c_customer_id
+     LEFT OUTER JOIN customer c2 ON cord_ship_customer_id = c2.c_customer_id
+     LEFT OUTER JOIN call_center ON cord_call_center_id = cc_call_center_id AND cc_rec_end_date IS NULL
+     LEFT OUTER JOIN ship_mode ON cord_ship_mode_id = sm_ship_mode_id
+     JOIN {s_catalog_order_lineitem} ON cord_order_id = clin_order_id
+     LEFT OUTER JOIN date_dim d2 ON clin_ship_date = d2.d_date
+     LEFT OUTER JOIN catalog_page ON clin_catalog_page_number = cp_catalog_page_number AND clin_catalog_number = cp_catalog_number
+     LEFT OUTER JOIN warehouse ON clin_warehouse_id = w_warehouse_id
+     LEFT OUTER JOIN item ON clin_item_id = i_item_id AND i_rec_end_date IS NULL
+     LEFT OUTER JOIN promotion ON clin_promotion_id = p_promo_id""",
+    "catalog_returns": """
+SELECT d_date_sk, t_time_sk, i_item_sk, c1.c_customer_sk, c1.c_current_cdemo_sk, c1.c_current_hdemo_sk,
+       c1.c_current_addr_sk, c2.c_customer_sk, c2.c_current_cdemo_sk, c2.c_current_hdemo_sk, c2.c_current_addr_sk,
+       cc_call_center_sk, cp_catalog_page_sk, sm_ship_mode_sk, w_warehouse_sk, r_reason_sk, cret_order_id,
+       cret_return_qty, cret_return_amt, cret_return_tax, cret_return_amt + cret_return_tax, cret_return_fee,
+       cret_return_ship_cost, cret_refunded_cash, cret_reversed_charge, cret_merchant_credit,
+       cret_return_amt + cret_return_tax + cret_return_fee - cret_refunded_cash - cret_reversed_charge - cret_merchant_credit
+FROM {s_catalog_returns}
+     LEFT OUTER JOIN date_dim ON cret_return_date = d_date
+     LEFT OUTER JOIN time_dim ON cret_return_time = t_time
+     LEFT OUTER JOIN item ON cret_item_id = i_item_id
+     LEFT OUTER JOIN customer c1 ON cret_return_customer_id = c1.c_customer_id
+     LEFT OUTER JOIN customer c2 ON cret_refund_customer_id = c2.c_customer_id
+     LEFT OUTER JOIN reason ON cret_reason_id = r_reason_id
+     LEFT OUTER JOIN call_center ON cret_call_center_id = cc_call_center_id
+     LEFT OUTER JOIN catalog_page ON cret_catalog_page_id = cp_catalog_page_id
+     LEFT OUTER JOIN ship_mode ON cret_shipmode_id = sm_ship_mode_id
+     LEFT OUTER JOIN warehouse ON cret_warehouse_id = w_warehouse_id
+WHERE i_rec_end_date IS NULL AND cc_rec_end_date IS NULL""",
+    "web_sales": """
+SELECT d1.d_date_sk, t_time_sk, d2.d_date_sk, i_item_sk, c1.c_customer_sk, c1.c_current_cdemo_sk, c1.c_current_hdemo_sk,
+       c1.c_current_addr_sk, c2.c_customer_sk, c2.c_current_cdemo_sk, c2.c_current_hdemo_sk, c2.c_current_addr_sk,
+       wp_web_page_sk, web_site_sk, sm_ship_mode_sk, w_warehouse_sk, p_promo_sk, word_order_id, wlin_quantity,
+       i_wholesale_cost, i_current_price, wlin_sales_price, (i_current_price - wlin_sales_price) * wlin_quantity,
+       wlin_sales_price * wlin_quantity, i_wholesale_cost * wlin_quantity, i_current_price * wlin_quantity,
+       i_current_price * web_tax_percentage, wlin_coupon_amt, wlin_ship_cost * wlin_quantity,
+       wlin_sales_price * wlin_quantity - wlin_coupon_amt,
+       (wlin_sales_price * wlin_quantity - wlin_coupon_amt) * (1 + web_tax_percentage),
+       wlin_sales_price * wlin_quantity - wlin_coupon_amt + wlin_ship_cost * wlin_quantity,
+       wlin_sales_price * wlin_quantity - wlin_coupon_amt + wlin_ship_cost * wlin_quantity + i_current_price * web_tax_percentage,
+       wlin_sales_price * wlin_quantity - wlin_coupon_amt - wlin_quantity * i_wholesale_cost
+FROM {s_web_order}
+     LEFT OUTER JOIN date_dim d1 ON word_order_date = d1.d_date
+     LEFT OUTER JOIN time_dim ON word_order_time = t_time
+     LEFT OUTER JOIN customer c1 ON word_bill_customer_id = c1.c_customer_id
+     LEFT OUTER JOIN customer c2 ON word_ship_customer_id = c2.c_customer_id
+     LEFT OUTER JOIN web_site ON word_web_site_id = web_site_id AND web_rec_end_date IS NULL
+     LEFT OUTER JOIN ship_mode ON word_ship_mode_id = sm_ship_mode_id
+     JOIN {s_web_order_lineitem} ON word_order_id = wlin_order_id
+     LEFT OUTER JOIN date_dim d2 ON wlin_ship_date = d2.d_date
+     LEFT OUTER JOIN item ON wlin_item_id = i_item_id AND i_rec_end_date IS NULL
+     LEFT OUTER JOIN web_page ON wlin_web_page_id = wp_web_page_id AND wp_rec_end_date IS NULL
+     LEFT OUTER JOIN warehouse ON wlin_warehouse_id = w_warehouse_id
+     LEFT OUTER JOIN promotion ON wlin_promotion_id = p_promo_id""",
+    # dsdgen's s_web_returns carries the web site rather than the web page, so wr_web_page_sk stays empty
+    "web_returns": """
+SELECT d_date_sk, t_time_sk, i_item_sk, c1.c_customer_sk, c1.c_current_cdemo_sk, c1.c_current_hdemo_sk,
+       c1.c_current_addr_sk, c2.c_customer_sk, c2.c_current_cdemo_sk, c2.c_current_hdemo_sk, c2.c_current_addr_sk,
+       CAST(NULL AS INTEGER), r_reason_sk, wret_order_id, wret_return_qty, wret_return_amt, wret_return_tax,
+       wret_return_amt + wret_return_tax, wret_return_fee, wret_return_ship_cost, wret_refunded_cash,
+       wret_reversed_charge, wret_account_credit,
+       wret_return_amt + wret_return_tax + wret_return_fee - wret_refunded_cash - wret_reversed_charge - wret_account_credit
+FROM {s_web_returns}
+     LEFT OUTER JOIN date_dim ON wret_return_date = d_date
+     LEFT OUTER JOIN time_dim ON wret_return_time = t_time
+     LEFT OUTER JOIN item ON wret_item_id = i_item_id
+     LEFT OUTER JOIN customer c1 ON wret_return_customer_id = c1.c_customer_id
+     LEFT OUTER JOIN customer c2 ON wret_refund_customer_id = c2.c_customer_id
+     LEFT OUTER JOIN reason ON wret_reason_id = r_reason_id
+WHERE i_rec_end_date IS NULL""",
+    "inventory": """
+SELECT d_date_sk, i_item_sk, w_warehouse_sk, invn_qty_on_hand
+FROM {s_inventory}
+     LEFT OUTER JOIN warehouse ON invn_warehouse_id = w_warehouse_id
+     LEFT OUTER JOIN item ON invn_item_id = i_item_id AND i_rec_end_date IS NULL
+     LEFT OUTER JOIN date_dim ON invn_date = d_date""",
+}
+
+# Delete functions: the returns of the deleted sales go first, keyed by ticket or order number
+SALES_DELETES = {
+    "store": ("store_sales", "ss_sold_date_sk", "ss_ticket_number", "store_returns", "sr_ticket_number"),
+    "catalog": ("catalog_sales", "cs_sold_date_sk", "cs_order_number", "catalog_returns", "cr_order_number"),
+    "web": ("web_sales", "ws_sold_date_sk", "ws_order_number", "web_returns", "wr_order_number"),
+}
+
+# Refresh functions in execution order: (name, tables written)
+FUNCTIONS = [
+    ("LF_SS", ["store_sales"]), ("LF_SR", ["store_returns"]), ("LF_CS", ["catalog_sales"]), ("LF_CR", ["catalog_returns"]),
+    ("LF_WS", ["web_sales"]), ("LF_WR", ["web_returns"]), ("LF_I", ["inventory"]),
+    ("DF_SS", ["store_returns", "store_sales"]), ("DF_CS", ["catalog_returns", "catalog_sales"]),
+    ("DF_WS", ["web_returns", "web_sales"]), ("DF_I", ["inventory"]),
+]
+
+# One row per statement of the data maintenance test
+RESULT_SCHEMA = pa.schema([
+    pa.field("run_id", pa.string(), nullable=False),
+    pa.field("refresh_set", pa.int32(), nullable=False),
+    pa.field("function", pa.string(), nullable=False),
+    pa.field("target_table", pa.string(), nullable=False),
+    pa.field("job_id", pa.string()),
+    pa.field("state", pa.string()),
+    pa.field("success", pa.bool_(), nullable=False),
+    pa.field("error", pa.string()),
+    pa.field("started_at", pa.timestamp("ms", tz="UTC"), nullable=False),
+    pa.field("elapsed_ms", pa.float64(), nullable=False),
+    pa.field("server_ms", pa.float64()),
+    pa.field("row_count", pa.int64()),
+])
+
+def load_tables():
+    """Names of the Iceberg tables deployed from iceberg-kit/tables.json."""
+    with open(TABLES_CONFIG_PATH, "r") as f:
+        tables = json.load(f)
+    return set(tables["partitioned_tables"]) | set(tables["non_partitioned_tables"])
+
+def staged_table(refresh_set, table_name):
+    return f'{REFRESH_SOURCE}."refresh_{refresh_set}"."{table_name}"'
+
+def function_statements(function, refresh_set, delete_dates):
+    """
+    SQL statements of one refresh function for one refresh set.
+    :return: List of (target table, SQL) tuples, run in order.
+    """
+    if function.startswith("LF_"):
+        target = dict(FUNCTIONS)[function][0]
+        source = INSERT_VIEWS[target].format(**{name: staged_table(refresh_set, name) for name in REFRESH_TABLES})
+        return [(target, f"INSERT INTO {target} {source}")]
+    if function == "DF_I":
+        return [
+            ("inventory", f"DELETE FROM inventory WHERE inv_date_sk IN "
+                          f"(SELECT d_date_sk FROM date_dim WHERE d_date BETWEEN DATE '{start}' AND DATE '{end}')")
+            for start, end in delete_dates["inventory"]
+        ]
+    channel = {"DF_SS": "store", "DF_CS": "catalog", "DF_WS": "web"}[function]
+    sales, date_column, number_column, returns, returns_number_column = SALES_DELETES[channel]
+    statements = []
+    for start, end in delete_dates["sales"]:
+        dates = f"SELECT d_date_sk FROM date_dim WHERE d_date BETWEEN DATE '{start}' AND DATE '{end}'"
+        statements.append((returns, f"DELETE FROM {returns} WHERE {returns_number_column} IN "
+                                    f"(SELECT {number_column} FROM {sales} WHERE {date_column} IN ({dates}))"))
+        statements.append((sales, f"DELETE FROM {sales} WHERE {date_column} IN ({dates})"))
+    return statements
+
+def promote_refresh_set(refresh_set):
+    """Make Dremio read the staged refresh tables; not part of the timed test."""
+    client = get_client()
+    for table_name in REFRESH_TABLES:
+        try:
+            client.execute(f"ALTER TABLE {staged_table(refresh_set, table_name)} REFRESH METADATA AUTO PROMOTION")
+        except DremioError as e:
+            print(f"\033[91mCould not read staged table {staged_table(refresh_set, table_name)}: {e}\033[0m")
+            exit(1)
+
+def run_statement(run_id, refresh_set, function, target, sql):
+    """Run one DML statement and return its result row."""
+    started_at = time.time()
+    start = time.perf_counter()
+    job_id, status, error = None, {}, None
+    try:
+        job_id, status = get_client().execute(sql, [CATALOG])
+        if status.get("jobState") != "COMPLETED":
+            error = status.get("errorMessage") or status.get("jobState")
+    except (DremioError, requests.exceptions.RequestException) as e:
+        error = str(e)
+    server_seconds = (status.get("tracking") or {}).get("server_seconds")
+    return {
+        "run_id": run_id,
+        "refresh_set": refresh_set,
+        "function": function,
+        "target_table": target,
+        "job_id": job_id,
+        "state": status.get("jobState"),
+        "success": error is None,
+        "error": error,
+        "started_at": int(started_at * 1000),
+        "elapsed_ms": (time.perf_counter() - start) * 1000,
+        "server_ms": server_seconds * 1000 if server_seconds is not None else None,
+        "row_count": status.get("rowCount"),
+    }
+
+def data_maintenance(refresh_sets, functions=None):
+    """
+    Run the data maintenance test: every refresh function for each refresh set, one after another.
+    Functions writing a table that is not in iceberg-kit/tables.json are skipped.
+    :return: Wall seconds of the whole test (T_DM of one maintenance run).
+    """
+    deployed = load_tables()
+    selected = [(name, tables) for name, tables in FUNCTIONS if not functions or name in functions]
+    missing = {name: [t for t in tables if t not in deployed] for name, tables in selected}
+    for name, tables in missing.items():
+        if tables:
+            print(f"⚠️ Skipping {name}: {', '.join(tables)} not in tables.json")
+    selected = [(name, tables) for name, tables in selected if not missing[name]]
+
+    run_id = f"maintenance-{time.strftime('%Y%m%d-%H%M%S')}"
+    rows = []
+    wall_seconds = 0.0
+    for refresh_set in refresh_sets:
+        delete_dates = read_delete_dates(refresh_set, REFRESH_DIR)
+        promote_refresh_set(refresh_set)
+        print(f"Refresh set {refresh_set} ({run_id})")
+        set_start = time.perf_counter()
+        for function, _ in selected:
+            function_start = time.perf_counter()
+            for target, sql in function_statements(function, refresh_set, delete_dates):
+                row = run_statement(run_id, refresh_set, function, target, sql)
+                rows.append(row)
+                if not row["success"]:
+                    print(f"❌ {function} on {target} failed: {row['error']}", flush=True)
+            function_rows = [row for row in rows if row["refresh_set"] == refresh_set and row["function"] == function]
+            affected = sum(row["row_count"] or 0 for row in function_rows)
+            print(f"✅ {function}: {time.perf_counter() - function_start:.1f}s, {len(function_rows)} statement(s), {affected:,} row(s)", flush=True)
+        set_seconds = time.perf_counter() - set_start
+        wall_seconds += set_seconds
+        print(f"Refresh set {refresh_set} applied in {set_seconds:.1f}s")
+
+    failed = sum(not row["success"] for row in rows)
+    print(f"Data maintenance: {len(refresh_sets)} refresh set(s), {len(rows)} statement(s), {failed} failed, {wall_seconds:.1f}s")
+    os.makedirs(results_dir, exist_ok=True)
+    output_file = os.path.join(results_dir, f"{run_id}.parquet")
+    table = pa.Table.from_pylist(rows, schema=RESULT_SCHEMA)
+    pq.write_table(table.replace_schema_metadata({"wall_seconds": str(wall_seconds)}), output_file)
+    print(f"Results written to {output_file}")
+    get_client().print_overhead()
+    return wall_seconds
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the TPC-DS data maintenance test against the Iceberg tables in Dremio")
+    parser.add_argument("--refresh_sets", type=int, nargs="+", required=True, help="Refresh sets to apply in order, staged by tpcds-kit/refresh_data.py (one per throughput stream)")
+    parser.add_argument("--functions", type=str, nargs="+", default=None, choices=[name for name, _ in FUNCTIONS], help="Run only these refresh functions (default: all)")
+    args = parser.parse_args()
+    require_catalog()
+    data_maintenance(args.refresh_sets, args.functions)
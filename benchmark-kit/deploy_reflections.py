@@ -1,201 +1,94 @@
 import os
+import sys
+import argparse
 import requests
-import time
-from datetime import datetime
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
-
-DREMIO_PAT = os.getenv("DREMIO_PAT")
-DREMIO_URL = os.getenv("DREMIO_URL")
-DREMIO_USERNAME = os.getenv("DREMIO_USERNAME")
-DREMIO_PASSWORD = os.getenv("DREMIO_PASSWORD")
+# Shared Dremio client in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dremio_client import DremioError, JobTimeoutError, format_timings, get_client
 
-if not DREMIO_PAT or not DREMIO_URL or not DREMIO_USERNAME or not DREMIO_PASSWORD:
-    raise ValueError("DREMIO_PAT, DREMIO_URL, DREMIO_USERNAME, and DREMIO_PASSWORD must be set in the environment variables.")
-
-def get_auth_header():
-    """Get authentication header using DREMIO_PAT"""
-    if not DREMIO_PAT:
-        print("Error: DREMIO_PAT is not set in the environment variables.")
-        return None
-    return {"Authorization": f"Bearer {DREMIO_PAT}", "Content-Type": "application/json"}
+# Load environment variables from .env file; Dremio credentials (DREMIO_PAT or username and password) are read by dremio_client
+load_dotenv()
 
 def execute_query(query):
-    """Execute a SQL query in Dremio and wait for results"""
-    headers = get_auth_header()
-    if not headers:
-        return False
-
-    submit_payload = {
-        "sql": query,
-        "context": ["icerberg", "test-dremio", "sample"]
-    }
-
+    """Submit a SQL query in Dremio and return its job id"""
     try:
         print(f"Submitting SQL query: {query}")
-        response = requests.post(
-            f"{DREMIO_URL}/api/v3/sql",
-            headers=headers,
-            json=submit_payload
-        )
-        print(f"Response status code: {response.status_code}")
-        print(response.text)  # Debug response content
-        try:
-            job_id = response.json().get('id')
-        except ValueError:
-            print("Error: Response is not JSON. Debugging response content:")
-            print(response.text)
-            return False
-        
-        if not job_id:
-            print("No job ID returned from query submission")
-            return False
-
-        while True:
-            print(f"Polling for job status: {job_id}")
-            status_response = requests.get(
-                f"{DREMIO_URL}/api/v3/job/{job_id}",
-                headers=headers
-            )
-            try:
-                status = status_response.json()
-            except ValueError:
-                print("Error: Status response is not JSON. Debugging response content:")
-                print(status_response.text)
-                return False
-            
-            if status.get('jobState') == 'COMPLETED':
-                print("Query completed successfully")
-                return job_id
-            elif status.get('jobState') in ['FAILED', 'CANCELED', 'INVALID']:
-                print(f"Query failed with state: {status.get('jobState')}")
-                print(f"Error: {status.get('errorMessage')}")
-                return False
-            
-            time.sleep(1)
-
-    except requests.exceptions.RequestException as e:
+        job_id = get_client().submit(query, ["icerberg", "test-dremio", "sample"])
+        print(f"Submitted job: {job_id}")
+        return job_id
+    except (DremioError, requests.exceptions.RequestException) as e:
         print(f"Failed to execute query: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"Error response: {e.response.text}")
         return False
 
-def wait_for_job_completion(job_id):
-    headers = get_auth_header()
-    url = f"{DREMIO_URL}/api/v3/job/{job_id}"
-    elapsed_time = 0
-
+def wait_for_job_completion(job_id, timeout=None):
+    """Wait for a job, cancelling it after timeout seconds; True if it completed."""
     print(f"Waiting for job {job_id} to complete...")
-    for attempt in range(5):
-        try:
-            res = requests.get(url, headers=headers)
-            print(f"Attempt {attempt + 1}: Response: {res.status_code} - {res.text}")
-            if res.status_code == 404:
-                time.sleep(10)
-                continue
-            res.raise_for_status()
-            break
-        except requests.RequestException as e:
-            print(f"Error checking job status: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Error response: {e.response.text}")
-            time.sleep(10)
-    else:
-        print(f"Error: Job {job_id} not found after multiple attempts.")
+    try:
+        status = get_client().wait_for_job(job_id, timeout)
+    except JobTimeoutError as e:
+        print(f"⏱️ {e}.")
+        return False
+    except (DremioError, requests.RequestException) as e:
+        print(f"Error polling job status: {e}")
         return False
 
-    last_state = None
-    while True:
-        try:
-            res = requests.get(url, headers=headers)
-            print(f"Job status response: {res.status_code}")
-            try:
-                state = res.json().get("jobState")
-            except ValueError:
-                print("Error: Job status response is not JSON. Debugging response content:")
-                print(res.text)
-                return False
-        except requests.RequestException as e:
-            print(f"Error polling job status: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Error response: {e.response.text}")
-            return False
-
-        if state != last_state:
-            print(f"Job {job_id} status: {state}")
-            last_state = state
-        elif state == last_state and state not in ["COMPLETED", "FAILED", "CANCELED"]:
-            elapsed_time += 1
-            if elapsed_time % 30 == 0:
-                print(".", end="", flush=True)
-
-        if state == "COMPLETED":
-            print(f"✅ Job {job_id} completed successfully.")
-            return True
-        elif state in ["FAILED", "CANCELED"]:
-            print(f"\n❌ Job {job_id} failed with state: {state}. Please inspect SQL logs.")
-            return False
-        time.sleep(1)
+    for transition in status["tracking"]["transitions"]:
+        print(f"Job {job_id} status: {transition['state']} (after {transition['seen_at_s']:.2f}s)")
+    state = status.get("jobState")
+    if state == "COMPLETED":
+        print(f"✅ Job {job_id} completed successfully ({format_timings(status)}).")
+        return True
+    print(f"\n❌ Job {job_id} failed with state: {state}. Please inspect SQL logs.")
+    return False
 
 def request_recommendations(job_id):
-    headers = get_auth_header()
-    endpoint = f"{DREMIO_URL}/api/v3/reflection/recommendations"
     payload = {"jobIds": [job_id]}
 
     print(f"Requesting recommendations for job {job_id}...")
     try:
-        res = requests.post(endpoint, headers=headers, json=payload)
-        print(f"Recommendations response: {res.status_code} - {res.text}")
-        res.raise_for_status()
-        return res.json()
-    except requests.RequestException as e:
+        recommendations = get_client().request("POST", "/api/v3/reflection/recommendations", json=payload)
+        print(f"Recommendations response: {recommendations}")
+        return recommendations
+    except (DremioError, requests.RequestException) as e:
         print(f"Error getting recommendations for job {job_id}: {e}")
         return None
 
 def create_reflection_from_recommendation(recommendation):
-    headers = get_auth_header()
+    client = get_client()
 
     print(f"Creating view from recommendation: {recommendation}")
     view_payload = recommendation["viewRequestBody"]
-    catalog_url = f"{DREMIO_URL}/api/v3/catalog"
 
     # Debugging the view payload
     print("View payload being sent:")
     print(view_payload)
 
     try:
-        view_response = requests.post(catalog_url, headers=headers, json=view_payload)
-        print(f"View creation response: {view_response.status_code} - {view_response.text}")
-        view_response.raise_for_status()
-        view_id = view_response.json()["id"]
-    except requests.exceptions.RequestException as e:
+        view = client.request("POST", "/api/v3/catalog", json=view_payload)
+        print(f"View creation response: {view}")
+        view_id = view["id"]
+    except (DremioError, requests.exceptions.RequestException) as e:
         print(f"Error creating view: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"Error response: {e.response.text}")
         return
 
     print(f"Creating reflection for view ID: {view_id}")
     reflection_payload = recommendation["reflectionRequestBody"]
     reflection_payload["datasetId"] = view_id
-    reflection_url = f"{DREMIO_URL}/api/v3/reflection"
 
     # Debugging the reflection payload
     print("Reflection payload being sent:")
     print(reflection_payload)
 
     try:
-        reflection_response = requests.post(reflection_url, headers=headers, json=reflection_payload)
-        print(f"Reflection creation response: {reflection_response.status_code} - {reflection_response.text}")
-        reflection_response.raise_for_status()
+        reflection = client.request("POST", "/api/v3/reflection", json=reflection_payload)
+        print(f"Reflection creation response: {reflection}")
         print("✅ Recommended reflection created.")
-    except requests.exceptions.RequestException as e:
+    except (DremioError, requests.exceptions.RequestException) as e:
         print(f"Error creating reflection: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"Error response: {e.response.text}")
 
-def process_queries():
+def process_queries(query_timeout=None):
     queries_folder = os.path.join(os.path.dirname(__file__), "queries")
     if not os.path.exists(queries_folder):
         print(f"Error: Queries folder not found at {queries_folder}")
@@ -222,7 +115,7 @@ def process_queries():
             print(f"❌ Skipping query {query_file} due to execution failure. Please inspect SQL logs.")
             continue
 
-        if not wait_for_job_completion(job_id):
+        if not wait_for_job_completion(job_id, query_timeout):
             print(f"❌ Skipping query {query_file} due to job failure. Please inspect SQL logs.")
             continue
 
@@ -233,8 +126,11 @@ def process_queries():
         else:
             print(f"No reflection recommendations for query {query_file}. Skipping reflection creation.")
 
-def main():
-    process_queries()
+def main(query_timeout=None):
+    process_queries(query_timeout)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run every query and create the reflections Dremio recommends for it")
+    parser.add_argument("--query_timeout", type=float, default=None, help="Seconds a query may take before its job is cancelled and the query skipped (default: no limit)")
+    args = parser.parse_args()
+    main(args.query_timeout)
\ No newline at end of file
@@ -1,71 +1,419 @@
 import os
-import requests
+import sys
 import csv
+import time
+import argparse
+import requests
+import pyarrow as pa
+import pyarrow.flight as flight
+import pyarrow.parquet as pq
 from dotenv import load_dotenv
 
+# Shared Dremio client in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dremio_client import DremioError, JobTimeoutError, format_timings, get_client
+from dremio_flight import get_flight_client
+from query_files import load_queries, results_dir
+from validate_results import REL_TOL, check_reference, load_reference, validate
+
 # Load environment variables from .env
 load_dotenv()
 
-# Env vars
-DREMIO_USERNAME = os.getenv("DREMIO_USERNAME")
-DREMIO_PASSWORD = os.getenv("DREMIO_PASSWORD")
-DREMIO_URL = os.getenv("DREMIO_URL")
+# Env vars; Dremio credentials are read by dremio_client
 CATALOG = os.getenv("ICEBERG_BUCKET_NAME")  # now dynamic!
 
-if not DREMIO_USERNAME or not DREMIO_PASSWORD or not DREMIO_URL or not CATALOG:
-    raise ValueError("Missing one or more required environment variables.")
-
 # Config
-queries_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "queries"))
-results_file = os.path.join(os.path.dirname(__file__), "execution_results.csv")
-
-def get_auth_header():
-    """Authenticate with Dremio and return the authorization header."""
-    auth_payload = {"userName": DREMIO_USERNAME, "password": DREMIO_PASSWORD}
-    response = requests.post(f"{DREMIO_URL}/apiv2/login", json=auth_payload)
-    response.raise_for_status()
-    token = response.json()["token"]
-    return {"Authorization": f"_dremio{token}", "Content-Type": "application/json"}
-
-def execute_query(query):
-    """Execute a SQL query in Dremio and return the results."""
-    headers = get_auth_header()
-    payload = {
-        "sql": query,
-        "context": [CATALOG]
-    }
+# Rows per request when downloading results over REST; Dremio's maximum
+RESULTS_PAGE_SIZE = 500
+
+# State recorded for a query cancelled because it ran out of its time budget
+TIMED_OUT = "TIMED_OUT"
+
+# Dremio job states grouped into the phases the status polls saw a query in (seen_*_ms); the planning_ms, queued_ms
+# and execution_ms columns come from the job's own timestamps instead
+SEEN_PHASES = {
+    "planning": ("NOT_SUBMITTED", "STARTING", "PENDING", "METADATA_RETRIEVAL", "PLANNING", "EXECUTION_PLANNING"),
+    "queued": ("QUEUED", "ENGINE_START"),
+    "running": ("RUNNING",),
+}
+
+# One row per executed query; written in one step at the end of the run
+RESULT_SCHEMA = pa.schema([
+    pa.field("run_id", pa.string(), nullable=False),
+    pa.field("iteration", pa.int32(), nullable=False),
+    pa.field("warmup", pa.bool_(), nullable=False),
+    pa.field("query", pa.string(), nullable=False),
+    pa.field("backend", pa.string(), nullable=False),
+    pa.field("label", pa.string(), nullable=False),
+    pa.field("job_id", pa.string()),
+    pa.field("state", pa.string()),
+    pa.field("success", pa.bool_(), nullable=False),
+    pa.field("error", pa.string()),
+    pa.field("started_at", pa.timestamp("ms", tz="UTC"), nullable=False),
+    pa.field("elapsed_ms", pa.float64(), nullable=False),
+    pa.field("submit_ms", pa.float64()),
+    pa.field("server_ms", pa.float64()),
+    pa.field("planning_ms", pa.float64()),
+    pa.field("queued_ms", pa.float64()),
+    pa.field("execution_ms", pa.float64()),
+    pa.field("seen_planning_ms", pa.float64()),
+    pa.field("seen_queued_ms", pa.float64()),
+    pa.field("seen_running_ms", pa.float64()),
+    pa.field("row_count", pa.int64()),
+    pa.field("polls", pa.int32()),
+    pa.field("first_batch_ms", pa.float64()),
+    pa.field("transfer_ms", pa.float64()),
+    pa.field("result_bytes", pa.int64()),
+    pa.field("batches", pa.int32()),
+    pa.field("download_ms", pa.float64()),
+    pa.field("validation", pa.string()),
+    pa.field("answer_set", pa.string()),
+    pa.field("validation_detail", pa.string()),
+    pa.field("result_hash", pa.string()),
+    pa.field("sql_bytes", pa.int32(), nullable=False),
+])
+
+# Columns of the JMeter Simple Data Writer output that process_results.py and the dashboards read
+JTL_FIELDS = ["timeStamp", "elapsed", "label", "responseCode", "responseMessage", "threadName", "dataType", "success",
+              "failureMessage", "bytes", "sentBytes", "grpThreads", "allThreads", "URL", "Latency", "IdleTime", "Connect", "job_id"]
+
+def require_catalog():
+    """
+    Return the catalog queries run in (ICEBERG_BUCKET_NAME). Checked when a query needs it rather than on import,
+    so modules that only borrow helpers from here do not need it configured.
+    """
+    if not CATALOG:
+        raise ValueError("Missing one or more required environment variables.")
+    return CATALOG
+
+def phase_ms(status, phase):
+    """
+    Milliseconds a tracked job spent planning, queued or in execution by Dremio's own timestamps
+    (startedAt, resourceSchedulingStartedAt/EndedAt, endedAt), or None if they are missing.
+    """
+    seconds = ((status.get("tracking") or {}).get("server_phases_s") or {}).get(phase)
+    return 1000 * seconds if seconds is not None else None
+
+def seen_phase_ms(status, phase):
+    """
+    Milliseconds the status polls saw a tracked job in the states of one SEEN_PHASES phase, or None if it was never
+    seen in them. A client-side observation: each boundary is off by up to one poll interval.
+    """
+    phases = (status.get("tracking") or {}).get("seen_phases_s", {})
+    seconds = [phases[state] for state in SEEN_PHASES[phase] if state in phases]
+    return 1000 * sum(seconds) if seconds else None
+
+def fetch_results(job_id, row_count):
+    """
+    Page through a completed job's rows (/api/v3/job/{id}/results) into an Arrow table.
+    Columns follow the job's result schema; their types are inferred from the JSON values.
+    """
+    client = get_client()
+    names, rows = [], []
+    for offset in range(0, max(row_count, 1), RESULTS_PAGE_SIZE):
+        page = client.job_results(job_id, offset, RESULTS_PAGE_SIZE)
+        names = names or [field["name"] for field in page.get("schema", [])]
+        rows.extend(page.get("rows", []))
+    return pa.Table.from_arrays([pa.array([row.get(name) for row in rows]) for name in names], names=names)
+
+def execute_query(query, context=None, fetch=False, timeout=None):
+    """
+    Execute a SQL query in Dremio and wait for it to finish.
+    :param fetch: Also download the result rows once the job has completed; the download is timed apart from the query.
+    :param timeout: Seconds the query may take; an overdue job is cancelled and its state recorded as TIMED_OUT.
+    :return: Dictionary with the job id, final state, error, elapsed and submit milliseconds, the final job status,
+             and with fetch the result table and download milliseconds.
+    """
+    client = get_client()
+    start = time.perf_counter()
+    job_id = status = error = None
+    submit_ms = None
+    try:
+        job_id = client.submit(query, context or [require_catalog()])
+        submit_ms = (time.perf_counter() - start) * 1000
+        status = client.wait_for_job(job_id, timeout)
+        if status.get("jobState") != "COMPLETED":
+            error = status.get("errorMessage") or status.get("jobState")
+    except JobTimeoutError as e:
+        status = {"jobState": TIMED_OUT}
+        error = str(e)
+    except (DremioError, requests.exceptions.RequestException) as e:
+        error = str(e)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    table = download_ms = None
+    if fetch and error is None:
+        download_start = time.perf_counter()
+        try:
+            table = fetch_results(job_id, status.get("rowCount") or 0)
+        except (DremioError, requests.exceptions.RequestException) as e:
+            error = f"Result download failed: {e}"
+        download_ms = (time.perf_counter() - download_start) * 1000
+    return {"job_id": job_id, "state": (status or {}).get("jobState"), "error": error,
+            "elapsed_ms": elapsed_ms, "submit_ms": submit_ms, "status": status or {},
+            "table": table, "download_ms": download_ms}
+
+def execute_flight_query(query, context=None, discard=False, timeout=None):
+    """
+    Execute a SQL query over Arrow Flight and stream its whole result.
+    :param discard: Drop the batches as they arrive instead of keeping them as an Arrow table.
+    :param timeout: Seconds the query may take, including the transfer; overdue calls are cancelled.
+    :return: The dictionary of execute_query, with the Flight result counts and timings under "flight"; the
+             download time is the transfer after the first batch, which overlaps the end of the query.
+    """
+    start = time.perf_counter()
+    result = error = None
+    state = "COMPLETED"
     try:
-        response = requests.post(f"{DREMIO_URL}/api/v3/sql", headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
-        print(f"✅ Executed query:\n{query[:100]}...\n")
-        return {"query": query, "status": "success", "data": data}
-    except requests.exceptions.HTTPError:
-        error_message = response.json().get("errorMessage", "Unknown error")
-        print(f"❌ Query failed: {error_message}\n")
-        return {"query": query, "status": "failed", "error": error_message}
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Request error: {e}\n")
-        return {"query": query, "status": "error", "error": str(e)}
-
-def execute_queries():
-    """Iterate through queries in the queries folder and log results to a CSV file."""
-    with open(results_file, mode="w", newline="") as csvfile:
-        fieldnames = ["filename", "status"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for filename in sorted(os.listdir(queries_dir)):
-            if not filename.endswith(".sql"):
-                continue
-            file_path = os.path.join(queries_dir, filename)
-            with open(file_path, "r") as f:
-                query_text = f.read().strip().rstrip(";")
-            result = execute_query(query_text)
+        result = get_flight_client().execute(query, context or [require_catalog()], discard, timeout)
+    except flight.FlightTimedOutError:
+        state, error = TIMED_OUT, f"Query did not finish within {timeout:.1f}s and was cancelled"
+    except flight.FlightError as e:
+        state, error = "FAILED", str(e)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    download_ms = None
+    if result and result["first_batch_s"] is not None:
+        download_ms = (result["elapsed_s"] - result["first_batch_s"]) * 1000
+    return {"job_id": None, "state": state, "error": error,
+            "elapsed_ms": elapsed_ms, "submit_ms": result["info_s"] * 1000 if result else None, "status": {}, "flight": result,
+            "table": result["table"] if result else None, "download_ms": download_ms}
+
+def run_iteration(run_id, iteration, warmup, queries, context=None, stop_on_error=False, backend="rest", discard=False,
+                  check_results=False, rel_tol=REL_TOL, reference=None, query_timeout=None, deadline=None):
+    """
+    Run every query once, in order, and return one result row per query.
+    :param stop_on_error: Stop the iteration at the first failed query, like the JMeter plan's stopthread.
+    :param backend: "rest" to submit through the REST API and poll the job, "flight" to stream the result over Arrow Flight.
+    :param discard: With the Flight backend, drop result batches as they arrive.
+    :param check_results: Download every result and compare it with the query's answer set in tpcds-kit/answer_sets.
+    :param reference: Reference run from validate_results.load_reference; every result is downloaded and compared
+                      with it by row count and result hash instead.
+    :param query_timeout: Seconds each query may take before it is cancelled and recorded as TIMED_OUT.
+    :param deadline: time.perf_counter() value the run must end by; each query's timeout is capped by the time
+                     left, and the iteration stops once none is left.
+    """
+    rows = []
+    phase = "warmup" if warmup else f"iteration {iteration}"
+    for position, (filename, sql) in enumerate(queries):
+        timeout = query_timeout
+        if deadline is not None:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                print(f"⏱️ [{phase}] Run time budget used up; {len(queries) - position} queries not run", flush=True)
+                break
+            timeout = min(timeout, remaining) if timeout else remaining
+        started_at = time.time()
+        if backend == "flight":
+            result = execute_flight_query(sql, context, discard, timeout)
+        else:
+            result = execute_query(sql, context, fetch=check_results or reference is not None, timeout=timeout)
+        query_name = os.path.splitext(filename)[0]
+        checked = {}
+        if reference is not None and result["table"] is not None:
+            checked = check_reference(query_name, result["table"], reference)
+        elif check_results and result["table"] is not None:
+            checked = validate(query_name, result["table"], rel_tol, sql)
+        status = result["status"]
+        tracking = status.get("tracking") or {}
+        server_seconds = tracking.get("server_seconds")
+        fetched = result.get("flight") or {}
+        first_batch_ms = fetched["first_batch_s"] * 1000 if fetched.get("first_batch_s") is not None else None
+        rows.append({
+            "run_id": run_id,
+            "iteration": iteration,
+            "warmup": warmup,
+            "query": query_name,
+            "backend": backend,
+            "label": f"{run_id} - {filename}",
+            "job_id": result["job_id"],
+            "state": result["state"],
+            "success": result["error"] is None,
+            "error": result["error"],
+            "started_at": int(started_at * 1000),
+            "elapsed_ms": result["elapsed_ms"],
+            "submit_ms": result["submit_ms"],
+            "server_ms": 1000 * server_seconds if server_seconds is not None else None,
+            "planning_ms": phase_ms(status, "planning"),
+            "queued_ms": phase_ms(status, "queued"),
+            "execution_ms": phase_ms(status, "execution"),
+            "seen_planning_ms": seen_phase_ms(status, "planning"),
+            "seen_queued_ms": seen_phase_ms(status, "queued"),
+            "seen_running_ms": seen_phase_ms(status, "running"),
+            "row_count": fetched["rows"] if fetched else status.get("rowCount"),
+            "polls": tracking.get("polls"),
+            "first_batch_ms": first_batch_ms,
+            "transfer_ms": result["elapsed_ms"] - first_batch_ms if first_batch_ms is not None else None,
+            "result_bytes": fetched.get("bytes"),
+            "batches": fetched.get("batches"),
+            "sql_bytes": len(sql.encode("utf-8")),
+            "download_ms": result["download_ms"],
+            "validation": checked.get("validation"),
+            "answer_set": checked.get("answer_set"),
+            "validation_detail": checked.get("detail"),
+            "result_hash": checked.get("hash"),
+        })
+        if result["error"] is None and fetched:
+            print(f"✅ [{phase}] {filename}: {result['elapsed_ms'] / 1000:.3f}s ({format_transfer(rows[-1])})", flush=True)
+        elif result["error"] is None:
+            print(f"✅ [{phase}] {filename}: {result['elapsed_ms'] / 1000:.3f}s ({format_timings(status)})", flush=True)
+        else:
+            marker = "⏱️" if result["state"] == TIMED_OUT else "❌"
+            print(f"{marker} [{phase}] {filename} failed: {result['error']}", flush=True)
+            if stop_on_error:
+                break
+        if checked.get("validation") == "mismatch":
+            print(f"⚠️ [{phase}] {filename}: result does not match {checked['answer_set']}: {checked['detail']}", flush=True)
+        elif checked.get("validation") == "match":
+            print(f"   [{phase}] {filename}: result matches {checked['answer_set']} (downloaded in {result['download_ms']:.1f} ms)", flush=True)
+    return rows
+
+def format_transfer(row):
+    """One-line summary of a Flight result, e.g. "first batch 120.5 ms; 1,000,000 rows, 12 batches, 80.0 MB at 410.2 MB/s"."""
+    transfer_s = row["transfer_ms"] / 1000 if row["transfer_ms"] else 0.0
+    megabytes = row["result_bytes"] / 1e6
+    rate = f" at {megabytes / transfer_s:,.1f} MB/s" if transfer_s else ""
+    first_batch = f"first batch {row['first_batch_ms']:.1f} ms" if row["first_batch_ms"] is not None else "no batches"
+    return f"{first_batch}; {row['row_count']:,} rows, {row['batches']} batches, {megabytes:,.1f} MB{rate}"
+
+def write_results(rows, output_file):
+    """Write the result rows as one typed Parquet file."""
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows, schema=RESULT_SCHEMA), output_file)
+    return output_file
+
+def write_jtl(rows, jtl_file, backend="rest"):
+    """
+    Append rows in the JMeter Simple Data Writer CSV format, so process_results.py and existing dashboards keep working.
+    The header is written only when the file is new, as JMeter does.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(jtl_file)), exist_ok=True)
+    new_file = not os.path.exists(jtl_file) or os.path.getsize(jtl_file) == 0
+    url = get_flight_client().location if backend == "flight" else f"{get_client().url}/api/v3/sql"
+    with open(jtl_file, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=JTL_FIELDS)
+        if new_file:
+            writer.writeheader()
+        for row in rows:
+            elapsed = int(round(row["elapsed_ms"]))
             writer.writerow({
-                "filename": filename,
-                "status": result["status"]
+                "timeStamp": row["started_at"],
+                "elapsed": elapsed,
+                "label": row["label"],
+                "responseCode": 200 if row["success"] else 500,
+                "responseMessage": "OK" if row["success"] else row["state"] or "ERROR",
+                "threadName": "Test Group 1-1",
+                "dataType": "text",
+                # A result that differs from its answer set fails like a JMeter response assertion
+                "success": "true" if row["success"] and row["validation"] != "mismatch" else "false",
+                "failureMessage": row["error"] or row["validation_detail"] or "",
+                "bytes": row["result_bytes"] or 0,
+                "sentBytes": row["sql_bytes"],
+                "grpThreads": 1,
+                "allThreads": 1,
+                "URL": url,
+                "Latency": int(round(row["first_batch_ms"])) if row["first_batch_ms"] is not None else elapsed,
+                "IdleTime": 0,
+                "Connect": int(round(row["submit_ms"] or 0)),
+                "job_id": row["job_id"] or "",
             })
+    return jtl_file
+
+def execute_queries(query_list=None, iterations=1, warmup=0, reflections=None, stop_on_error=False, jtl_file=None,
+                    backend="rest", discard=False, check_results=False, rel_tol=REL_TOL, reference_file=None,
+                    query_timeout=None, run_timeout=None):
+    """
+    Run the power test: warmup iterations whose results are kept but flagged, then measured iterations.
+    Each iteration gets its own run id (run-withref-<timestamp>, run-noref-<timestamp> or run-<timestamp>),
+    matching the labels of the JMeter plans.
+    :param reference_file: Results of reference_queries.py to check every result against, at any scale factor.
+    :param query_timeout: Seconds each query may take before it is cancelled and recorded as TIMED_OUT.
+    :param run_timeout: Seconds the whole run, warmup included, may take; the query running when it runs out is
+                        cancelled and the remaining queries and iterations are not run.
+    Ctrl-C cancels the running job, and the iterations finished so far are still written.
+    """
+    queries = load_queries(query_list)
+    if not queries:
+        print("❌ No query files found in the queries folder.")
+        return
+    prefix = {"wref": "run-withref", "noref": "run-noref"}.get(reflections, "run")
+    reference = load_reference(reference_file) if reference_file else None
+    if backend == "flight":
+        # Log in before the first query, so its time does not include the handshake
+        get_flight_client().auth_headers()
+    print(f"Running {len(queries)} queries over {backend}: {warmup} warmup and {iterations} measured iteration(s)")
+
+    deadline = time.perf_counter() + run_timeout if run_timeout else None
+    rows = []
+    try:
+        for iteration in range(warmup + iterations):
+            if deadline is not None and time.perf_counter() >= deadline:
+                print(f"⏱️ Run time budget of {run_timeout:g}s used up; {warmup + iterations - iteration} iteration(s) not run")
+                break
+            is_warmup = iteration < warmup
+            run_id = f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}"
+            iteration_rows = run_iteration(run_id, 0 if is_warmup else iteration - warmup + 1, is_warmup, queries, stop_on_error=stop_on_error,
+                                           backend=backend, discard=discard, check_results=check_results, rel_tol=rel_tol,
+                                           reference=reference, query_timeout=query_timeout, deadline=deadline)
+            rows.extend(iteration_rows)
+            if not is_warmup:
+                total = sum(row["elapsed_ms"] for row in iteration_rows) / 1000
+                failed = sum(not row["success"] for row in iteration_rows)
+                timed_out = sum(row["state"] == TIMED_OUT for row in iteration_rows)
+                summary = f"Iteration {iteration - warmup + 1} ({run_id}): {len(iteration_rows)} queries in {total:.1f}s, {failed} failed"
+                if timed_out:
+                    summary += f" ({timed_out} timed out)"
+                if check_results or reference is not None:
+                    counts = {label: sum(row["validation"] == label for row in iteration_rows) for label in ("match", "mismatch", "no answer set", "unparsed")}
+                    download = sum(row["download_ms"] or 0 for row in iteration_rows) / 1000
+                    summary += (f"; results: {counts['match']} match, {counts['mismatch']} wrong, "
+                                f"{counts['no answer set'] + counts['unparsed']} not checked; {download:.1f}s downloading")
+                print(summary)
+            # Keep run ids unique when an iteration finishes within the same second
+            while run_id == f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}":
+                time.sleep(0.1)
+    except KeyboardInterrupt:
+        # The running query is cancelled here rather than at exit, so it stops before the results are written
+        if backend == "flight":
+            # Closing the client cancels its open calls, and Dremio cancels the query with them
+            get_flight_client().close()
+            cancelled = "the running Flight query"
+        else:
+            cancelled = f"{len(get_client().cancel_outstanding())} running job(s)"
+        print(f"\n⛔ Interrupted: cancelled {cancelled}; writing the {len(rows)} queries of the finished iterations")
+
+    output_file = write_results(rows, os.path.join(results_dir, f"power_{prefix}-{time.strftime('%Y%m%d-%H%M%S')}.parquet"))
+    print(f"Results written to {output_file}")
+    if jtl_file:
+        print(f"JTL written to {write_jtl([row for row in rows if not row['warmup']], jtl_file, backend)}")
+    if backend == "rest":
+        get_client().print_overhead()
 
 if __name__ == "__main__":
-    execute_queries()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the TPC-DS power test against Dremio")
+    parser.add_argument("--query_list", type=str, default=None, help="File listing the query files to run in order, e.g. testplans/full_queries.csv (default: every .sql file in queries/)")
+    parser.add_argument("--iterations", type=int, default=1, help="Measured iterations over the query list (default: 1)")
+    parser.add_argument("--warmup", type=int, default=0, help="Warmup iterations run first and flagged in the results (default: 0)")
+    parser.add_argument("--reflections", choices=["wref", "noref"], default=None, help="Tag run ids as run-withref or run-noref, like the JMeter plans")
+    parser.add_argument("--stop_on_error", action="store_true", help="Stop an iteration at its first failed query")
+    parser.add_argument("--jtl", type=str, default=None, help="Also append the measured queries to this JMeter-format CSV, e.g. results/full_results.csv")
+    parser.add_argument("--backend", choices=["rest", "flight"], default="rest", help="Run queries through the REST API and poll the jobs, or stream the results over Arrow Flight (default: rest)")
+    parser.add_argument("--discard", action="store_true", help="With --backend flight, drop result batches as they arrive instead of keeping them in memory")
+    parser.add_argument("--validate", action="store_true", help="Download every result and compare it with tpcds-kit/answer_sets, regardless of row order")
+    parser.add_argument("--reference", type=str, default=None, help="Download every result and compare its row count and hash with a reference run of reference_queries.py, e.g. results/reference-<timestamp>.parquet")
+    parser.add_argument("--query_timeout", type=float, default=None, help="Seconds a query may take before its job is cancelled and it is recorded as TIMED_OUT (default: no limit)")
+    parser.add_argument("--run_timeout", type=float, default=None, help="Seconds the whole run may take, warmup included; the running query is cancelled and the rest is not run (default: no limit)")
+    parser.add_argument("--rel_tol", type=float, default=REL_TOL, help=f"Relative tolerance of numeric values when validating, beyond the answer set's printed precision (default: {REL_TOL})")
+    args = parser.parse_args()
+    require_catalog()
+    if args.discard and args.backend != "flight":
+        parser.error("--discard applies to --backend flight only")
+    if args.discard and args.validate:
+        parser.error("--validate needs the results; leave out --discard")
+    if args.discard and args.reference:
+        parser.error("--reference needs the results; leave out --discard")
+    if (args.query_timeout is not None and args.query_timeout <= 0) or (args.run_timeout is not None and args.run_timeout <= 0):
+        parser.error("--query_timeout and --run_timeout must be positive")
+    if args.validate and args.reference:
+        parser.error("--validate and --reference are alternatives; choose one")
+    execute_queries(args.query_list, args.iterations, args.warmup, args.reflections, args.stop_on_error, args.jtl,
+                    args.backend, args.discard, args.validate, args.rel_tol, args.reference,
+                    args.query_timeout, args.run_timeout)
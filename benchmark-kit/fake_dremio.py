@@ -0,0 +1,216 @@
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# A trailing LIMIT caps the rows of the generated result, as in flight_server.py
+LIMIT = re.compile(r"\bLIMIT\s+(\d+)\s*;?\s*$", re.IGNORECASE)
+JOB_PATH = re.compile(r"^/api/v3/job/(?P<job_id>[^/]+)(?P<results>/results)?$")
+CANCEL_PATH = re.compile(r"^/api/v3/job/(?P<job_id>[^/]+)/cancel$")
+
+# Token handed out to every login, and the expiry reported with it
+TOKEN = "fake-dremio-token"
+TOKEN_TTL = 3600
+# Dremio serves at most this many result rows per page
+MAX_PAGE_ROWS = 500
+
+def iso_timestamp(seconds):
+    """Epoch seconds as a Dremio timestamp, e.g. "2024-05-01T10:00:00.123Z"."""
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+class FakeDremioHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the client's pooled connections are reused as they are with Dremio
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without TCP_NODELAY every reply waits for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, code, body):
+        payload = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def authorized(self):
+        authorization = self.headers.get("Authorization", "")
+        if authorization.startswith("_dremio") or authorization.startswith("Bearer "):
+            return True
+        self.reply(401, {"errorMessage": "Unauthorized"})
+        return False
+
+    def do_POST(self):
+        time.sleep(self.server.latency)
+        body = self.read_body()
+        if self.path == "/apiv2/login":
+            self.server.count("login")
+            return self.reply(200, {"token": TOKEN, "expires": int((time.time() + TOKEN_TTL) * 1000)})
+        if not self.authorized():
+            return
+        if self.path == "/api/v3/sql":
+            self.server.count("submit")
+            if not body.get("sql"):
+                return self.reply(400, {"errorMessage": "No SQL supplied"})
+            return self.reply(200, {"id": self.server.submit(body["sql"])})
+        match = CANCEL_PATH.match(self.path)
+        if match and match.group("job_id") in self.server.jobs:
+            self.server.count("cancel")
+            if not self.server.cancel(match.group("job_id")):
+                return self.reply(400, {"errorMessage": f"Job {match.group('job_id')} may have completed and cannot be canceled."})
+            return self.reply(200, {})
+        self.reply(404, {"errorMessage": f"Unknown path {self.path}"})
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        if not self.authorized():
+            return
+        url = urlparse(self.path)
+        match = JOB_PATH.match(url.path)
+        job = self.server.jobs.get(match.group("job_id")) if match else None
+        if job is None:
+            return self.reply(404, {"errorMessage": f"Unknown path {self.path}"})
+        if match.group("results"):
+            self.server.count("results")
+            query = parse_qs(url.query)
+            offset = int(query.get("offset", ["0"])[0])
+            limit = min(int(query.get("limit", ["100"])[0]), MAX_PAGE_ROWS)
+            return self.reply(200, self.server.results_page(job, offset, limit))
+        self.server.count("status")
+        self.reply(200, self.server.job_status(job))
+
+class FakeDremioServer(ThreadingHTTPServer):
+    """
+    In-process stand-in for the Dremio REST endpoints the benchmark runner uses: /apiv2/login, /api/v3/sql,
+    /api/v3/job/{id}, /api/v3/job/{id}/results and /api/v3/job/{id}/cancel. Each job moves through PLANNING, QUEUED and RUNNING on a clock
+    and completes with a generated result, so the harness can be timed against known server-side durations.
+    Queries containing "fail" fail after planning and a trailing LIMIT caps the rows.
+    """
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), planning=0.0, queued=0.0, running=0.0, jitter=0.0, rows=100, columns=4, latency=0.0):
+        """
+        :param planning, queued, running: Seconds every job spends in each state.
+        :param jitter: Relative random spread of the durations, e.g. 0.2 for +-20%.
+        :param rows, columns: Result size: an id column plus float value columns.
+        :param latency: Seconds added to every request, standing in for the network and the coordinator.
+        """
+        super().__init__(address, FakeDremioHandler)
+        self.durations = {"PLANNING": planning, "QUEUED": queued, "RUNNING": running}
+        self.jitter = jitter
+        self.rows = rows
+        self.columns = columns
+        self.latency = latency
+        self.jobs = {}
+        self.requests = {"login": 0, "submit": 0, "status": 0, "results": 0, "cancel": 0}
+        self.lock = threading.Lock()
+        self.random = random.Random(0)
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self):
+        """Serve from a background thread; return the server."""
+        self.thread = threading.Thread(target=self.serve_forever, name="fake-dremio", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def count(self, endpoint):
+        with self.lock:
+            self.requests[endpoint] += 1
+
+    def submit(self, sql):
+        """Register a job with its state schedule; return its id."""
+        with self.lock:
+            job_id = f"fake-{len(self.jobs) + 1:08d}"
+            durations = {state: seconds * (1 + self.random.uniform(-self.jitter, self.jitter)) for state, seconds in self.durations.items()}
+            failed = "fail" in sql.lower()
+            if failed:
+                durations["QUEUED"] = durations["RUNNING"] = 0.0
+            limit = LIMIT.search(sql)
+            self.jobs[job_id] = {
+                "id": job_id, "submitted": time.time(), "durations": durations, "failed": failed, "canceled_at": None,
+                "rows": min(self.rows, int(limit.group(1))) if limit else self.rows,
+            }
+        return job_id
+
+    def cancel(self, job_id):
+        """Cancel a job that is still running; False if it has already finished."""
+        with self.lock:
+            job = self.jobs[job_id]
+            if job["canceled_at"] is not None or self.job_status(job)["jobState"] in ("COMPLETED", "FAILED"):
+                return False
+            job["canceled_at"] = time.time()
+            return True
+
+    def server_seconds(self, job_id):
+        """Seconds from submission to the end of a job, as reported by its startedAt and endedAt."""
+        return sum(self.jobs[job_id]["durations"].values())
+
+    def job_status(self, job):
+        """
+        The /api/v3/job/{id} document of a job at the current time. Resource scheduling starts when planning
+        ends and ends with the queued state, and its timestamps appear once reached, as Dremio reports them.
+        """
+        now = time.time() if job["canceled_at"] is None else job["canceled_at"]
+        status = {"jobState": "COMPLETED", "startedAt": iso_timestamp(job["submitted"])}
+        planned = job["submitted"] + job["durations"]["PLANNING"]
+        scheduled = planned + job["durations"]["QUEUED"]
+        if not job["failed"]:
+            for key, reached_at in (("resourceSchedulingStartedAt", planned), ("resourceSchedulingEndedAt", scheduled)):
+                if now >= reached_at:
+                    status[key] = iso_timestamp(reached_at)
+        if job["canceled_at"] is not None:
+            return dict(status, jobState="CANCELED", endedAt=iso_timestamp(job["canceled_at"]), errorMessage="Query cancelled by user")
+        elapsed = now - job["submitted"]
+        for state, seconds in job["durations"].items():
+            if elapsed < seconds:
+                status["jobState"] = state
+                return status
+            elapsed -= seconds
+        status["endedAt"] = iso_timestamp(job["submitted"] + sum(job["durations"].values()))
+        if job["failed"]:
+            return dict(status, jobState="FAILED", errorMessage="boom")
+        return dict(status, rowCount=job["rows"])
+
+    def results_page(self, job, offset, limit):
+        """One page of a job's generated result rows."""
+        names = ["id"] + [f"value_{i}" for i in range(1, self.columns)]
+        schema = [{"name": "id", "type": {"name": "BIGINT"}}] + [{"name": name, "type": {"name": "DOUBLE"}} for name in names[1:]]
+        rows = [
+            dict(zip(names, [row] + [row + i / 8 for i in range(1, self.columns)]))
+            for row in range(offset, min(offset + limit, job["rows"]))
+        ]
+        return {"rowCount": job["rows"], "schema": schema, "rows": rows}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake of the Dremio REST API, for testing the benchmark runner without a cluster")
+    parser.add_argument("--port", type=int, default=9047, help="Port to listen on (default: 9047, Dremio's REST port)")
+    parser.add_argument("--planning", type=float, default=0.05, help="Seconds every job spends planning (default: 0.05)")
+    parser.add_argument("--queued", type=float, default=0.0, help="Seconds every job spends queued (default: 0)")
+    parser.add_argument("--running", type=float, default=0.5, help="Seconds every job spends running (default: 0.5)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative random spread of the durations, e.g. 0.2 for +-20%% (default: 0)")
+    parser.add_argument("--rows", type=int, default=100, help="Rows of every result (default: 100)")
+    parser.add_argument("--columns", type=int, default=4, help="Columns of the result: a BIGINT id plus DOUBLE values (default: 4)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request (default: 0)")
+    args = parser.parse_args()
+    server = FakeDremioServer(("0.0.0.0", args.port), args.planning, args.queued, args.running, args.jitter, args.rows, args.columns, args.latency)
+    print(f"Fake Dremio listening on http://localhost:{args.port}; set DREMIO_URL to this address (any username and password)")
+    server.serve_forever()
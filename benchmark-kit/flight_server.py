@@ -0,0 +1,88 @@
+import re
+import time
+import argparse
+import numpy as np
+import pyarrow as pa
+import pyarrow.flight as flight
+
+# A trailing LIMIT caps the rows of the generated result
+LIMIT = re.compile(r"\bLIMIT\s+(\d+)\s*;?\s*$", re.IGNORECASE)
+
+# Bearer token handed out to every client that logs in
+TOKEN = "stand-in-token"
+
+class BearerAuthMiddleware(flight.ServerMiddleware):
+    def sending_headers(self):
+        return {"authorization": f"Bearer {TOKEN}"}
+
+class AuthMiddlewareFactory(flight.ServerMiddlewareFactory):
+    """Accepts any username and password, or any bearer token, and answers logins with a bearer token as Dremio does."""
+
+    def start_call(self, info, headers):
+        values = headers.get("authorization", [])
+        if not values or values[0].split(" ")[0] not in ("Basic", "Bearer"):
+            raise flight.FlightUnauthenticatedError("No credentials supplied")
+        return BearerAuthMiddleware()
+
+class NoopAuthHandler(flight.ServerAuthHandler):
+    """Lets the handshake through; credentials are checked by the middleware from the call headers."""
+
+    def authenticate(self, outgoing, incoming):
+        pass
+
+    def is_valid(self, token):
+        return ""
+
+class StandInFlightServer(flight.FlightServerBase):
+    """
+    Answers every query with a generated table, so the Flight backend of the benchmark runner can be exercised
+    without Dremio. Queries containing "fail" raise an error and a trailing LIMIT caps the rows; the delays stand
+    in for planning and execution.
+    """
+
+    def __init__(self, location, rows=100_000, columns=8, batch_rows=65_536, plan_delay=0.0, run_delay=0.0, **kwargs):
+        super().__init__(location, auth_handler=NoopAuthHandler(), middleware={"auth": AuthMiddlewareFactory()}, **kwargs)
+        self.rows = rows
+        self.batch_rows = batch_rows
+        self.plan_delay = plan_delay
+        self.run_delay = run_delay
+        # One batch is built up front and sent repeatedly, so generating data does not slow the stream down
+        rng = np.random.default_rng(0)
+        arrays = [pa.array(np.arange(batch_rows, dtype=np.int64))]
+        arrays += [pa.array(rng.random(batch_rows)) for _ in range(columns - 1)]
+        self.batch = pa.RecordBatch.from_arrays(arrays, names=["id"] + [f"value_{i}" for i in range(1, columns)])
+
+    def get_flight_info(self, context, descriptor):
+        time.sleep(self.plan_delay)
+        sql = descriptor.command.decode()
+        if "fail" in sql.lower():
+            raise flight.FlightServerError("boom")
+        endpoint = flight.FlightEndpoint(descriptor.command, [])
+        return flight.FlightInfo(self.batch.schema, descriptor, [endpoint], self.result_rows(sql), -1)
+
+    def do_get(self, context, ticket):
+        time.sleep(self.run_delay)
+        return flight.GeneratorStream(self.batch.schema, self.batches(self.result_rows(ticket.ticket.decode())))
+
+    def result_rows(self, sql):
+        limit = LIMIT.search(sql)
+        return min(self.rows, int(limit.group(1))) if limit else self.rows
+
+    def batches(self, rows):
+        remaining = rows
+        while remaining > 0:
+            yield self.batch.slice(0, min(remaining, self.batch_rows))
+            remaining -= self.batch_rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Arrow Flight stand-in for Dremio, for testing the Flight backend")
+    parser.add_argument("--port", type=int, default=32010, help="Port to listen on (default: 32010, Dremio's Flight port)")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows returned by every query (default: 100000)")
+    parser.add_argument("--columns", type=int, default=8, help="Columns of the result: an int64 id plus float64 values (default: 8)")
+    parser.add_argument("--batch_rows", type=int, default=65_536, help="Rows per record batch (default: 65536)")
+    parser.add_argument("--plan_delay", type=float, default=0.0, help="Seconds every get_flight_info call takes (default: 0)")
+    parser.add_argument("--run_delay", type=float, default=0.0, help="Seconds before the first batch is sent (default: 0)")
+    args = parser.parse_args()
+    server = StandInFlightServer(f"grpc+tcp://0.0.0.0:{args.port}", args.rows, args.columns, args.batch_rows, args.plan_delay, args.run_delay)
+    print(f"Flight stand-in listening on grpc+tcp://localhost:{server.port}; set DREMIO_FLIGHT_URL to this address")
+    server.serve()
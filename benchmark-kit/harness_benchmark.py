@@ -0,0 +1,212 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Shared Dremio client in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dremio_client import POLL_MAX_INTERVAL, DremioError, get_client
+from execute_queries import execute_query, results_dir
+from fake_dremio import FakeDremioServer
+
+# Submit rates count as sustained when every job has been seen complete within this long after its server-side end;
+# beyond it the poller falls behind and jobs pile up
+SUSTAINED_LAG_SECONDS = 2 * POLL_MAX_INTERVAL
+
+# Query context of every job; the fake server ignores it, so no catalog has to be configured
+CONTEXT = ["fake"]
+
+# One row per query of the overhead test
+OVERHEAD_SCHEMA = pa.schema([
+    pa.field("run_id", pa.string(), nullable=False),
+    pa.field("result_rows", pa.int64(), nullable=False),
+    pa.field("success", pa.bool_(), nullable=False),
+    pa.field("error", pa.string()),
+    pa.field("elapsed_ms", pa.float64(), nullable=False),
+    pa.field("server_ms", pa.float64()),
+    pa.field("submit_ms", pa.float64()),
+    pa.field("poll_lag_ms", pa.float64()),
+    pa.field("polls", pa.int32()),
+    pa.field("download_ms", pa.float64()),
+])
+
+# One row per concurrency level of the submit rate test
+RATE_SCHEMA = pa.schema([
+    pa.field("run_id", pa.string(), nullable=False),
+    pa.field("threads", pa.int32(), nullable=False),
+    pa.field("submitted", pa.int64(), nullable=False),
+    pa.field("completed", pa.int64(), nullable=False),
+    pa.field("errors", pa.int64(), nullable=False),
+    pa.field("submits_per_s", pa.float64(), nullable=False),
+    pa.field("submit_p50_ms", pa.float64()),
+    pa.field("submit_p95_ms", pa.float64()),
+    pa.field("max_lag_s", pa.float64()),
+    pa.field("sustained", pa.bool_(), nullable=False),
+])
+
+def percentile(values, fraction):
+    """Nearest-rank percentile; None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def measure_overhead(run_id, server, queries, result_rows):
+    """
+    Run queries one after another through execute_query, as the power test does, with results downloaded.
+    The harness overhead of each query is its elapsed time minus the fake job's known server-side duration:
+    the submit round trip and the lag from the job's end until the poller sees it complete (poll_lag_ms).
+    :return: One row per query.
+    """
+    server.rows = result_rows
+    rows = []
+    for i in range(queries):
+        started_at = time.time()
+        result = execute_query(f"SELECT {i} FROM fake", CONTEXT, fetch=True)
+        tracking = result["status"].get("tracking") or {}
+        server_ms = poll_lag_ms = None
+        if result["job_id"]:
+            job = server.jobs[result["job_id"]]
+            server_ms = server.server_seconds(job["id"]) * 1000
+            # execute_query's elapsed time ends when the poller has seen the job complete
+            poll_lag_ms = (started_at - job["submitted"]) * 1000 + result["elapsed_ms"] - server_ms
+        rows.append({
+            "run_id": run_id, "result_rows": result_rows, "success": result["error"] is None, "error": result["error"],
+            "elapsed_ms": result["elapsed_ms"], "server_ms": server_ms, "submit_ms": result["submit_ms"],
+            "poll_lag_ms": poll_lag_ms, "polls": tracking.get("polls"), "download_ms": result["download_ms"],
+        })
+    return rows
+
+def measure_submit_rate(run_id, server, threads, seconds):
+    """
+    Submit jobs from threads as fast as the client allows for seconds, tracking every job to completion through the
+    shared poller, as the throughput test does.
+    :return: Row with the submit rate, submit latency and how far the poller fell behind the jobs' server-side ends.
+    """
+    client = get_client()
+    latencies, tracked, errors, seen_at = [], [], [], {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def submit_loop():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                job_id = client.submit("SELECT 1 FROM fake", CONTEXT)
+            except DremioError as e:
+                with lock:
+                    errors.append(e)
+                continue
+            future = client.track(job_id)
+            # Record when the poller saw the job finish, to compare with the job's own end time
+            future.add_done_callback(lambda _, job_id=job_id: seen_at.setdefault(job_id, time.time()))
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                tracked.append((job_id, future))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for _ in range(threads):
+            pool.submit(submit_loop)
+    submit_seconds = time.perf_counter() - start
+
+    wait([future for _, future in tracked], timeout=max(60.0, seconds * 10))
+    completed = sum(future.done() and future.exception() is None for _, future in tracked)
+    lags = [
+        seen_at[job_id] - server.jobs[job_id]["submitted"] - server.server_seconds(job_id)
+        for job_id, _ in tracked if job_id in seen_at
+    ]
+    max_lag = max(lags) if lags else None
+    return {
+        "run_id": run_id, "threads": threads, "submitted": len(tracked), "completed": completed, "errors": len(errors),
+        "submits_per_s": len(tracked) / submit_seconds,
+        "submit_p50_ms": 1000 * statistics.median(latencies) if latencies else None,
+        "submit_p95_ms": 1000 * percentile(latencies, 0.95) if latencies else None,
+        "max_lag_s": max_lag,
+        "sustained": completed == len(tracked) and max_lag is not None and max_lag <= SUSTAINED_LAG_SECONDS,
+    }
+
+def report_overhead(rows):
+    """Print the median and 95th percentile of every overhead measurement per result size."""
+    print(f"\n{'Rows':>9} | {'Queries':>7} | {'Server':>9} | {'Elapsed':>9} | {'Submit p50/p95':>17} | {'Poll lag p50/p95':>17} | {'Polls':>5} | {'Download p50':>12}")
+    print("-" * 106)
+    for result_rows in dict.fromkeys(row["result_rows"] for row in rows):
+        selected = [row for row in rows if row["result_rows"] == result_rows and row["success"]]
+        if not selected:
+            print(f"{result_rows:>9,} | {0:>7} | failed")
+            continue
+
+        def values(column):
+            return [row[column] for row in selected if row[column] is not None]
+        print(f"{result_rows:>9,} | {len(selected):>7} | {statistics.median(values('server_ms')):>6.1f} ms | "
+              f"{statistics.median(values('elapsed_ms')):>6.1f} ms | "
+              f"{statistics.median(values('submit_ms')):>6.1f}/{percentile(values('submit_ms'), 0.95):>6.1f} ms | "
+              f"{statistics.median(values('poll_lag_ms')):>6.1f}/{percentile(values('poll_lag_ms'), 0.95):>6.1f} ms | "
+              f"{statistics.median(values('polls')):>5.0f} | {statistics.median(values('download_ms')):>9.1f} ms")
+
+def report_rates(rows):
+    """Print the submit rate per concurrency level and the highest rate the client sustained."""
+    print(f"\n{'Threads':>7} | {'Submitted':>9} | {'Submits/s':>9} | {'Submit p50/p95':>17} | {'Max lag':>8} | Sustained")
+    print("-" * 76)
+    for row in rows:
+        lag = f"{row['max_lag_s']:>6.2f} s" if row["max_lag_s"] is not None else f"{'-':>8}"
+        print(f"{row['threads']:>7} | {row['submitted']:>9,} | {row['submits_per_s']:>9.1f} | "
+              f"{row['submit_p50_ms'] or 0:>6.1f}/{row['submit_p95_ms'] or 0:>6.1f} ms | {lag} | {'yes' if row['sustained'] else 'no'}")
+    sustained = [row for row in rows if row["sustained"]]
+    if sustained:
+        best = max(sustained, key=lambda row: row["submits_per_s"])
+        print(f"Maximum sustained submit rate: {best['submits_per_s']:.1f} jobs/s with {best['threads']} thread(s)")
+    else:
+        print(f"\033[91mNo level sustained its submit rate: the poller fell more than {SUSTAINED_LAG_SECONDS:.0f}s behind.\033[0m")
+
+def harness_benchmark(queries=20, result_rows=(0, 1_000, 10_000), threads=(1, 2, 4, 8, 16), seconds=5.0,
+                      planning=0.05, queued=0.0, running=0.2, latency=0.0):
+    """
+    Measure the runner's own overhead and the highest job submit rate of one client process against an in-process
+    fake Dremio with known job durations.
+    """
+    server = FakeDremioServer(planning=planning, queued=queued, running=running, latency=latency).start()
+    # Point the process-wide client at the fake server; it logs in once like against Dremio
+    os.environ["DREMIO_URL"] = server.url
+    os.environ["DREMIO_USERNAME"] = os.environ["DREMIO_PASSWORD"] = "harness"
+    os.environ.pop("DREMIO_PAT", None)
+    timestamp = time.strftime('%Y%m%d-%H%M%S')
+    print(f"Fake Dremio on {server.url}: jobs plan {planning}s, queue {queued}s and run {running}s; {latency * 1000:.1f} ms per request")
+
+    try:
+        overhead_rows = []
+        for size in result_rows:
+            overhead_rows.extend(measure_overhead(f"harness-overhead-{timestamp}", server, queries, size))
+        report_overhead(overhead_rows)
+        rate_rows = []
+        for count in threads:
+            rate_rows.append(measure_submit_rate(f"harness-submit-{timestamp}", server, count, seconds))
+        report_rates(rate_rows)
+        print(f"Fake server requests: {', '.join(f'{endpoint} {count:,}' for endpoint, count in server.requests.items())}")
+        get_client().print_overhead()
+    finally:
+        server.stop()
+
+    os.makedirs(results_dir, exist_ok=True)
+    for name, rows, schema in (("overhead", overhead_rows, OVERHEAD_SCHEMA), ("submit", rate_rows, RATE_SCHEMA)):
+        output_file = os.path.join(results_dir, f"harness-{name}-{timestamp}.parquet")
+        pq.write_table(pa.Table.from_pylist(rows, schema=schema), output_file)
+        print(f"Results written to {output_file}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the benchmark runner's own overhead and maximum submit rate against a local fake Dremio")
+    parser.add_argument("--queries", type=int, default=20, help="Queries per result size in the overhead test (default: 20)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[0, 1_000, 10_000], help="Result sizes downloaded in the overhead test (default: 0 1000 10000)")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Submitting threads per level of the submit rate test (default: 1 2 4 8 16)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Seconds each submit rate level submits for (default: 5)")
+    parser.add_argument("--planning", type=float, default=0.05, help="Seconds every fake job spends planning (default: 0.05)")
+    parser.add_argument("--queued", type=float, default=0.0, help="Seconds every fake job spends queued (default: 0)")
+    parser.add_argument("--running", type=float, default=0.2, help="Seconds every fake job spends running (default: 0.2)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fake server adds to every request (default: 0)")
+    args = parser.parse_args()
+    harness_benchmark(args.queries, args.rows, args.threads, args.seconds, args.planning, args.queued, args.running, args.latency)
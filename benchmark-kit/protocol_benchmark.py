@@ -0,0 +1,238 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import importlib.util
+import requests
+import pyarrow as pa
+import pyarrow.flight as flight
+import pyarrow.parquet as pq
+
+# Shared Dremio clients in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dremio_client import DremioClient, DremioError
+from dremio_flight import DremioFlightClient
+from execute_queries import CATALOG, require_catalog, results_dir
+
+# JDBC drivers; the JVM is started once, so every driver jar is put on its class path
+DREMIO_HOST = os.getenv("DREMIO_HOST", "localhost")
+JDBC_PORT = os.getenv("DREMIO_JDBC_PORT", "31010")
+FLIGHT_PORT = os.getenv("DREMIO_PORT", "32010")
+JDBC_JARS = [jar for jar in (os.getenv("DREMIO_JDBC_JAR"), os.getenv("DREMIO_FLIGHT_JDBC_JAR")) if jar]
+
+# Rows fetched per call from a JDBC cursor and per page from the REST results endpoint
+FETCH_SIZE = 500
+
+# Result shapes compared across protocols; {rows} is the row count of the medium and wide results
+SHAPES = {
+    "small": "SELECT d_year, COUNT(*) AS days FROM date_dim GROUP BY d_year",
+    "medium": "SELECT c_customer_sk, c_customer_id, c_birth_year FROM customer LIMIT {rows}",
+    "wide": "SELECT * FROM catalog_sales LIMIT {rows}",
+}
+
+# One row per protocol, shape and repetition
+RESULT_SCHEMA = pa.schema([
+    pa.field("run_id", pa.string(), nullable=False),
+    pa.field("protocol", pa.string(), nullable=False),
+    pa.field("shape", pa.string(), nullable=False),
+    pa.field("repetition", pa.int32(), nullable=False),
+    pa.field("success", pa.bool_(), nullable=False),
+    pa.field("error", pa.string()),
+    pa.field("connect_ms", pa.float64()),
+    pa.field("submit_ms", pa.float64()),
+    pa.field("first_row_ms", pa.float64()),
+    pa.field("elapsed_ms", pa.float64()),
+    pa.field("rows", pa.int64()),
+    pa.field("rows_per_s", pa.float64()),
+])
+
+class RestProtocol:
+    """Dremio REST API: submit, poll the job, then page through /api/v3/job/{id}/results."""
+    name = "rest"
+    errors = (DremioError, requests.exceptions.RequestException)
+
+    def connect(self):
+        self.client = DremioClient.from_env()
+        if not self.client.pat:
+            self.client.login()
+
+    def run(self, sql):
+        start = time.perf_counter()
+        job_id = self.client.submit(sql, [CATALOG])
+        submit_seconds = time.perf_counter() - start
+        status = self.client.wait_for_job(job_id)
+        if status.get("jobState") != "COMPLETED":
+            raise DremioError(status.get("errorMessage") or status.get("jobState"))
+        total = status.get("rowCount") or 0
+        rows, first_row_seconds = 0, None
+        while rows < total:
+            page = self.client.job_results(job_id, rows, FETCH_SIZE).get("rows", [])
+            if not page:
+                break
+            first_row_seconds = first_row_seconds or time.perf_counter() - start
+            rows += len(page)
+        return submit_seconds, first_row_seconds, rows
+
+    def close(self):
+        self.client.close()
+
+class JdbcProtocol:
+    """A JDBC driver through JayDeBeApi; execute() blocks until the first results are ready, so it is the submit time."""
+    errors = (Exception,)
+
+    def __init__(self, name, driver, url):
+        self.name = name
+        self.driver = driver
+        self.url = url
+
+    def connect(self):
+        # JayDeBeApi and a JVM are only needed for the JDBC protocols
+        import jaydebeapi
+        if not JDBC_JARS:
+            raise ValueError("DREMIO_JDBC_JAR or DREMIO_FLIGHT_JDBC_JAR must point to the driver jar.")
+        self.connection = jaydebeapi.connect(self.driver, self.url, [os.getenv("DREMIO_USERNAME"), os.getenv("DREMIO_PASSWORD")], JDBC_JARS)
+
+    def run(self, sql):
+        cursor = self.connection.cursor()
+        try:
+            start = time.perf_counter()
+            cursor.execute(sql)
+            submit_seconds = time.perf_counter() - start
+            rows, first_row_seconds = 0, None
+            while True:
+                batch = cursor.fetchmany(FETCH_SIZE)
+                if not batch:
+                    break
+                first_row_seconds = first_row_seconds or time.perf_counter() - start
+                rows += len(batch)
+            return submit_seconds, first_row_seconds, rows
+        finally:
+            cursor.close()
+
+    def close(self):
+        self.connection.close()
+
+class FlightProtocol:
+    """pyarrow.flight: get_flight_info plans the query, do_get streams the record batches, which are discarded."""
+    name = "flight"
+    errors = (flight.FlightError,)
+
+    def connect(self):
+        self.client = DremioFlightClient.from_env()
+        self.client.auth_headers()
+
+    def run(self, sql):
+        result = self.client.execute(sql, [CATALOG], discard=True)
+        return result["info_s"], result["first_batch_s"], result["rows"]
+
+    def close(self):
+        self.client.close()
+
+PROTOCOLS = {
+    "rest": RestProtocol,
+    "jdbc": lambda: JdbcProtocol("jdbc", "com.dremio.jdbc.Driver",
+                                 f"jdbc:dremio:direct={DREMIO_HOST}:{JDBC_PORT};schema={CATALOG}"),
+    "flight-jdbc": lambda: JdbcProtocol("flight-jdbc", "org.apache.arrow.driver.jdbc.ArrowFlightJdbcDriver",
+                                        f"jdbc:arrow-flight-sql://{DREMIO_HOST}:{FLIGHT_PORT}/?useEncryption=false&schema={CATALOG}"),
+    "flight": FlightProtocol,
+}
+
+# Protocols that need JayDeBeApi, a JVM and a driver jar
+JDBC_PROTOCOLS = ["jdbc", "flight-jdbc"]
+
+def jdbc_available():
+    """Whether JayDeBeApi is installed and a JDBC driver jar is configured."""
+    return bool(JDBC_JARS) and importlib.util.find_spec("jaydebeapi") is not None
+
+def run_protocol(run_id, protocol, shapes, repetitions):
+    """
+    Connect, run every shape once and disconnect, repetitions times; connect time is measured on each connection.
+    :return: One result row per shape and repetition.
+    """
+    rows = []
+    for repetition in range(1, repetitions + 1):
+        start = time.perf_counter()
+        try:
+            protocol.connect()
+        except Exception as e:
+            print(f"❌ {protocol.name}: connect failed: {e}", flush=True)
+            rows.extend(result_row(run_id, protocol.name, shape, repetition, error=str(e)) for shape in shapes)
+            continue
+        connect_seconds = time.perf_counter() - start
+        try:
+            for shape, sql in shapes.items():
+                query_start = time.perf_counter()
+                try:
+                    submit_seconds, first_row_seconds, count = protocol.run(sql)
+                except protocol.errors as e:
+                    print(f"❌ {protocol.name} {shape}: {e}", flush=True)
+                    rows.append(result_row(run_id, protocol.name, shape, repetition, connect_seconds, error=str(e)))
+                    continue
+                elapsed = time.perf_counter() - query_start
+                rows.append(result_row(run_id, protocol.name, shape, repetition, connect_seconds, submit_seconds, first_row_seconds, elapsed, count))
+                print(f"✅ {protocol.name} {shape} #{repetition}: {count:,} rows in {elapsed:.3f}s", flush=True)
+        finally:
+            protocol.close()
+    return rows
+
+def result_row(run_id, protocol, shape, repetition, connect=None, submit=None, first_row=None, elapsed=None, rows=None, error=None):
+    def ms(seconds):
+        return seconds * 1000 if seconds is not None else None
+    return {
+        "run_id": run_id, "protocol": protocol, "shape": shape, "repetition": repetition,
+        "success": error is None, "error": error, "connect_ms": ms(connect), "submit_ms": ms(submit),
+        "first_row_ms": ms(first_row), "elapsed_ms": ms(elapsed), "rows": rows,
+        "rows_per_s": rows / elapsed if rows is not None and elapsed else None,
+    }
+
+def report(rows):
+    """Print the median of every measurement per protocol and shape."""
+    def median(selected, column):
+        values = [row[column] for row in selected if row[column] is not None]
+        return statistics.median(values) if values else float("nan")
+
+    print(f"\n{'Protocol':<12} | {'Shape':<6} | {'Runs':>4} | {'Connect':>10} | {'Submit':>10} | {'First row':>10} | {'Total':>10} | {'Rows':>9} | {'Rows/s':>11}")
+    print("-" * 106)
+    for protocol in dict.fromkeys(row["protocol"] for row in rows):
+        for shape in dict.fromkeys(row["shape"] for row in rows):
+            selected = [row for row in rows if row["protocol"] == protocol and row["shape"] == shape and row["success"]]
+            if not selected:
+                print(f"{protocol:<12} | {shape:<6} | {0:>4} | failed")
+                continue
+            print(f"{protocol:<12} | {shape:<6} | {len(selected):>4} | {median(selected, 'connect_ms'):>7.1f} ms | "
+                  f"{median(selected, 'submit_ms'):>7.1f} ms | {median(selected, 'first_row_ms'):>7.1f} ms | "
+                  f"{median(selected, 'elapsed_ms'):>7.1f} ms | {median(selected, 'rows'):>9,.0f} | {median(selected, 'rows_per_s'):>11,.0f}")
+
+def protocol_benchmark(protocols, shapes=None, result_rows=100_000, repetitions=3):
+    """
+    Run the same result shapes through each client protocol and compare connect time, submit latency,
+    time to first row and rows per second.
+    """
+    selected = {name: sql.format(rows=result_rows) for name, sql in SHAPES.items() if not shapes or name in shapes}
+    run_id = f"protocols-{time.strftime('%Y%m%d-%H%M%S')}"
+    print(f"Comparing {', '.join(protocols)} on {', '.join(selected)} result(s), {repetitions} repetition(s) ({run_id})")
+    rows = []
+    for name in protocols:
+        rows.extend(run_protocol(run_id, PROTOCOLS[name](), selected, repetitions))
+    report(rows)
+    os.makedirs(results_dir, exist_ok=True)
+    output_file = os.path.join(results_dir, f"{run_id}.parquet")
+    pq.write_table(pa.Table.from_pylist(rows, schema=RESULT_SCHEMA), output_file)
+    print(f"Results written to {output_file}")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Dremio client protocols (REST, legacy JDBC, Flight JDBC, pyarrow Flight) on the same queries")
+    parser.add_argument("--protocols", type=str, nargs="+", choices=list(PROTOCOLS), default=None, help="Protocols to compare (default: all; jdbc and flight-jdbc only when JayDeBeApi and a driver jar are available)")
+    parser.add_argument("--shapes", type=str, nargs="+", choices=list(SHAPES), default=None, help="Result shapes to run (default: all)")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows of the medium and wide results (default: 100000)")
+    parser.add_argument("--repetitions", type=int, default=3, help="Connections per protocol; every shape runs once per connection (default: 3)")
+    args = parser.parse_args()
+    require_catalog()
+    protocols = args.protocols
+    if protocols is None:
+        protocols = [name for name in PROTOCOLS if name not in JDBC_PROTOCOLS or jdbc_available()]
+        if len(protocols) < len(PROTOCOLS):
+            print(f"Skipping {', '.join(JDBC_PROTOCOLS)}: install JayDeBeApi (and a JDK) and set DREMIO_JDBC_JAR or DREMIO_FLIGHT_JDBC_JAR to include them.")
+    protocol_benchmark(protocols, args.shapes, args.rows, args.repetitions)
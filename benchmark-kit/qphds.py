@@ -0,0 +1,90 @@
+import math
+import argparse
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Queries in one TPC-DS stream
+QUERIES_PER_STREAM = 99
+
+def ceil_tenth(seconds):
+    """The specification rounds every timing up to the next 0.1 second."""
+    return math.ceil(seconds * 10) / 10
+
+def power_seconds(power_file, iteration=1):
+    """
+    Elapsed time of one measured iteration of a power run written by execute_queries.py:
+    from the start of its first query to the end of its last.
+    """
+    table = pq.read_table(power_file).filter(~pc.field("warmup") & (pc.field("iteration") == iteration))
+    if table.num_rows == 0:
+        raise ValueError(f"{power_file} has no measured iteration {iteration}")
+    rows = table.select(["started_at", "elapsed_ms", "success"]).to_pylist()
+    start = min(row["started_at"].timestamp() for row in rows)
+    end = max(row["started_at"].timestamp() + row["elapsed_ms"] / 1000 for row in rows)
+    return end - start, sum(not row["success"] for row in rows)
+
+def run_seconds(result_file):
+    """
+    Wall time recorded by throughput_test.py or data_maintenance.py.
+    :return: Tuple of (seconds, failed statements, distinct streams).
+    """
+    table = pq.read_table(result_file)
+    metadata = table.schema.metadata or {}
+    if b"wall_seconds" not in metadata:
+        raise ValueError(f"{result_file} has no wall_seconds metadata; is it a throughput or data maintenance result?")
+    failed = table.num_rows - pc.sum(table["success"]).as_py() if table.num_rows else 0
+    streams = len(pc.unique(table["stream"])) if "stream" in table.column_names else None
+    return float(metadata[b"wall_seconds"]), failed, streams
+
+def qphds(scale_factor, streams, load_seconds, power, throughput, maintenance):
+    """
+    Compute the TPC-DS primary metric from the timings of one benchmark run (all in seconds):
+    QphDS@SF = floor(SF * Q / (T_PT * T_TT * T_DM * T_LD) ^ (1/4)), with Q = streams * 99,
+    T_PT = power * streams, T_TT and T_DM the sums of both throughput and maintenance runs,
+    T_LD = 0.01 * streams * load, each converted to hours.
+    :return: Tuple of (QphDS, {component: hours}).
+    """
+    hours = {
+        "T_LD": 0.01 * streams * ceil_tenth(load_seconds) / 3600,
+        "T_PT": streams * ceil_tenth(power) / 3600,
+        "T_TT": sum(ceil_tenth(seconds) for seconds in throughput) / 3600,
+        "T_DM": sum(ceil_tenth(seconds) for seconds in maintenance) / 3600,
+    }
+    product = hours["T_PT"] * hours["T_TT"] * hours["T_DM"] * hours["T_LD"]
+    if product <= 0:
+        raise ValueError("Every timing must be greater than zero")
+    return math.floor(scale_factor * streams * QUERIES_PER_STREAM / product ** 0.25), hours
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the TPC-DS QphDS@SF metric from load, power, throughput and data maintenance results")
+    parser.add_argument("--scale_factor", type=int, required=True, help="Scale factor of the tested database")
+    parser.add_argument("--load_seconds", type=float, required=True, help="Elapsed seconds of the load test (e.g. the 'iceberg.py tables' run)")
+    parser.add_argument("--power", type=str, required=True, help="Power run results, results/power_<run id>.parquet")
+    parser.add_argument("--power_iteration", type=int, default=1, help="Measured iteration of the power run to use (default: 1)")
+    parser.add_argument("--throughput", type=str, nargs=2, required=True, metavar=("RUN1", "RUN2"), help="Results of the two throughput runs, results/throughput-<timestamp>.parquet")
+    parser.add_argument("--maintenance", type=str, nargs=2, required=True, metavar=("RUN1", "RUN2"), help="Results of the two data maintenance runs, results/maintenance-<timestamp>.parquet")
+    args = parser.parse_args()
+
+    power, failed = power_seconds(args.power, args.power_iteration)
+    throughput, maintenance, stream_counts = [], [], set()
+    for result_file in args.throughput:
+        seconds, run_failed, streams = run_seconds(result_file)
+        throughput.append(seconds)
+        stream_counts.add(streams)
+        failed += run_failed
+    for result_file in args.maintenance:
+        seconds, run_failed, _ = run_seconds(result_file)
+        maintenance.append(seconds)
+        failed += run_failed
+    if len(stream_counts) != 1:
+        parser.error(f"The throughput runs used different stream counts: {sorted(stream_counts)}")
+    streams = stream_counts.pop()
+
+    metric, hours = qphds(args.scale_factor, streams, args.load_seconds, power, throughput, maintenance)
+    print(f"Scale factor {args.scale_factor}, {streams} stream(s)")
+    print(f"Load {args.load_seconds:.1f}s, power {power:.1f}s, throughput {' + '.join(f'{s:.1f}s' for s in throughput)}, "
+          f"data maintenance {' + '.join(f'{s:.1f}s' for s in maintenance)}")
+    print(", ".join(f"{name} {value:.4f}h" for name, value in hours.items()))
+    print(f"QphDS@{args.scale_factor}: {metric:,}")
+    if failed:
+        print(f"\033[91m{failed} query or refresh statement(s) failed; the result is not valid.\033[0m")
@@ -0,0 +1,24 @@
+import os
+
+# Query files of the power test and the folder every run writes its results to; reading them needs no Dremio
+# settings, so the DuckDB reference run and the harness benchmark can share them
+queries_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "queries"))
+results_dir = os.path.join(os.path.dirname(__file__), "results")
+
+def load_queries(query_list=None):
+    """
+    Read every query text once, in run order, so the timed loop never touches the disk.
+    :param query_list: Optional file with one query file name per line (e.g. testplans/full_queries.csv);
+                       all .sql files in the queries folder, sorted by name, when None.
+    :return: List of (file name, SQL text) tuples.
+    """
+    if query_list:
+        with open(query_list, "r") as f:
+            filenames = [line.strip() for line in f if line.strip()]
+    else:
+        filenames = sorted(f for f in os.listdir(queries_dir) if f.endswith(".sql"))
+    queries = []
+    for filename in filenames:
+        with open(os.path.join(queries_dir, filename), "r") as f:
+            queries.append((filename, f.read().strip().rstrip(";")))
+    return queries
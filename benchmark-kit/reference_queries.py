@@ -0,0 +1,145 @@
+import os
+import sys
+import time
+import argparse
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Shared helpers of tpcds-kit and the power test query files
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tpcds-kit"))
+from tpcds_files import table_name_from_file
+from query_files import load_queries, results_dir
+from validate_results import HASH_DIGITS, result_hash
+
+# Converted data written by tpcds-kit/data_to_parquet.py (flat files) and cluster_parquet.py (table directories)
+PARQUET_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tpcds-kit", "test_data", "parquet"))
+
+# Rows per record batch streamed out of DuckDB into the result hash
+BATCH_ROWS = 100_000
+
+# One row per query and iteration
+RESULT_SCHEMA = pa.schema([
+    pa.field("run_id", pa.string(), nullable=False),
+    pa.field("iteration", pa.int32(), nullable=False),
+    pa.field("query", pa.string(), nullable=False),
+    pa.field("success", pa.bool_(), nullable=False),
+    pa.field("error", pa.string()),
+    pa.field("started_at", pa.timestamp("ms", tz="UTC"), nullable=False),
+    pa.field("elapsed_ms", pa.float64(), nullable=False),
+    pa.field("hash_ms", pa.float64()),
+    pa.field("rows", pa.int64()),
+    pa.field("result_hash", pa.string()),
+])
+
+def table_sources(parquet_dir):
+    """
+    Parquet files per table, read the way upload_parquet.py uploads them: a table directory (clustered output)
+    replaces the table's flat files, and directories starting with "_" are work in progress and skipped.
+    :return: Dictionary of table name to a list of file paths or glob patterns.
+    """
+    sources = {}
+    for entry in sorted(os.listdir(parquet_dir)):
+        path = os.path.join(parquet_dir, entry)
+        if os.path.isdir(path) and not entry.startswith("_"):
+            # The partition column is also stored in the files, so the directory names are not needed
+            sources[entry] = [os.path.join(path, "**", "*.parquet")]
+    table_dirs = set(sources)
+    for entry in sorted(os.listdir(parquet_dir)):
+        table_name = table_name_from_file(entry)
+        if entry.endswith(".parquet") and table_name not in table_dirs:
+            sources.setdefault(table_name, []).append(os.path.join(parquet_dir, entry))
+    return sources
+
+def connect(parquet_dir, threads=None):
+    """Open an in-memory DuckDB database with one view per TPC-DS table over its Parquet files."""
+    connection = duckdb.connect()
+    if threads:
+        connection.execute(f"SET threads = {int(threads)}")
+    sources = table_sources(parquet_dir)
+    for table_name, paths in sources.items():
+        files = ", ".join("'" + path.replace("'", "''") + "'" for path in paths)
+        connection.execute(f'CREATE VIEW "{table_name}" AS SELECT * FROM read_parquet([{files}])')
+    print(f"DuckDB {duckdb.__version__}: {len(sources)} tables from {parquet_dir}")
+    return connection
+
+def run_query(connection, sql, digits=HASH_DIGITS):
+    """
+    Run one query and stream its result through the result hash, without holding the result in memory.
+    :return: Dictionary with the error, elapsed and hashing milliseconds, row count and hash.
+    """
+    hash_seconds = 0.0
+    def timed(reader):
+        # Time spent hashing each batch is kept apart, so elapsed_ms is DuckDB's own time
+        nonlocal hash_seconds
+        for batch in reader:
+            start = time.perf_counter()
+            yield batch
+            hash_seconds += time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        reader = connection.execute(sql).to_arrow_reader(BATCH_ROWS)
+        rows, digest = result_hash(timed(reader), digits)
+        error = None
+    except duckdb.Error as e:
+        rows = digest = None
+        error = str(e)
+    elapsed = time.perf_counter() - start
+    return {"error": error, "elapsed_ms": (elapsed - hash_seconds) * 1000, "hash_ms": hash_seconds * 1000 if error is None else None,
+            "rows": rows, "result_hash": digest}
+
+def reference_queries(query_list=None, parquet_dir=PARQUET_DIR, iterations=1, threads=None, digits=HASH_DIGITS):
+    """
+    Run the power test queries against the local Parquet files in DuckDB, as a single-node baseline.
+    Row counts and result hashes are written with the timings, so Dremio runs at the same scale can be checked with
+    execute_queries.py --reference.
+    """
+    queries = load_queries(query_list)
+    if not queries:
+        print("❌ No query files found in the queries folder.")
+        return
+    if not os.path.isdir(parquet_dir) or not table_sources(parquet_dir):
+        print(f"\033[91mNo Parquet files found in {parquet_dir}. Run the converter first.\033[0m")
+        return
+    connection = connect(parquet_dir, threads)
+    run_id = f"reference-{time.strftime('%Y%m%d-%H%M%S')}"
+    print(f"Running {len(queries)} queries in DuckDB, {iterations} iteration(s) ({run_id})")
+
+    rows = []
+    for iteration in range(1, iterations + 1):
+        for filename, sql in queries:
+            started_at = time.time()
+            result = run_query(connection, sql, digits)
+            rows.append({"run_id": run_id, "iteration": iteration, "query": os.path.splitext(filename)[0],
+                         "success": result["error"] is None, "started_at": int(started_at * 1000), **result})
+            if result["error"] is None:
+                print(f"✅ [iteration {iteration}] {filename}: {result['elapsed_ms'] / 1000:.3f}s, "
+                      f"{result['rows']:,} rows, hash {result['result_hash']}", flush=True)
+            else:
+                print(f"❌ [iteration {iteration}] {filename} failed: {result['error']}", flush=True)
+        iteration_rows = rows[-len(queries):]
+        total = sum(row["elapsed_ms"] for row in iteration_rows) / 1000
+        failed = sum(not row["success"] for row in iteration_rows)
+        print(f"Iteration {iteration}: {len(iteration_rows)} queries in {total:.1f}s, {failed} failed")
+    connection.close()
+
+    # The digits are part of the hash, so execute_queries.py --reference reads them back to hash the same way
+    table = pa.Table.from_pylist(rows, schema=RESULT_SCHEMA).replace_schema_metadata({
+        "hash_digits": str(digits), "parquet_dir": parquet_dir, "duckdb_version": duckdb.__version__,
+    })
+    os.makedirs(results_dir, exist_ok=True)
+    output_file = os.path.join(results_dir, f"{run_id}.parquet")
+    pq.write_table(table, output_file)
+    print(f"Results written to {output_file}")
+    return output_file
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the TPC-DS queries against the local Parquet files in DuckDB for baseline timings and result hashes")
+    parser.add_argument("--query_list", type=str, default=None, help="File listing the query files to run in order, e.g. testplans/full_queries.csv (default: every .sql file in queries/)")
+    parser.add_argument("--parquet_dir", type=str, default=PARQUET_DIR, help="Folder with the converted Parquet files (default: tpcds-kit/test_data/parquet)")
+    parser.add_argument("--iterations", type=int, default=1, help="Iterations over the query list (default: 1)")
+    parser.add_argument("--threads", type=int, default=None, help="DuckDB worker threads (default: one per core)")
+    parser.add_argument("--digits", type=int, default=HASH_DIGITS, help=f"Decimal places numbers are rounded to before hashing (default: {HASH_DIGITS})")
+    args = parser.parse_args()
+    reference_queries(args.query_list, os.path.abspath(args.parquet_dir), args.iterations, args.threads, args.digits)
@@ -1,83 +1,34 @@
 import os
+import sys
 import requests
-import time
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
-
-DREMIO_USERNAME = os.getenv("DREMIO_USERNAME")
-DREMIO_PASSWORD = os.getenv("DREMIO_PASSWORD")
-DREMIO_URL = os.getenv("DREMIO_URL")
+# Shared Dremio client in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dremio_client import DremioError, format_timings, get_client
 
-if not DREMIO_USERNAME or not DREMIO_PASSWORD:
-    raise ValueError("DREMIO_USERNAME and DREMIO_PASSWORD must be set in the environment variables.")
-
-def get_auth_header():
-    """Get authentication header for Dremio API calls"""
-    auth_payload = {
-        "userName": DREMIO_USERNAME,
-        "password": DREMIO_PASSWORD
-    }
-    try:
-        response = requests.post(f"{DREMIO_URL}/apiv2/login", json=auth_payload)
-        response.raise_for_status()
-        token = response.json()["token"]
-        return {"Authorization": f"_dremio{token}", "Content-Type": "application/json"}
-    except requests.exceptions.RequestException as e:
-        print(f"Authentication failed: {e}")
-        return None
+# Load environment variables from .env file; Dremio credentials are read by dremio_client
+load_dotenv()
 
 def execute_query(query):
     """Execute a SQL query in Dremio and wait for results"""
-    headers = get_auth_header()
-    if not headers:
-        return False
-
-    # Step 1: Submit the query
-    submit_payload = {
-        "sql": query
-    }
-
     try:
         print(f"Submitting SQL query: {query}")
-        response = requests.post(
-            f"{DREMIO_URL}/api/v3/sql",
-            headers=headers,
-            json=submit_payload
-        )
-        response.raise_for_status()
-        job_id = response.json().get('id')
-        
-        if not job_id:
-            print("No job ID returned from query submission")
-            return False
-
-        # Step 2: Poll for query status
-        while True:
-            status_response = requests.get(
-                f"{DREMIO_URL}/api/v3/job/{job_id}",
-                headers=headers
-            )
-            status_response.raise_for_status()
-            status = status_response.json()
-            
-            if status.get('jobState') == 'COMPLETED':
-                print("Query completed successfully")
-                return True
-            elif status.get('jobState') in ['FAILED', 'CANCELED', 'INVALID']:
-                print(f"Query failed with state: {status.get('jobState')}")
-                print(f"Error: {status.get('errorMessage')}")
-                return False
-            
-            time.sleep(1)  # Wait before polling again
-
+        _, status = get_client().execute(query)
+    except DremioError as e:
+        print(f"Failed to execute query: {e}")
+        return False
     except requests.exceptions.RequestException as e:
         print(f"Failed to execute query: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"Error response: {e.response.text}")
         return False
 
+    if status.get('jobState') == 'COMPLETED':
+        print(f"Query completed successfully ({format_timings(status)})")
+        return True
+    print(f"Query failed with state: {status.get('jobState')}")
+    print(f"Error: {status.get('errorMessage')}")
+    return False
+
 def main():
     print("🔄 Starting main execution...")
     queries_folder = os.path.join(os.path.dirname(__file__), "queries")
@@ -103,13 +54,13 @@ def main():
         return
 
     print(f"🔄 Submitting query: {first_query_file}")
-    job_id = execute_query(query)
-    if not job_id:
+    # execute_query waits for the job, so a True result means the query completed
+    if not execute_query(query):
         print(f"❌ Query execution failed. Please inspect SQL logs.")
         return
 
-    print(f"🔄 Waiting for job {job_id} to complete...")
-    wait_for_job_completion(job_id)
+    print(f"✅ Connection test passed: {first_query_file} completed.")
+    get_client().print_overhead()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,248 @@
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Shared Dremio client in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dremio_client import DremioError, get_client
+from execute_queries import CATALOG, TIMED_OUT, phase_ms, require_catalog, results_dir, seen_phase_ms
+
+# dsqgen and the query templates live in the TPC-DS kit
+TPCDS_KIT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tpcds-kit"))
+DSQGEN_PATH = os.path.join(TPCDS_KIT_DIR, "tools", "dsqgen")
+TEMPLATES_DIR = os.path.join(TPCDS_KIT_DIR, "query_templates")
+STREAMS_DIR = os.path.join(os.path.dirname(__file__), "streams")
+
+# Comment the dremio dialect writes in front of every generated query
+QUERY_MARKER = re.compile(r"--\s*start query (\d+) in stream (\d+) using template (\S+?)\.tpl")
+
+# One row per executed query of the throughput test
+RESULT_SCHEMA = pa.schema([
+    pa.field("run_id", pa.string(), nullable=False),
+    pa.field("stream", pa.int32(), nullable=False),
+    pa.field("position", pa.int32(), nullable=False),
+    pa.field("template", pa.string()),
+    pa.field("job_id", pa.string()),
+    pa.field("state", pa.string()),
+    pa.field("success", pa.bool_(), nullable=False),
+    pa.field("error", pa.string()),
+    pa.field("started_at", pa.timestamp("ms", tz="UTC"), nullable=False),
+    pa.field("elapsed_ms", pa.float64(), nullable=False),
+    pa.field("harness_wait_ms", pa.float64(), nullable=False),
+    pa.field("submit_ms", pa.float64()),
+    pa.field("server_ms", pa.float64()),
+    pa.field("planning_ms", pa.float64()),
+    pa.field("queued_ms", pa.float64()),
+    pa.field("execution_ms", pa.float64()),
+    pa.field("seen_planning_ms", pa.float64()),
+    pa.field("seen_queued_ms", pa.float64()),
+    pa.field("seen_running_ms", pa.float64()),
+    pa.field("row_count", pa.int64()),
+])
+
+def generate_streams(streams, scale_factor, output_dir=STREAMS_DIR, seed=None):
+    """
+    Generate the query streams of a throughput test with dsqgen.
+    dsqgen writes stream 0 (the power test order) plus one file per throughput stream, each holding all
+    templates in that stream's own permutation; stream 0 is generated but not run.
+    """
+    if not os.path.exists(DSQGEN_PATH):
+        print(f"\033[91mdsqgen not found at {DSQGEN_PATH}. Build the TPC-DS tools with 'make' in tpcds-kit/tools first.\033[0m")
+        exit(1)
+    os.makedirs(output_dir, exist_ok=True)
+    command = [
+        DSQGEN_PATH,
+        "-DIRECTORY", TEMPLATES_DIR,
+        "-INPUT", os.path.join(TEMPLATES_DIR, "templates.lst"),
+        "-DIALECT", "dremio",
+        "-SCALE", str(scale_factor),
+        "-STREAMS", str(streams + 1),
+        "-OUTPUT_DIR", os.path.abspath(output_dir),
+    ]
+    if seed is not None:
+        command += ["-RNGSEED", str(seed)]
+    print(f"Generating {streams} query stream(s) for scale factor {scale_factor}...")
+    # dsqgen reads its distributions (tpcds.idx) from the working directory
+    result = subprocess.run(command, cwd=os.path.dirname(DSQGEN_PATH), capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"\033[91mdsqgen failed: {result.stdout}{result.stderr}\033[0m")
+        exit(1)
+
+def parse_stream(stream_file):
+    """
+    Split a dsqgen stream file into its queries.
+    :return: List of (template, SQL text) tuples in stream order; template is None if the file has no query markers.
+    """
+    with open(stream_file, "r") as f:
+        content = f.read()
+    queries = []
+    for statement in content.split(";"):
+        statement = statement.strip()
+        if not statement or all(line.strip().startswith("--") for line in statement.splitlines()):
+            continue
+        marker = QUERY_MARKER.search(statement)
+        queries.append((marker.group(3) if marker else None, statement))
+    return queries
+
+def load_streams(streams, streams_dir=STREAMS_DIR):
+    """Read throughput streams 1..streams, generated by dsqgen as query_<stream>.sql."""
+    loaded = {}
+    for stream in range(1, streams + 1):
+        stream_file = os.path.join(streams_dir, f"query_{stream}.sql")
+        if not os.path.exists(stream_file):
+            print(f"\033[91mStream file {stream_file} not found; generate the streams with --scale_factor.\033[0m")
+            exit(1)
+        loaded[stream] = parse_stream(stream_file)
+    return loaded
+
+async def run_query(client, executor, connections, sql, context, timeout=None):
+    """
+    Submit one query once a connection is free and wait for it on the shared job tracker.
+    :param timeout: Seconds the job may take; an overdue job is cancelled and its state recorded as TIMED_OUT.
+    :return: Tuple of (job_id, status, error, harness wait seconds, submit seconds).
+    """
+    loop = asyncio.get_running_loop()
+    requested = time.perf_counter()
+    async with connections:
+        acquired = time.perf_counter()
+        job_id = status = error = submit_seconds = None
+        try:
+            job_id = await loop.run_in_executor(executor, client.submit, sql, context)
+            submit_seconds = time.perf_counter() - acquired
+            try:
+                # Cancelling the wrapper on timeout also cancels the tracker's Future, so it stops polling the job
+                status = await asyncio.wait_for(asyncio.wrap_future(client.track(job_id)), timeout)
+            except asyncio.TimeoutError:
+                await loop.run_in_executor(executor, client.cancel_job, job_id)
+                status = {"jobState": TIMED_OUT, "errorMessage": f"Job {job_id} did not finish within {timeout:.1f}s and was cancelled"}
+            if status.get("jobState") != "COMPLETED":
+                error = status.get("errorMessage") or status.get("jobState")
+        except (DremioError, requests.exceptions.RequestException) as e:
+            error = str(e)
+    return job_id, status or {}, error, acquired - requested, submit_seconds
+
+async def run_stream(run_id, stream, queries, client, executor, connections, context, timeout=None):
+    """Run one stream's queries one after another, as a single TPC-DS session does."""
+    rows = []
+    start = time.perf_counter()
+    for position, (template, sql) in enumerate(queries, 1):
+        started_at = time.time()
+        query_start = time.perf_counter()
+        job_id, status, error, wait_seconds, submit_seconds = await run_query(client, executor, connections, sql, context, timeout)
+        server_seconds = (status.get("tracking") or {}).get("server_seconds")
+        rows.append({
+            "run_id": run_id,
+            "stream": stream,
+            "position": position,
+            "template": template,
+            "job_id": job_id,
+            "state": status.get("jobState"),
+            "success": error is None,
+            "error": error,
+            "started_at": int(started_at * 1000),
+            "elapsed_ms": (time.perf_counter() - query_start) * 1000,
+            "harness_wait_ms": wait_seconds * 1000,
+            "submit_ms": submit_seconds * 1000 if submit_seconds is not None else None,
+            "server_ms": server_seconds * 1000 if server_seconds is not None else None,
+            "planning_ms": phase_ms(status, "planning"),
+            "queued_ms": phase_ms(status, "queued"),
+            "execution_ms": phase_ms(status, "execution"),
+            "seen_planning_ms": seen_phase_ms(status, "planning"),
+            "seen_queued_ms": seen_phase_ms(status, "queued"),
+            "seen_running_ms": seen_phase_ms(status, "running"),
+            "row_count": status.get("rowCount"),
+        })
+        if error is not None:
+            print(f"❌ Stream {stream} query {position} ({template or 'unknown template'}) failed: {error}", flush=True)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Stream {stream} finished {len(queries)} queries in {elapsed:.1f}s", flush=True)
+    return rows, elapsed
+
+async def run_streams(run_id, streams, max_connections, context=None, query_timeout=None):
+    """
+    Run all streams concurrently; at most max_connections queries are in flight at once.
+    :return: Tuple of (result rows, {stream: elapsed seconds}, wall seconds of the whole test).
+    """
+    client = get_client()
+    connections = asyncio.Semaphore(max_connections)
+    with ThreadPoolExecutor(max_workers=max_connections) as executor:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            run_stream(run_id, stream, queries, client, executor, connections, context or [CATALOG], query_timeout)
+            for stream, queries in streams.items()
+        ))
+        wall_seconds = time.perf_counter() - start
+    rows = [row for stream_rows, _ in results for row in stream_rows]
+    return rows, {stream: elapsed for stream, (_, elapsed) in zip(streams, results)}, wall_seconds
+
+def report(rows, stream_elapsed, wall_seconds):
+    """Print per-stream elapsed times, queries per hour, and queueing delay next to execution time."""
+    print(f"\n{'Stream':>6} | {'Queries':>7} | {'Failed':>6} | {'Elapsed':>9} | {'Harness wait':>12} | {'Dremio queue':>12} | {'Planning':>9} | {'Execution':>9}")
+    print("-" * 92)
+
+    def total_s(selected, column):
+        return sum(row[column] or 0 for row in selected) / 1000
+
+    for stream, elapsed in stream_elapsed.items():
+        selected = [row for row in rows if row["stream"] == stream]
+        failed = sum(not row["success"] for row in selected)
+        print(f"{stream:>6} | {len(selected):>7} | {failed:>6} | {elapsed:>8.1f}s | {total_s(selected, 'harness_wait_ms'):>11.1f}s | "
+              f"{total_s(selected, 'queued_ms'):>11.1f}s | {total_s(selected, 'planning_ms'):>8.1f}s | {total_s(selected, 'execution_ms'):>8.1f}s")
+
+    completed = sum(row["success"] for row in rows)
+    qph = completed * 3600 / wall_seconds if wall_seconds else 0.0
+    print(f"\nThroughput test: {len(stream_elapsed)} stream(s), {completed} of {len(rows)} queries completed in {wall_seconds:.1f}s "
+          f"({qph:,.1f} queries per hour)")
+    queueing = total_s(rows, "harness_wait_ms") + total_s(rows, "queued_ms")
+    print(f"Queueing: {total_s(rows, 'harness_wait_ms'):.1f}s waiting for a free connection, {total_s(rows, 'queued_ms'):.1f}s queued in Dremio "
+          f"({queueing:.1f}s total); planning {total_s(rows, 'planning_ms'):.1f}s; execution {total_s(rows, 'execution_ms'):.1f}s")
+    return qph
+
+def throughput_test(streams, max_connections=None, scale_factor=None, streams_dir=STREAMS_DIR, seed=None, query_timeout=None):
+    """
+    Run the TPC-DS throughput test: N query streams executed concurrently against Dremio.
+    :param max_connections: Queries in flight at once across all streams (default: one per stream).
+    :param scale_factor: Generate the streams with dsqgen for this scale factor first; when None, the
+                         query_<n>.sql files already in streams_dir are used.
+    :param query_timeout: Seconds each query may run before it is cancelled and recorded as TIMED_OUT.
+    """
+    if scale_factor is not None:
+        generate_streams(streams, scale_factor, streams_dir, seed)
+    loaded = load_streams(streams, streams_dir)
+    max_connections = max_connections or streams
+    run_id = f"throughput-{time.strftime('%Y%m%d-%H%M%S')}"
+    total = sum(len(queries) for queries in loaded.values())
+    print(f"Running {streams} stream(s), {total} queries, with at most {max_connections} queries in flight ({run_id})")
+
+    rows, stream_elapsed, wall_seconds = asyncio.run(run_streams(run_id, loaded, max_connections, query_timeout=query_timeout))
+    report(rows, stream_elapsed, wall_seconds)
+
+    output_file = os.path.join(results_dir, f"{run_id}.parquet")
+    os.makedirs(results_dir, exist_ok=True)
+    table = pa.Table.from_pylist(rows, schema=RESULT_SCHEMA)
+    pq.write_table(table.replace_schema_metadata({"wall_seconds": str(wall_seconds)}), output_file)
+    print(f"Results written to {output_file}")
+    get_client().print_overhead()
+    return wall_seconds
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the TPC-DS throughput test: concurrent query streams against Dremio")
+    parser.add_argument("--streams", type=int, required=True, help="Number of concurrent query streams")
+    parser.add_argument("--max_connections", type=int, default=None, help="Queries in flight at once across all streams (default: one per stream)")
+    parser.add_argument("--scale_factor", type=int, default=None, help="Generate the streams with dsqgen for this scale factor (default: reuse the files in --streams_dir)")
+    parser.add_argument("--streams_dir", type=str, default=STREAMS_DIR, help="Folder holding the dsqgen stream files query_1.sql ... query_<N>.sql")
+    parser.add_argument("--seed", type=int, default=None, help="dsqgen RNGSEED, to reproduce the query parameters and permutations")
+    parser.add_argument("--query_timeout", type=float, default=None, help="Seconds a query may run before its job is cancelled and it is recorded as TIMED_OUT (default: no limit)")
+    args = parser.parse_args()
+    require_catalog()
+    if args.streams < 1 or (args.max_connections is not None and args.max_connections < 1):
+        parser.error("--streams and --max_connections must be at least 1")
+    throughput_test(args.streams, args.max_connections, args.scale_factor, args.streams_dir, args.seed, args.query_timeout)
@@ -0,0 +1,282 @@
+import os
+import re
+import csv
+import hashlib
+import argparse
+from functools import lru_cache
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Reference results of the TPC-DS qualification queries (scale factor 1, qualification parameters)
+ANSWER_SETS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tpcds-kit", "answer_sets"))
+
+# Template each power test query file was generated from; the files are numbered in dsqgen's stream 0 order,
+# so query_1 is template 96, not 1
+QUERY_TEMPLATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries", "templates.csv")
+# Marker dremio.tpl puts in front of every query dsqgen generates
+TEMPLATE_MARKER = re.compile(r"--\s*start query \d+ in stream \d+ using template query(\d+)\.tpl")
+
+# Lines the database clients wrote around the results: row counts, warnings, banners, statement echoes
+NOISE = re.compile(
+    r"^\s*(\(\d+ rows?( affected)?\)|\d+ rows? selected\.?|INSERT \d+ \d+|Warning:.*|SQL\*Plus:.*|Copyright .*"
+    r"|Connected to:|Oracle Database .*|With the .*|Advanced Analytics .*|Disconnected from .*|-+ OUTPUT Query.*|SQL>.*)\s*$"
+)
+# Separator under a column header: groups of dashes split by spaces (SQL*Plus) or pipes
+SEPARATOR = re.compile(r"^[-| \t]*-[-| \t]*$")
+# Values printed for SQL NULL besides an empty field
+NULL_VALUES = ("", "NULL", "[NULL]")
+# Relative tolerance of numeric comparisons, on top of half a unit in the last printed decimal place; floating-point
+# aggregates such as the cov column of query 39 differ from the answer sets by about 1e-9
+REL_TOL = 1e-6
+# Result hashes: numbers are rounded to this many decimal places first, so an engine computing in decimal and
+# one computing in floating point (or returning JSON numbers) hash the same values
+HASH_DIGITS = 2
+HASH_SEPARATOR = "\x1f"
+HASH_NULL = "\x00"
+
+@lru_cache(maxsize=None)
+def query_templates(path=QUERY_TEMPLATES_FILE):
+    """Template number of each query file in queries/templates.csv, e.g. {"query_1": 96}."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", newline="") as f:
+        return {row["query"]: int(re.search(r"(\d+)$", row["template"]).group(1)) for row in csv.DictReader(f)}
+
+def query_template(query_name, sql=None):
+    """
+    Template number of a query: from the dsqgen marker in its SQL if it has one, otherwise from
+    queries/templates.csv. None if the template is unknown.
+    """
+    marker = TEMPLATE_MARKER.search(sql) if sql else None
+    if marker:
+        return int(marker.group(1))
+    return query_templates().get(query_name)
+
+def answer_set_files(query_name, sql=None):
+    """
+    Answer sets of a query by its template, e.g. 96.ans for query_1, or 14_NULLS_FIRST.ans and
+    14_NULLS_LAST.ans for templates whose result depends on where NULLs sort.
+    """
+    template = query_template(query_name, sql)
+    if template is None:
+        return []
+    names = [f"{template}{suffix}.ans" for suffix in ("", "_NULLS_FIRST", "_NULLS_LAST")]
+    return [os.path.join(ANSWER_SETS_DIR, name) for name in names if os.path.exists(os.path.join(ANSWER_SETS_DIR, name))]
+
+def to_table(rows, width):
+    """Answer set rows as a table of string columns c0..c<width-1>; empty and NULL values become nulls."""
+    columns = [[row[i].strip() if i < len(row) else "" for row in rows] for i in range(width)]
+    return pa.table({f"c{i}": pa.array([None if value in NULL_VALUES else value for value in column], pa.string())
+                     for i, column in enumerate(columns)})
+
+def parse_fixed_width(lines):
+    """
+    Parse SQL*Plus style output: a header, a line of dashes giving each column's width, then the rows.
+    Tabs are expanded first, since the files compress runs of spaces into tabs. A header repeated at a page
+    break continues the current result; a different header starts the next one.
+    """
+    separators = [i for i, line in enumerate(lines) if SEPARATOR.match(line) and "-" in line]
+    headers = {i - 1 for i in separators}
+    blocks = []
+    for index, line in enumerate(lines):
+        if index in separators:
+            header = lines[index - 1].strip() if index > 0 else ""
+            if blocks and blocks[-1]["header"] == header:
+                continue
+            starts = [m.start() for m in re.finditer(r"-+", line.expandtabs())]
+            blocks.append({"header": header, "starts": starts, "rows": []})
+        elif blocks and index not in headers and line.strip() and not NOISE.match(line):
+            starts = blocks[-1]["starts"]
+            text = line.expandtabs()
+            bounds = starts[1:] + [None]
+            blocks[-1]["rows"].append([text[start:end] for start, end in zip(starts, bounds)])
+    return [to_table(block["rows"], len(block["starts"])) for block in blocks]
+
+def parse_delimited(lines):
+    """
+    Parse pipe-delimited output: a header line, then one line per row. A line with a different number of
+    fields, or a repeat of the header, starts the next result.
+    """
+    blocks = []
+    for line in lines:
+        if not line.strip() or NOISE.match(line) or SEPARATOR.match(line) or "|" not in line:
+            continue
+        fields = line.split("|")
+        if not blocks or len(fields) != blocks[-1]["width"] or line.strip() == blocks[-1]["header"]:
+            blocks.append({"header": line.strip(), "width": len(fields), "rows": []})
+        else:
+            blocks[-1]["rows"].append(fields)
+    return [to_table(block["rows"], block["width"]) for block in blocks]
+
+@lru_cache(maxsize=None)
+def parse_answer_set(path):
+    """
+    Read an answer set into one table of string columns per result it holds; the files were written by
+    different database clients, as fixed-width or pipe-delimited text.
+    :return: Tuple of tables, empty if the format was not recognized.
+    """
+    with open(path, "r", encoding="latin1") as f:
+        lines = f.read().splitlines()
+    fixed = any(SEPARATOR.match(line) and "-" in line and "|" not in line for line in lines)
+    return tuple(parse_fixed_width(lines) if fixed else parse_delimited(lines))
+
+def is_numeric(data_type):
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type) or pa.types.is_decimal(data_type)
+
+def clean_strings(column):
+    """Trimmed strings, with empty strings as nulls."""
+    trimmed = pc.utf8_trim_whitespace(pc.cast(column, pa.string()))
+    return pc.if_else(pc.equal(trimmed, ""), pa.scalar(None, pa.string()), trimmed)
+
+def printed_tolerance(column):
+    """
+    Half a unit in the last decimal place each expected value was printed with, e.g. 0.005 for "12.34":
+    the rounding the answer set applied, so any value that prints the same matches.
+    """
+    point = pc.find_substring(column, ".")
+    decimals = pc.if_else(pc.greater_equal(point, 0), pc.subtract(pc.subtract(pc.utf8_length(column), point), 1), 0)
+    # A sliver more than half a unit, so binary floating point does not turn a value that rounds half up into a mismatch
+    return pc.multiply(pc.power(10.0, pc.negate(pc.cast(decimals, pa.float64()))), 0.5 * (1 + 1e-6))
+
+def pair_columns(actual, expected):
+    """
+    Bring a result and an answer set to comparable columns: numeric result columns whose expected values all
+    parse as numbers are compared as float64 with a tolerance, everything else as trimmed strings.
+    :return: Tuple of (actual table, expected table with a tolerance column per numeric column, numeric flags).
+    """
+    actual_columns, expected_columns, numeric = {}, {}, []
+    for i, (got, want) in enumerate(zip(actual.columns, expected.columns)):
+        name = f"c{i}"
+        want = clean_strings(want)
+        if is_numeric(got.type):
+            try:
+                expected_columns[name] = pc.cast(want, pa.float64())
+                expected_columns[f"{name}_tol"] = printed_tolerance(want)
+                actual_columns[name] = pc.cast(got, pa.float64())
+                numeric.append(True)
+                continue
+            except pa.ArrowInvalid:
+                expected_columns.pop(name, None)
+        actual_columns[name] = clean_strings(got)
+        expected_columns[name] = want
+        numeric.append(False)
+    return pa.table(actual_columns), pa.table(expected_columns), numeric
+
+def compare(actual, expected, rel_tol=REL_TOL):
+    """
+    Compare a result with an answer set regardless of row order: both are sorted on every column and then
+    compared column by column with Arrow compute kernels (NULLs sort last on both sides). Numbers match within half a unit of the last printed
+    decimal place or rel_tol, whichever is larger; NULLs match NULLs.
+    :return: Tuple of (match, description of the first difference or None).
+    """
+    if actual.num_columns != expected.num_columns:
+        return False, f"{actual.num_columns} columns, answer set has {expected.num_columns}"
+    if actual.num_rows != expected.num_rows:
+        return False, f"{actual.num_rows} rows, answer set has {expected.num_rows}"
+    actual, expected, numeric = pair_columns(actual, expected)
+    keys = [(f"c{i}", "ascending") for i in range(len(numeric))]
+    actual = actual.sort_by(keys)
+    expected = expected.sort_by(keys)
+
+    matches = pa.array([True] * actual.num_rows)
+    for i, is_number in enumerate(numeric):
+        got, want = actual[f"c{i}"], expected[f"c{i}"]
+        if is_number:
+            allowed = pc.max_element_wise(expected[f"c{i}_tol"], pc.multiply(pc.abs(want), rel_tol))
+            equal = pc.less_equal(pc.abs(pc.subtract(got, want)), allowed)
+        else:
+            equal = pc.equal(got, want)
+        both_null = pc.and_(pc.is_null(got), pc.is_null(want))
+        matches = pc.and_(matches, pc.or_(both_null, pc.fill_null(equal, False)))
+
+    mismatched = actual.num_rows - pc.sum(matches).as_py() if actual.num_rows else 0
+    if not mismatched:
+        return True, None
+    row = pc.index(matches, False).as_py()
+    got = [actual[f"c{i}"][row].as_py() for i in range(len(numeric))]
+    want = [expected[f"c{i}"][row].as_py() for i in range(len(numeric))]
+    return False, f"{mismatched} of {actual.num_rows} rows differ, e.g. {got} != {want}"
+
+def validate(query_name, table, rel_tol=REL_TOL, sql=None):
+    """
+    Check a query result against the answer sets of its template; it is valid if it matches any result in any of them.
+    :param sql: The query text, whose dsqgen marker (if any) names the template.
+    :return: Dictionary with "validation" ("match", "mismatch", "no answer set" or "unparsed"),
+             "answer_set" (the matching or first file) and "detail" (the difference found, if any).
+    """
+    files = answer_set_files(query_name, sql)
+    if not files:
+        return {"validation": "no answer set", "answer_set": None, "detail": None}
+    first_difference = None
+    parsed = False
+    for path in files:
+        for expected in parse_answer_set(path):
+            parsed = True
+            match, detail = compare(table, expected, rel_tol)
+            if match:
+                return {"validation": "match", "answer_set": os.path.basename(path), "detail": None}
+            first_difference = first_difference or (os.path.basename(path), detail)
+    if not parsed:
+        return {"validation": "unparsed", "answer_set": os.path.basename(files[0]), "detail": "answer set format not recognized"}
+    return {"validation": "mismatch", "answer_set": first_difference[0], "detail": first_difference[1]}
+
+def normalized_strings(column, digits=HASH_DIGITS):
+    """A column as strings that agree across engines: numbers rounded to digits, strings trimmed, NULL as a marker."""
+    if is_numeric(column.type):
+        # Adding 0.0 turns a rounded -0.0 into 0.0
+        text = pc.cast(pc.add(pc.round(pc.cast(column, pa.float64()), digits), 0.0), pa.string())
+    else:
+        text = clean_strings(column)
+    return pc.fill_null(text, HASH_NULL)
+
+def result_hash(batches, digits=HASH_DIGITS):
+    """
+    Order-insensitive hash of a query result, computed one batch at a time so the result never has to be held
+    in memory: the sum, modulo 2^64, of a 64-bit BLAKE2b digest of every normalized row.
+    :param batches: Iterable of record batches, e.g. a RecordBatchReader or table.to_batches().
+    :return: Tuple of (rows, hash as 16 hex digits).
+    """
+    rows = total = 0
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+        columns = [normalized_strings(column, digits) for column in batch.columns]
+        for row in pc.binary_join_element_wise(*columns, HASH_SEPARATOR).to_pylist():
+            total += int.from_bytes(hashlib.blake2b(row.encode(), digest_size=8).digest(), "little")
+        rows += batch.num_rows
+    return rows, f"{total % 2 ** 64:016x}"
+
+def load_reference(path):
+    """
+    Row counts and hashes of the successful queries of a reference run written by reference_queries.py.
+    :return: Dictionary with the file name, the digits the run hashed with and {query: (rows, hash)}.
+    """
+    table = pq.read_table(path)
+    digits = int((table.schema.metadata or {}).get(b"hash_digits", HASH_DIGITS))
+    queries = {row["query"]: (row["rows"], row["result_hash"]) for row in table.filter(pc.field("success")).to_pylist()}
+    return {"file": os.path.basename(path), "digits": digits, "queries": queries}
+
+def check_reference(query_name, table, reference):
+    """
+    Check a query result against a reference run by row count and result hash.
+    :return: Dictionary shaped like the one validate() returns, plus the result's "hash".
+    """
+    rows, digest = result_hash(table.to_batches(), reference["digits"])
+    expected = reference["queries"].get(query_name)
+    if expected is None:
+        return {"validation": "no answer set", "answer_set": None, "detail": None, "hash": digest}
+    if (rows, digest) == expected:
+        return {"validation": "match", "answer_set": reference["file"], "detail": None, "hash": digest}
+    detail = f"{rows} rows with hash {digest}, reference has {expected[0]} rows with hash {expected[1]}"
+    return {"validation": "mismatch", "answer_set": reference["file"], "detail": detail, "hash": digest}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show how the TPC-DS answer sets are parsed")
+    parser.add_argument("answer_sets", type=str, nargs="*", help="Answer set files (default: all of tpcds-kit/answer_sets)")
+    args = parser.parse_args()
+    paths = args.answer_sets or sorted(os.path.join(ANSWER_SETS_DIR, f) for f in os.listdir(ANSWER_SETS_DIR) if f.endswith(".ans"))
+    for path in paths:
+        tables = parse_answer_set(path)
+        shapes = ", ".join(f"{t.num_rows} rows x {t.num_columns} columns" for t in tables) or "\033[91mnot recognized\033[0m"
+        print(f"{os.path.basename(path)}: {shapes}")
@@ -0,0 +1,470 @@
+import os
+import sys
+import time
+import atexit
+import signal
+import threading
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Connections kept open to the coordinator; enough for every thread that shares the client
+POOL_SIZE = 32
+# Transient failures (connection errors, 429 and 502-504) are retried with exponential backoff
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 502, 503, 504)
+# A POST may already have started a job when a gateway answers 502 or 504, so it is only re-sent when rejected outright
+POST_RETRY_STATUSES = (429, 503)
+# Seconds to connect and to wait for a response
+TIMEOUT = (10, 300)
+# Tokens are renewed this long before they expire; TOKEN_TTL is assumed when the login response has no expiry
+TOKEN_REFRESH_MARGIN = 300
+TOKEN_TTL = 3600
+
+TERMINAL_JOB_STATES = ("COMPLETED", "FAILED", "CANCELED", "INVALID")
+# Adaptive polling: a job is first polled almost at once, then the interval grows by POLL_BACKOFF up to
+# POLL_MAX_INTERVAL, and drops back to the minimum whenever the job changes state
+POLL_MIN_INTERVAL = 0.05
+POLL_MAX_INTERVAL = 2.0
+POLL_BACKOFF = 1.5
+# Status requests in flight at once when many jobs are due together
+POLL_WORKERS = 8
+# A job whose status cannot be read for this long (e.g. 404 right after submission) is given up on
+POLL_GIVE_UP_SECONDS = 60
+
+class DremioError(Exception):
+    """A Dremio REST call failed; message is Dremio's errorMessage when it returned one."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class JobTimeoutError(DremioError):
+    """A job did not finish within its time budget; it has been cancelled in Dremio."""
+
+    def __init__(self, job_id, timeout):
+        super().__init__(f"Job {job_id} did not finish within {timeout:.1f}s and was cancelled")
+        self.job_id = job_id
+        self.timeout = timeout
+
+class SubmitSafeRetry(Retry):
+    """Retry policy that re-sends a POST only on POST_RETRY_STATUSES, so a query is never submitted twice."""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method == "POST" and status_code not in POST_RETRY_STATUSES:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+class DremioClient:
+    """
+    One keep-alive HTTP session to the Dremio REST API, shared by every call of a script.
+    Authenticates with a personal access token (DREMIO_PAT) or logs in once with username and password,
+    caching the token until shortly before it expires and logging in again if Dremio rejects it.
+    The time spent on login, job submission and status polls is recorded, so the harness's own
+    overhead can be reported separately from query time.
+    """
+
+    def __init__(self, url, username=None, password=None, pat=None, pool_size=POOL_SIZE,
+                 max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR, timeout=TIMEOUT):
+        if not url:
+            raise ValueError("DREMIO_URL must be set in the environment variables.")
+        if not pat and not (username and password):
+            raise ValueError("DREMIO_PAT, or DREMIO_USERNAME and DREMIO_PASSWORD, must be set in the environment variables.")
+        self.url = url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.pat = pat
+        self.timeout = timeout
+        self.token = None
+        self.token_expires = 0.0
+        self.lock = threading.Lock()
+        self.login_lock = threading.Lock()
+        self.overhead = {"login": [], "submit": [], "poll": []}
+        self._tracker = None
+
+        retry = SubmitSafeRetry(
+            total=max_retries, connect=max_retries, read=0, status=max_retries,
+            status_forcelist=RETRY_STATUSES, allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+            backoff_factor=backoff_factor, respect_retry_after_header=True, raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Content-Type"] = "application/json"
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """Build a client from DREMIO_URL and DREMIO_PAT or DREMIO_USERNAME/DREMIO_PASSWORD."""
+        return cls(os.getenv("DREMIO_URL"), os.getenv("DREMIO_USERNAME"), os.getenv("DREMIO_PASSWORD"), os.getenv("DREMIO_PAT"), **kwargs)
+
+    def record(self, category, seconds):
+        with self.lock:
+            self.overhead[category].append(seconds)
+
+    def login(self):
+        """Log in with username and password and cache the token."""
+        start = time.perf_counter()
+        response = self.session.post(f"{self.url}/apiv2/login", json={"userName": self.username, "password": self.password}, timeout=self.timeout)
+        self.record("login", time.perf_counter() - start)
+        if not response.ok:
+            raise DremioError(f"Authentication failed: {response.status_code} {response.text}", response.status_code)
+        body = response.json()
+        self.token = body["token"]
+        # Dremio reports the expiry in epoch milliseconds
+        self.token_expires = body["expires"] / 1000 if body.get("expires") else time.time() + TOKEN_TTL
+
+    def auth_header(self):
+        """Authorization header for the next call, logging in first if there is no valid cached token."""
+        if self.pat:
+            return {"Authorization": f"Bearer {self.pat}"}
+        with self.login_lock:
+            if not self.token or time.time() > self.token_expires - TOKEN_REFRESH_MARGIN:
+                self.login()
+            return {"Authorization": f"_dremio{self.token}"}
+
+    def send(self, method, path, category=None, **kwargs):
+        """Send one authenticated request, recording its time (without any login it needed) under category."""
+        headers = self.auth_header()
+        start = time.perf_counter()
+        try:
+            return self.session.request(method, f"{self.url}{path}", headers=headers, **kwargs)
+        finally:
+            if category:
+                self.record(category, time.perf_counter() - start)
+
+    def request(self, method, path, category=None, **kwargs):
+        """
+        Call a REST endpoint with authentication; a rejected token is renewed once and the call repeated.
+        :param category: Overhead category ("submit" or "poll") the call's time is recorded under.
+        :return: The decoded JSON body (None for an empty body).
+        :raises DremioError: On an error status, with Dremio's errorMessage when present.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.send(method, path, category, **kwargs)
+        if response.status_code == 401 and not self.pat:
+            self.token = None
+            response = self.send(method, path, category, **kwargs)
+        if not response.ok:
+            try:
+                message = response.json().get("errorMessage") or response.text
+            except ValueError:
+                message = response.text
+            raise DremioError(message or f"HTTP {response.status_code}", response.status_code)
+        return response.json() if response.content else None
+
+    def submit(self, sql, context=None):
+        """Submit a SQL statement and return its job id."""
+        payload = {"sql": sql}
+        if context:
+            payload["context"] = context
+        job_id = self.request("POST", "/api/v3/sql", "submit", json=payload).get("id")
+        if not job_id:
+            raise DremioError("No job ID returned from query submission")
+        return job_id
+
+    def job_status(self, job_id):
+        """Return the job status document of /api/v3/job/{id}."""
+        return self.request("GET", f"/api/v3/job/{job_id}", "poll")
+
+    def job_results(self, job_id, offset=0, limit=500):
+        """Return one page of a completed job's result rows; Dremio serves at most 500 rows per page."""
+        return self.request("GET", f"/api/v3/job/{job_id}/results", params={"offset": offset, "limit": limit})
+
+    def tracker(self):
+        """The job tracker polling this client's outstanding jobs, started on first use."""
+        with self.lock:
+            if self._tracker is None:
+                self._tracker = JobTracker(self)
+            return self._tracker
+
+    def track(self, job_id):
+        """Watch a job from the shared poller; return a Future that resolves to its final status."""
+        return self.tracker().track(job_id)
+
+    def cancel_job(self, job_id):
+        """
+        Cancel a job through /api/v3/job/{id}/cancel.
+        :return: True if Dremio accepted the cancellation, False if it refused (e.g. the job had already finished)
+                 or could not be reached.
+        """
+        try:
+            self.request("POST", f"/api/v3/job/{job_id}/cancel")
+            return True
+        except (DremioError, requests.RequestException):
+            return False
+
+    def cancel_outstanding(self):
+        """Cancel every job the tracker is still watching, e.g. when the script is interrupted; return their ids."""
+        with self.lock:
+            tracker = self._tracker
+        job_ids = tracker.cancel_all() if tracker else []
+        for job_id in job_ids:
+            self.cancel_job(job_id)
+        return job_ids
+
+    def close(self):
+        """
+        Stop the job tracker's thread and poll workers and close the HTTP session, for a client that is not kept
+        for the whole process. Jobs the tracker was still watching are cancelled in Dremio.
+        """
+        with self.lock:
+            tracker, self._tracker = self._tracker, None
+        if tracker:
+            for job_id in tracker.close():
+                self.cancel_job(job_id)
+        self.session.close()
+
+    def wait_for_job(self, job_id, timeout=None):
+        """
+        Wait for a job to reach a terminal state and return its final status.
+        The status carries a "tracking" entry with the job's state transitions and server-side timings.
+        :param timeout: Seconds to wait; an overdue job is cancelled in Dremio and JobTimeoutError raised.
+        """
+        future = self.track(job_id)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # A job that finished just now cannot be cancelled any more; its status is returned as usual
+            if not future.cancel():
+                return future.result()
+            self.cancel_job(job_id)
+            raise JobTimeoutError(job_id, timeout) from None
+
+    def execute(self, sql, context=None, timeout=None):
+        """Submit a SQL statement, wait for it (at most timeout seconds) and return (job_id, final status)."""
+        job_id = self.submit(sql, context)
+        return job_id, self.wait_for_job(job_id, timeout)
+
+    def overhead_summary(self):
+        """Count, total and mean seconds of each kind of harness call."""
+        with self.lock:
+            samples = {category: list(values) for category, values in self.overhead.items()}
+        return {
+            category: {"calls": len(values), "total_s": sum(values), "mean_ms": 1000 * sum(values) / len(values) if values else 0.0}
+            for category, values in samples.items()
+        }
+
+    def print_overhead(self):
+        """Print the time the harness spent on its own REST calls."""
+        parts = [
+            f"{category} {stats['calls']} call(s), {stats['total_s']:.2f}s total, {stats['mean_ms']:.1f} ms mean"
+            for category, stats in self.overhead_summary().items() if stats["calls"]
+        ]
+        if parts:
+            print("Harness overhead: " + "; ".join(parts))
+
+def parse_timestamp(value):
+    """Parse a Dremio ISO-8601 timestamp such as "2024-05-01T10:00:00.123Z"; None if missing or unreadable."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+def server_phases(status):
+    """
+    Seconds per phase from a job's own timestamps: planning from startedAt until resource scheduling starts,
+    queued while Dremio schedules the job's resources, and execution from then until endedAt.
+    Phases whose timestamps are missing (e.g. a job that failed while planning) are left out.
+    """
+    started, scheduling_started, scheduling_ended, ended = (
+        parse_timestamp(status.get(key))
+        for key in ("startedAt", "resourceSchedulingStartedAt", "resourceSchedulingEndedAt", "endedAt")
+    )
+    phases = {}
+    for phase, begin, end in (("planning", started, scheduling_started), ("queued", scheduling_started, scheduling_ended),
+                              ("execution", scheduling_ended, ended)):
+        if begin and end:
+            phases[phase] = round((end - begin).total_seconds(), 4)
+    return phases
+
+class JobTracker:
+    """
+    Watches every outstanding job of a client from one background thread instead of a polling loop per job.
+    Each job is polled on its own adaptive schedule: quickly at first, so short queries are not rounded up
+    to a fixed poll interval, then backing off so long queries do not load the coordinator.
+    Waiters get a Future that resolves to the job's final status with an added "tracking" entry:
+    the state transitions (PLANNING, QUEUED, RUNNING, ...) with the time each was first seen by a poll, the time
+    seen in each state, and the server-side timestamps with the duration and phases taken from them.
+    """
+
+    def __init__(self, client, min_interval=POLL_MIN_INTERVAL, max_interval=POLL_MAX_INTERVAL, backoff=POLL_BACKOFF,
+                 workers=POLL_WORKERS):
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jobs = {}
+        self.closed = False
+        self.condition = threading.Condition()
+        self.pollers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dremio-job-poll")
+        self.thread = threading.Thread(target=self.run, name="dremio-job-tracker", daemon=True)
+        self.thread.start()
+
+    def track(self, job_id):
+        """Start watching a job; return a Future that resolves to its final status."""
+        future = Future()
+        now = time.perf_counter()
+        with self.condition:
+            self.jobs[job_id] = {
+                "future": future, "tracked_at": now, "next_poll": now, "interval": self.min_interval,
+                "state": None, "transitions": [], "polls": 0, "failing_since": None,
+            }
+            self.condition.notify()
+        return future
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.jobs and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                now = time.perf_counter()
+                due = [job_id for job_id, job in self.jobs.items() if job["next_poll"] <= now]
+                if not due:
+                    self.condition.wait(min(job["next_poll"] for job in self.jobs.values()) - now)
+                    continue
+            # Due jobs are polled side by side; the loop waits for all of them so no job is polled twice at once
+            try:
+                list(self.pollers.map(self.poll, due))
+            except RuntimeError:
+                # The interpreter is shutting down and the poll threads are gone
+                return
+
+    def cancel_all(self):
+        """Stop watching every job and cancel their Futures; return the job ids."""
+        with self.condition:
+            jobs, self.jobs = self.jobs, {}
+        for job in jobs.values():
+            job["future"].cancel()
+        return list(jobs)
+
+    def close(self):
+        """Stop watching every job as cancel_all does, then stop the tracker thread and its poll workers; return the job ids."""
+        job_ids = self.cancel_all()
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+        self.pollers.shutdown()
+        return job_ids
+
+    def poll(self, job_id):
+        """Poll one due job, record a state change and schedule its next poll."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            # Dropped by cancel_all while it was due
+            return
+        if job["future"].cancelled():
+            self.finish(job_id)
+            return
+        try:
+            status = self.client.job_status(job_id)
+        except (DremioError, requests.RequestException) as e:
+            now = time.perf_counter()
+            job["failing_since"] = job["failing_since"] or now
+            if now - job["failing_since"] >= POLL_GIVE_UP_SECONDS:
+                self.finish(job_id, error=e)
+            else:
+                job["next_poll"] = now + self.max_interval
+            return
+
+        now = time.perf_counter()
+        job["failing_since"] = None
+        job["polls"] += 1
+        state = status.get("jobState")
+        if state != job["state"]:
+            job["transitions"].append((state, now - job["tracked_at"]))
+            job["state"] = state
+            job["interval"] = self.min_interval
+        else:
+            job["interval"] = min(job["interval"] * self.backoff, self.max_interval)
+        if state in TERMINAL_JOB_STATES:
+            self.finish(job_id, status)
+        else:
+            job["next_poll"] = now + job["interval"]
+
+    def finish(self, job_id, status=None, error=None):
+        """Stop watching a job and resolve its Future."""
+        with self.condition:
+            job = self.jobs.pop(job_id, None)
+        if job is None:
+            return
+        try:
+            if error is not None:
+                job["future"].set_exception(error)
+            elif status is not None:
+                job["future"].set_result(dict(status, tracking=self.timings(job, status)))
+        except InvalidStateError:
+            # The waiter cancelled the Future in the meantime
+            pass
+
+    def timings(self, job, status):
+        """
+        Tracking entry of a finished job: transitions and seconds per state as the polls saw them (off by up to
+        a poll interval), and the server-side timestamps, duration and phases.
+        """
+        transitions = job["transitions"]
+        seen_phases = {}
+        for (state, seen_at), (_, next_seen_at) in zip(transitions, transitions[1:]):
+            seen_phases[state] = seen_phases.get(state, 0.0) + next_seen_at - seen_at
+        started, ended = parse_timestamp(status.get("startedAt")), parse_timestamp(status.get("endedAt"))
+        return {
+            "transitions": [{"state": state, "seen_at_s": round(seen_at, 4)} for state, seen_at in transitions],
+            "seen_phases_s": {state: round(seconds, 4) for state, seconds in seen_phases.items()},
+            "polls": job["polls"],
+            "client_seconds": round(transitions[-1][1], 4) if transitions else None,
+            "server_started": status.get("startedAt"),
+            "server_ended": status.get("endedAt"),
+            "server_seconds": (ended - started).total_seconds() if started and ended else None,
+            "server_phases_s": server_phases(status),
+        }
+
+def format_timings(status):
+    """
+    One-line summary of a tracked job's timings, e.g. "server 2.310s; planning 0.201s, queued 0.000s, execution 2.109s".
+    Without server-side phases, the states the polls saw are shown instead, e.g. "seen PLANNING 0.201s".
+    """
+    tracking = status.get("tracking") or {}
+    server = f"server {tracking['server_seconds']:.3f}s" if tracking.get("server_seconds") is not None else "server time unknown"
+    phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in (tracking.get("server_phases_s") or {}).items())
+    if not phases:
+        phases = ", ".join(f"seen {state} {seconds:.3f}s" for state, seconds in (tracking.get("seen_phases_s") or {}).items())
+    return f"{server}; {phases}" if phases else server
+
+_client = None
+_client_lock = threading.Lock()
+
+def cancel_on_exit(client):
+    """
+    Cancel the client's running jobs when the process exits, so an interrupted run does not leave them using the
+    cluster. Exit handlers run after Ctrl-C; SIGTERM is turned into a normal exit so they run on shutdown too.
+    """
+    def cancel():
+        job_ids = client.cancel_outstanding()
+        if job_ids:
+            print(f"⛔ Cancelled {len(job_ids)} running Dremio job(s): {', '.join(job_ids)}", flush=True)
+
+    atexit.register(cancel)
+    # Signal handlers can only be installed from the main thread, and one the script set itself is kept
+    if threading.current_thread() is threading.main_thread() and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+def get_client():
+    """The process-wide client built from the .env settings, created on first use; its jobs are cancelled on exit."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = DremioClient.from_env()
+            cancel_on_exit(_client)
+        return _client
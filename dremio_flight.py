@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+import pyarrow as pa
+import pyarrow.flight as flight
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Seconds a Flight call may take before it is abandoned
+TIMEOUT = 300
+
+def flight_url_from_env():
+    """DREMIO_FLIGHT_URL, or grpc+tcp://DREMIO_HOST:DREMIO_PORT as the Flight JDBC test uses (default localhost:32010)."""
+    return os.getenv("DREMIO_FLIGHT_URL") or f"grpc+tcp://{os.getenv('DREMIO_HOST', 'localhost')}:{os.getenv('DREMIO_PORT', '32010')}"
+
+class DremioFlightClient:
+    """
+    Runs queries over Dremio's Arrow Flight endpoint with pyarrow.flight.
+    Result batches are streamed as Arrow record batches and never converted to Python rows, so the time to the
+    first batch and the transfer rate of the whole result can be measured. Authenticates with a personal access
+    token (DREMIO_PAT) or once with username and password, reusing the bearer token Dremio returns.
+    """
+
+    def __init__(self, location, username=None, password=None, pat=None, timeout=TIMEOUT):
+        if not pat and not (username and password):
+            raise ValueError("DREMIO_PAT, or DREMIO_USERNAME and DREMIO_PASSWORD, must be set in the environment variables.")
+        self.location = location
+        self.username = username
+        self.password = password
+        self.pat = pat
+        self.timeout = timeout
+        self.client = flight.FlightClient(location)
+        self.headers = None
+        self.login_seconds = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """Build a client from DREMIO_FLIGHT_URL and DREMIO_PAT or DREMIO_USERNAME/DREMIO_PASSWORD."""
+        return cls(flight_url_from_env(), os.getenv("DREMIO_USERNAME"), os.getenv("DREMIO_PASSWORD"), os.getenv("DREMIO_PAT"), **kwargs)
+
+    def auth_headers(self):
+        """Call headers carrying the bearer token, authenticating on first use."""
+        with self.lock:
+            if self.headers is None:
+                if self.pat:
+                    self.headers = [(b"authorization", f"Bearer {self.pat}".encode())]
+                else:
+                    start = time.perf_counter()
+                    self.headers = [self.client.authenticate_basic_token(self.username, self.password)]
+                    self.login_seconds = time.perf_counter() - start
+            return self.headers
+
+    def call_options(self, context=None, timeout=None):
+        """Options of one query; Dremio reads the default schema of unqualified table names from the "schema" header."""
+        headers = list(self.auth_headers())
+        if context:
+            headers.append((b"schema", ".".join(context).encode()))
+        return flight.FlightCallOptions(headers=headers, timeout=timeout or self.timeout)
+
+    def execute(self, sql, context=None, discard=False, timeout=None):
+        """
+        Run a query and stream its result.
+        :param discard: Drop every batch once it is counted, so only server and transfer time are measured.
+        :param timeout: Seconds the whole query may take; the calls still open when it runs out are cancelled,
+                        which cancels the query in Dremio, and flight.FlightTimedOutError is raised.
+        :return: Dictionary with rows, batches, bytes, the seconds to plan (get_flight_info), to the first
+                 batch and in total (all measured from submission), and the result as an Arrow table
+                 (None when discarded).
+        :raises flight.FlightError: When Dremio rejects or fails the query.
+        """
+        start = time.perf_counter()
+        info = self.client.get_flight_info(flight.FlightDescriptor.for_command(sql), self.call_options(context, timeout))
+        info_seconds = time.perf_counter() - start
+        first_batch_seconds = None
+        rows = nbytes = count = 0
+        batches = []
+        # Dremio returns its endpoints without locations: every ticket is fetched from the server queried
+        for endpoint in info.endpoints:
+            remaining = timeout - (time.perf_counter() - start) if timeout else None
+            if remaining is not None and remaining <= 0:
+                raise flight.FlightTimedOutError(f"Query did not finish within {timeout:.1f}s")
+            reader = self.client.do_get(endpoint.ticket, self.call_options(context, remaining))
+            for chunk in reader:
+                batch = chunk.data
+                if first_batch_seconds is None:
+                    first_batch_seconds = time.perf_counter() - start
+                rows += batch.num_rows
+                nbytes += batch.nbytes
+                count += 1
+                if not discard:
+                    batches.append(batch)
+        elapsed = time.perf_counter() - start
+        table = None if discard else pa.Table.from_batches(batches, schema=info.schema)
+        return {
+            "rows": rows, "batches": count, "bytes": nbytes, "info_s": info_seconds,
+            "first_batch_s": first_batch_seconds, "elapsed_s": elapsed, "table": table,
+        }
+
+    def close(self):
+        self.client.close()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_flight_client():
+    """The process-wide Flight client built from the .env settings, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = DremioFlightClient.from_env()
+        return _client
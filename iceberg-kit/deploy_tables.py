@@ -1,19 +1,20 @@
 import os
+import sys
 import json
 import requests
 from dotenv import load_dotenv
 import boto3
 import urllib.parse
-import time  # Ensure 'time' is imported for sleep functionality
 import argparse  # Add argparse for command-line arguments
 
+# Shared Dremio client in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dremio_client import DremioError, format_timings, get_client
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Retrieve credentials and configuration from environment variables
-DREMIO_USERNAME = os.getenv("DREMIO_USERNAME")
-DREMIO_PASSWORD = os.getenv("DREMIO_PASSWORD")
-DREMIO_URL = os.getenv("DREMIO_URL")
+# Retrieve configuration from environment variables; Dremio credentials are read by dremio_client
 
 
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
@@ -28,8 +29,8 @@ S3_OBJECT_STORE = os.getenv("S3_BUCKET_NAME")
 S3_FOLDER_NAME = os.getenv("S3_FOLDER_NAME")
 
 
-if not DREMIO_USERNAME or not DREMIO_PASSWORD or not DREMIO_URL or not ICEBERG_BUCKET_NAME:
-    raise ValueError("DREMIO_USERNAME, DREMIO_PASSWORD, DREMIO_URL, and DREMIO_SOURCE_NAME must be set in the environment variables.")
+if not ICEBERG_BUCKET_NAME:
+    raise ValueError("ICEBERG_BUCKET_NAME must be set in the environment variables.")
 
 if not S3_BUCKET_NAME or not S3_ENDPOINT_URL or not S3_ACCESS_KEY or not S3_SECRET_KEY:
     raise ValueError("S3_BUCKET_NAME, S3_ENDPOINT_URL, S3_ACCESS_KEY, and S3_SECRET_KEY must be set in the environment variables.")
@@ -45,71 +46,39 @@ s3 = boto3.client(
     aws_secret_access_key=S3_SECRET_KEY
 )
 
-def get_auth_header():
-    """Get authentication header for Dremio API calls"""
-    auth_payload = {
-        "userName": DREMIO_USERNAME,
-        "password": DREMIO_PASSWORD
-    }
-    try:
-        response = requests.post(f"{DREMIO_URL}/apiv2/login", json=auth_payload)
-        response.raise_for_status()
-        token = response.json()["token"]
-        return {"Authorization": f"_dremio{token}", "Content-Type": "application/json"}
-    except requests.exceptions.RequestException as e:
-        print(f"Authentication failed: {e}")
-        return None
+# Column names of every TPC-DS table, shared with the tpcds-kit converters
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tpcds-kit", "tpcds_schema.json")
+with open(SCHEMA_PATH, "r") as f:
+    TABLE_COLUMNS = {table: spec["columns"] for table, spec in json.load(f).items()}
+
+def select_list(table_name):
+    """
+    Columns to copy into the Iceberg table.
+    Listed explicitly because Dremio adds dir0, dir1, ... columns for Hive-partitioned (clustered) source folders.
+    """
+    if table_name not in TABLE_COLUMNS:
+        return "*"
+    return ", ".join(f'"{column}"' for column in TABLE_COLUMNS[table_name])
 
 def execute_query(query):
     """Execute a SQL query in Dremio and wait for results"""
-    headers = get_auth_header()
-    if not headers:
-        return False
-
-    # Step 1: Submit the query
-    submit_payload = {
-        "sql": query
-    }
-
     try:
         print(f"Submitting SQL query: {query}")
-        response = requests.post(
-            f"{DREMIO_URL}/api/v3/sql",
-            headers=headers,
-            json=submit_payload
-        )
-        response.raise_for_status()
-        job_id = response.json().get('id')
-        
-        if not job_id:
-            print("No job ID returned from query submission")
-            return False
-
-        # Step 2: Poll for query status
-        while True:
-            status_response = requests.get(
-                f"{DREMIO_URL}/api/v3/job/{job_id}",
-                headers=headers
-            )
-            status_response.raise_for_status()
-            status = status_response.json()
-            
-            if status.get('jobState') == 'COMPLETED':
-                print("Query completed successfully")
-                return True
-            elif status.get('jobState') in ['FAILED', 'CANCELED', 'INVALID']:
-                print(f"Query failed with state: {status.get('jobState')}")
-                print(f"Error: {status.get('errorMessage')}")
-                return False
-            
-            time.sleep(1)  # Wait before polling again
-
+        _, status = get_client().execute(query)
+    except DremioError as e:
+        print(f"Failed to execute query: {e}")
+        return False
     except requests.exceptions.RequestException as e:
         print(f"Failed to execute query: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"Error response: {e.response.text}")
         return False
 
+    if status.get('jobState') == 'COMPLETED':
+        print(f"Query completed successfully ({format_timings(status)})")
+        return True
+    print(f"Query failed with state: {status.get('jobState')}")
+    print(f"Error: {status.get('errorMessage')}")
+    return False
+
 def process_table(table_name, partition_column=None, localsort_column=None):
     """Query the object and create the Iceberg table."""
     # Step 1: Query the object with LIMIT 1
@@ -125,27 +94,40 @@ def process_table(table_name, partition_column=None, localsort_column=None):
         create_query = f"""
         CREATE TABLE icerberg."test-dremio".sample."{table_name}" 
         PARTITION BY ({partition_column}){localsort_clause} AS 
-        SELECT * FROM tpcds.tpcds.tpcds.sample."{table_name}";
+        SELECT {select_list(table_name)} FROM tpcds.tpcds.tpcds.sample."{table_name}";
         """
     else:
         create_query = f"""
         CREATE TABLE icerberg."test-dremio".sample."{table_name}" AS 
-        SELECT * FROM tpcds.tpcds.tpcds.sample."{table_name}";
+        SELECT {select_list(table_name)} FROM tpcds.tpcds.tpcds.sample."{table_name}";
         """
     print(f"Creating Iceberg table for: {table_name}")
     execute_query(create_query)
 
+def register_table(table_name, partition_column=None, localsort_column=None):
+    """
+    Promote an Iceberg table written directly by tpcds-kit/iceberg_writer.py, instead of rewriting it with CTAS.
+    The partition spec and sort order are already in the table's metadata, so only Dremio's metadata is refreshed.
+    """
+    query = f"""
+    ALTER TABLE icerberg."test-dremio".sample."{table_name}" REFRESH METADATA AUTO PROMOTION;
+    """
+    print(f"Registering Iceberg table: {table_name}")
+    execute_query(query)
+
 def main():
     parser = argparse.ArgumentParser(description="Deploy Iceberg tables from S3 objects")
     parser.add_argument("--table", help="Specific table name to process (without fetching the list)")
+    parser.add_argument("--register", action="store_true", help="Register tables written by tpcds-kit/iceberg_writer.py instead of creating them with CTAS")
     args = parser.parse_args()
+    deploy = register_table if args.register else process_table
 
     if args.table:
         # Process only the specified table
         table_name = args.table
         print(f"Processing single table: {table_name}")
         # Assuming partition_column and localsort_column are provided for single table processing
-        process_table(table_name, partition_column="partition_column", localsort_column="localsort_column")
+        deploy(table_name, partition_column="partition_column", localsort_column="localsort_column")
     else:
         # Load tables.json
         tables_file = "tables.json"
@@ -176,11 +158,11 @@ def main():
             
             partition_column = config["partition_by"]  # Use "partition_by" instead of "partition_column"
             localsort_column = config["localsort_by"]  # Use "localsort_by" instead of "localsort_column"
-            process_table(table_name, partition_column, localsort_column)
+            deploy(table_name, partition_column, localsort_column)
 
         # Process non-partitioned tables
         for table_name in tables["non_partitioned_tables"]:  # Iterate directly over the list
-            process_table(table_name)
+            deploy(table_name)
 
 if __name__ == "__main__":
     main()
@@ -1,45 +1,32 @@
 import os
+import sys
 import requests
 from dotenv import load_dotenv
 
+# Shared Dremio client in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dremio_client import DremioError, get_client
+
 # Load environment variables from .env
 load_dotenv()
 
-# Env vars
-DREMIO_USERNAME = os.getenv("DREMIO_USERNAME")
-DREMIO_PASSWORD = os.getenv("DREMIO_PASSWORD")
-DREMIO_URL = os.getenv("DREMIO_URL")
+# Env vars; Dremio credentials are read by dremio_client
 CATALOG = os.getenv("ICEBERG_BUCKET_NAME")  # now dynamic!
 
-if not DREMIO_USERNAME or not DREMIO_PASSWORD or not DREMIO_URL or not CATALOG:
+if not CATALOG:
     raise ValueError("Missing one or more required environment variables.")
 
 # Config
 view_folder = "views"
 queries_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tpcds-kit", "tools", "queries"))
 
-def get_auth_header():
-    """Authenticate with Dremio and return the authorization header."""
-    auth_payload = {"userName": DREMIO_USERNAME, "password": DREMIO_PASSWORD}
-    response = requests.post(f"{DREMIO_URL}/apiv2/login", json=auth_payload)
-    response.raise_for_status()
-    token = response.json()["token"]
-    return {"Authorization": f"_dremio{token}", "Content-Type": "application/json"}
-
 def execute_query(query):
     """Execute a SQL query in Dremio."""
-    headers = get_auth_header()
-    payload = {
-        "sql": query,
-        "context": [CATALOG]
-    }
     try:
-        response = requests.post(f"{DREMIO_URL}/api/v3/sql", headers=headers, json=payload)
-        response.raise_for_status()
+        get_client().submit(query, [CATALOG])
         print(f"✅ Executed query:\n{query[:100]}...\n")
-    except requests.exceptions.HTTPError:
-        error_message = response.json().get("errorMessage", "Unknown error")
-        print(f"❌ Query failed: {error_message}\n")
+    except DremioError as e:
+        print(f"❌ Query failed: {e}\n")
     except requests.exceptions.RequestException as e:
         print(f"❌ Request error: {e}\n")
 
@@ -53,6 +40,7 @@ def create_views():
             query_text = f.read().strip().rstrip(";")
         create_query = f"CREATE OR REPLACE VIEW {CATALOG}.{view_folder}.{view_name} AS {query_text};"
         execute_query(create_query)
+    get_client().print_overhead()
 
 if __name__ == "__main__":
     create_views()
\ No newline at end of file
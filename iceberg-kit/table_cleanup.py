@@ -1,85 +1,42 @@
 import os
+import sys
 import json
 import requests
 from dotenv import load_dotenv
-import time
+
+# Shared Dremio client in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dremio_client import DremioError, format_timings, get_client
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Retrieve credentials and configuration from environment variables
-DREMIO_USERNAME = os.getenv("DREMIO_USERNAME")
-DREMIO_PASSWORD = os.getenv("DREMIO_PASSWORD")
-DREMIO_URL = os.getenv("DREMIO_URL")
+# Retrieve configuration from environment variables; Dremio credentials are read by dremio_client
 ICEBERG_BUCKET_NAME = os.getenv("ICEBERG_BUCKET_NAME")
 ICEBERG_FOLDER_NAME = os.getenv("ICEBERG_FOLDER_NAME")
 
-if not DREMIO_USERNAME or not DREMIO_PASSWORD or not DREMIO_URL or not ICEBERG_BUCKET_NAME or not ICEBERG_FOLDER_NAME:
-    raise ValueError("DREMIO_USERNAME, DREMIO_PASSWORD, DREMIO_URL, ICEBERG_BUCKET_NAME, and ICEBERG_FOLDER_NAME must be set in the environment variables.")
-
-def get_auth_header():
-    """Get authentication header for Dremio API calls"""
-    auth_payload = {
-        "userName": DREMIO_USERNAME,
-        "password": DREMIO_PASSWORD
-    }
-    try:
-        response = requests.post(f"{DREMIO_URL}/apiv2/login", json=auth_payload)
-        response.raise_for_status()
-        token = response.json()["token"]
-        return {"Authorization": f"_dremio{token}", "Content-Type": "application/json"}
-    except requests.exceptions.RequestException as e:
-        print(f"Authentication failed: {e}")
-        return None
+if not ICEBERG_BUCKET_NAME or not ICEBERG_FOLDER_NAME:
+    raise ValueError("ICEBERG_BUCKET_NAME and ICEBERG_FOLDER_NAME must be set in the environment variables.")
 
 def execute_query(query):
     """Execute a SQL query in Dremio and wait for results"""
-    headers = get_auth_header()
-    if not headers:
-        return False
-
-    submit_payload = {
-        "sql": query
-    }
-
     try:
         print(f"Submitting SQL query: {query}")
-        response = requests.post(
-            f"{DREMIO_URL}/api/v3/sql",
-            headers=headers,
-            json=submit_payload
-        )
-        response.raise_for_status()
-        job_id = response.json().get('id')
-
-        if not job_id:
-            print("No job ID returned from query submission")
-            return False
-
-        while True:
-            status_response = requests.get(
-                f"{DREMIO_URL}/api/v3/job/{job_id}",
-                headers=headers
-            )
-            status_response.raise_for_status()
-            status = status_response.json()
-
-            if status.get('jobState') == 'COMPLETED':
-                print("Query completed successfully")
-                return True
-            elif status.get('jobState') in ['FAILED', 'CANCELED', 'INVALID']:
-                print(f"Query failed with state: {status.get('jobState')}")
-                print(f"Error: {status.get('errorMessage')}")
-                return False
-
-            time.sleep(1)
-
+        _, status = get_client().execute(query)
+    except DremioError as e:
+        print(f"Failed to execute query: {e}")
+        return False
     except requests.exceptions.RequestException as e:
         print(f"Failed to execute query: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"Error response: {e.response.text}")
         return False
 
+    if status.get('jobState') == 'COMPLETED':
+        print(f"Query completed successfully ({format_timings(status)})")
+        return True
+    print(f"Query failed with state: {status.get('jobState')}")
+    print(f"Error: {status.get('errorMessage')}")
+    return False
+
 def cleanup_tables():
     """Loop through table names and delete them"""
     tables_file = "tables.json"
@@ -0,0 +1,117 @@
+import os
+import re
+import json
+import pyarrow as pa
+
+# Resolve paths relative to the script's location
+script_dir = os.path.dirname(__file__)
+SCHEMA_SQL_PATH = os.path.join(script_dir, "tpds_schema.sql")
+# The kit's ANSI DDL carries the decimal precision and char widths that tpds_schema.sql leaves out
+SPEC_SQL_PATH = os.path.join(script_dir, "tools", "tpcds.sql")
+SCHEMA_JSON_PATH = os.path.join(script_dir, "tpcds_schema.json")
+
+# Longest char column that is still dictionary-encoded when it is not a business key
+DICTIONARY_MAX_WIDTH = 20
+# char columns short enough for a dictionary whose values are nevertheless mostly unique
+HIGH_CARDINALITY_SUFFIXES = ("_id", "_zip", "_street_number", "_suite_number", "_login")
+
+def parse_ddl(path):
+    """
+    Parse the CREATE TABLE statements of a DDL file.
+    Understands both the ClickHouse-style tpds_schema.sql and the ANSI tools/tpcds.sql.
+    :return: Dictionary mapping table name to a list of (column, type, nullable) tuples.
+    """
+    with open(path, "r") as f:
+        ddl = f.read()
+
+    tables = {}
+    for match in re.finditer(r"create\s+table\s+(\w+)\s*\((.*?)\)\s*(?:engine[^;]*)?;", ddl, re.S | re.I):
+        columns = []
+        for line in match.group(2).splitlines():
+            line = line.strip().rstrip(",").strip()
+            if not line or line.lower().startswith("primary key"):
+                continue
+            column, column_type = line.split(None, 1)
+            column_type = column_type.strip()
+            nullable = True
+            if column_type.lower().endswith("not null"):
+                column_type, nullable = column_type[:-len("not null")].strip(), False
+            elif column_type.startswith("Nullable("):
+                column_type = column_type[len("Nullable("):-1]
+            elif column_type[:1].isupper():
+                # ClickHouse columns are NOT NULL unless wrapped in Nullable()
+                nullable = False
+            columns.append((column, column_type, nullable))
+        tables[match.group(1).lower()] = columns
+    return tables
+
+def arrow_type(column, column_type):
+    """
+    Map a DDL column type to an Arrow type.
+    :return: Tuple of (Arrow type, char width or None).
+    """
+    normalized = column_type.strip().lower()
+    width = re.match(r"(?:var)?char\((\d+)\)", normalized)
+    if width:
+        return pa.string(), int(width.group(1))
+    decimal = re.match(r"decimal\((\d+),\s*(\d+)\)", normalized)
+    if decimal:
+        return pa.decimal128(int(decimal.group(1)), int(decimal.group(2))), None
+    if normalized in ("integer", "int64"):
+        # Ticket and order numbers outgrow int32 at large scale factors; keys and measures do not
+        return (pa.int64() if column.endswith("_number") else pa.int32()), None
+    if normalized == "date":
+        return pa.date32(), None
+    if normalized == "time":
+        return pa.time32("s"), None
+    # ClickHouse money columns are Float32/Float64; TPC-DS defines them as decimal(7,2) and decimal(15,2)
+    if normalized == "float32":
+        return pa.decimal128(7, 2), None
+    if normalized == "float64":
+        return pa.decimal128(15, 2), None
+    return pa.string(), None
+
+def is_low_cardinality(column, arrow_field_type, width):
+    """True for short char columns (flags, codes, categories) that compress well with dictionary encoding."""
+    return (
+        pa.types.is_string(arrow_field_type)
+        and width is not None
+        and width <= DICTIONARY_MAX_WIDTH
+        and not column.endswith(HIGH_CARDINALITY_SUFFIXES)
+    )
+
+def load_table_schemas(schema_sql_path=SCHEMA_SQL_PATH, spec_sql_path=SPEC_SQL_PATH):
+    """
+    Derive an Arrow schema for every TPC-DS table.
+    Column names come from tpcds_schema.json (the names the converters always used), nullability from
+    tpds_schema.sql, and exact types from the ANSI DDL when it is available, matched by column position.
+    Char widths are kept as "char_width" field metadata since Arrow strings have no fixed width.
+    :return: Dictionary mapping table name to a pyarrow.Schema.
+    """
+    with open(SCHEMA_JSON_PATH, "r") as f:
+        column_names = {table: spec["columns"] for table, spec in json.load(f).items()}
+    ddl = parse_ddl(schema_sql_path)
+    spec = parse_ddl(spec_sql_path) if os.path.exists(spec_sql_path) else {}
+
+    schemas = {}
+    for table_name, columns in ddl.items():
+        names = column_names.get(table_name, [column for column, _, _ in columns])
+        spec_columns = spec.get(table_name, [])
+        fields = []
+        for position, (column, column_type, nullable) in enumerate(columns):
+            name = names[position] if position < len(names) else column
+            if position < len(spec_columns):
+                column_type = spec_columns[position][1]
+            field_type, width = arrow_type(name, column_type)
+            metadata = {}
+            if width is not None:
+                metadata[b"char_width"] = str(width).encode()
+            if is_low_cardinality(name, field_type, width):
+                metadata[b"dictionary"] = b"true"
+            fields.append(pa.field(name, field_type, nullable=nullable, metadata=metadata or None))
+        schemas[table_name] = pa.schema(fields)
+    return schemas
+
+def dictionary_columns(schema):
+    """Names of the columns marked for dictionary encoding."""
+    return [field.name for field in schema if field.metadata and field.metadata.get(b"dictionary") == b"true"]
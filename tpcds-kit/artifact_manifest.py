@@ -0,0 +1,232 @@
+import os
+import re
+import json
+import time
+import threading
+
+from tpcds_files import scan_file, table_name_from_file
+
+# Resolve paths relative to the script's location
+script_dir = os.path.dirname(__file__)
+DATA_DIR = os.path.join(script_dir, "test_data")
+MANIFEST_PATH = os.path.join(DATA_DIR, "manifest.json")
+RELEASE_HEADER = os.path.join(script_dir, "tools", "release.h")
+
+def dsdgen_version(raw_dir=None):
+    """
+    Return the dsdgen version string, e.g. "2.13.0".
+    Read from dv_version in dbgen_version.dat when a generated copy exists, otherwise from tools/release.h,
+    which is where dsdgen takes the value it writes into dbgen_version.
+    """
+    raw_dir = raw_dir or os.path.join(DATA_DIR, "raw_files")
+    dbgen_version_file = os.path.join(raw_dir, "dbgen_version.dat")
+    if os.path.exists(dbgen_version_file):
+        with open(dbgen_version_file, "r", encoding="latin1") as f:
+            version = f.readline().split("|")[0].strip()
+        if version:
+            return version
+
+    parts = {}
+    with open(RELEASE_HEADER, "r") as f:
+        for line in f:
+            match = re.match(r"#define\s+(VERSION|RELEASE|MODIFICATION|PATCH)\s+\"?([^\"\s]*)\"?", line)
+            if match:
+                parts[match.group(1)] = match.group(2)
+    return f"{parts.get('VERSION', '0')}.{parts.get('RELEASE', '0')}.{parts.get('MODIFICATION', '0')}{parts.get('PATCH', '')}"
+
+def unit_key(scale_factor, version, table, child, parallelism, kind="raw"):
+    """
+    Key of one generation unit: a dsdgen run for one chunk of one table (or of all tables).
+    kind is "raw" for .dat output and "stream" for Parquet written through named pipes.
+    """
+    return f"{kind}/sf{scale_factor}/v{version}/{table or 'all'}/{child}_{parallelism}"
+
+class ArtifactManifest:
+    """
+    Records generated .dat files and converted Parquet files with their checksums and row counts,
+    so re-runs can skip finished work and interrupted runs resume where they stopped.
+
+    Sections:
+      files:     relative path -> size, mtime_ns, checksum, rows (checksums are computed at most once per file version)
+      generated: unit key -> scale factor, dsdgen version, table, chunk and the files the unit produced
+      converted: Parquet path -> source path, source checksum and converter settings it was built from
+      etags:     relative path -> S3 ETag and part MD5s of a file for one multipart chunk size (see s3_sync.py)
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.base_dir = os.path.dirname(path)
+        self.lock = threading.Lock()
+        self.data = {"files": {}, "generated": {}, "converted": {}, "etags": {}}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.data.update(json.load(f))
+            except json.JSONDecodeError as e:
+                print(f"Warning: Ignoring unreadable manifest {path}: {e}")
+
+    def save(self):
+        """Write the manifest atomically so an interrupted run never leaves it half-written."""
+        with self.lock:
+            os.makedirs(self.base_dir, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def relpath(self, file_path):
+        return os.path.relpath(os.path.abspath(file_path), os.path.abspath(self.base_dir))
+
+    def abspath(self, relative_path):
+        return os.path.abspath(os.path.join(self.base_dir, relative_path))
+
+    def is_intact(self, file_path):
+        """True if the file exists with the size and mtime recorded for it."""
+        entry = self.data["files"].get(self.relpath(file_path))
+        if not entry or not os.path.exists(file_path):
+            return False
+        stat = os.stat(file_path)
+        return stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]
+
+    def describe(self, file_path, rows=None):
+        """
+        Return the manifest entry of a file, scanning it only if it is new or changed since it was recorded.
+        :param rows: Row count to record instead of counting newlines (used for Parquet files).
+        """
+        relative_path = self.relpath(file_path)
+        if self.is_intact(file_path):
+            entry = self.data["files"][relative_path]
+            if rows is None or entry.get("rows") == rows:
+                return entry
+        stat = os.stat(file_path)
+        counted_rows, checksum = scan_file(file_path)
+        entry = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "checksum": checksum,
+            "rows": counted_rows if rows is None else rows,
+        }
+        with self.lock:
+            self.data["files"][relative_path] = entry
+        return entry
+
+    def rename_file(self, old_path, new_path):
+        """Move the records of a file that was renamed on disk (e.g. a single chunk labeled <table>.dat)."""
+        old_relative, new_relative = self.relpath(old_path), self.relpath(new_path)
+        with self.lock:
+            entry = self.data["files"].pop(old_relative, None)
+            if entry:
+                entry["mtime_ns"] = os.stat(new_path).st_mtime_ns
+                self.data["files"][new_relative] = entry
+            for unit in self.data["generated"].values():
+                unit["files"] = [new_relative if f == old_relative else f for f in unit["files"]]
+
+    def unit_complete(self, key):
+        """True if a generation unit finished and every file it produced is still intact."""
+        unit = self.data["generated"].get(key)
+        return bool(unit) and all(self.is_intact(self.abspath(f)) for f in unit["files"])
+
+    def unit_files(self, key):
+        unit = self.data["generated"].get(key)
+        return [self.abspath(f) for f in unit["files"]] if unit else []
+
+    def record_unit(self, key, scale_factor, version, table, child, parallelism, file_paths, rows=None):
+        """
+        Record a finished generation unit and the files it produced.
+        :param rows: Optional mapping of file path to row count for files that are not line-delimited (Parquet).
+        """
+        for file_path in file_paths:
+            self.describe(file_path, (rows or {}).get(file_path))
+        with self.lock:
+            self.data["generated"][key] = {
+                "scale_factor": scale_factor,
+                "dsdgen_version": version,
+                "table": table or "all",
+                "chunk": f"{child}_{parallelism}",
+                "files": [self.relpath(f) for f in file_paths],
+                "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+        self.save()
+
+    def kept_files(self, keys):
+        """Absolute paths of every file produced by the given complete units."""
+        return {path for key in keys if self.unit_complete(key) for path in self.unit_files(key)}
+
+    def conversion_current(self, source_path, output_path, settings):
+        """True if the Parquet output was built from the current source contents with the same settings."""
+        entry = self.data["converted"].get(self.relpath(output_path))
+        if not entry or not self.is_intact(output_path) or entry["settings"] != settings:
+            return False
+        return entry["source_checksum"] == self.describe(source_path)["checksum"]
+
+    def record_conversion(self, source_path, output_path, settings, rows):
+        """Record a finished conversion of a source file into Parquet."""
+        source_entry = self.describe(source_path)
+        self.describe(output_path, rows)
+        with self.lock:
+            self.data["converted"][self.relpath(output_path)] = {
+                "source": self.relpath(source_path),
+                "source_checksum": source_entry["checksum"],
+                "table": table_name_from_file(source_path),
+                "settings": settings,
+                "rows": rows,
+                "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+        self.save()
+
+    def cached_etag(self, file_path, chunk_size):
+        """
+        Return the (etag, part_md5s) recorded for a file, or None if the file changed since or the ETag
+        was computed for another multipart chunk size.
+        """
+        entry = self.data["etags"].get(self.relpath(file_path))
+        if not entry or entry["chunk_size"] != chunk_size:
+            return None
+        stat = os.stat(file_path)
+        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+            return None
+        return entry["etag"], entry["parts"]
+
+    def record_etag(self, file_path, chunk_size, etag, part_md5s):
+        """Record the S3 ETag a file gets when uploaded with the given chunk size, so it is hashed only once."""
+        stat = os.stat(file_path)
+        with self.lock:
+            self.data["etags"][self.relpath(file_path)] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "chunk_size": chunk_size,
+                "etag": etag,
+                "parts": part_md5s,
+            }
+
+    def forget(self, file_path):
+        """Drop every record that refers to a file, e.g. because it was deleted."""
+        relative_path = self.relpath(file_path)
+        with self.lock:
+            self.data["files"].pop(relative_path, None)
+            self.data["etags"].pop(relative_path, None)
+            self.data["converted"].pop(relative_path, None)
+            for key in [k for k, unit in self.data["generated"].items() if relative_path in unit["files"]]:
+                del self.data["generated"][key]
+
+    def evict(self, directory, suffix, tables=None):
+        """
+        Delete data files from a directory together with their manifest records.
+        :param directory: Directory to clean, e.g. test_data/raw_files.
+        :param suffix: File suffix to delete (".dat" or ".parquet").
+        :param tables: Optional set of table names to evict; all tables when None.
+        :return: Number of files deleted.
+        """
+        deleted = 0
+        if os.path.exists(directory):
+            for file_name in os.listdir(directory):
+                if not file_name.endswith(suffix):
+                    continue
+                if tables and table_name_from_file(file_name) not in tables:
+                    continue
+                file_path = os.path.join(directory, file_name)
+                os.remove(file_path)
+                self.forget(file_path)
+                deleted += 1
+        self.save()
+        return deleted
@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from arrow_schema import dictionary_columns, load_table_schemas
+from tpcds_files import group_files_by_table
+
+# Resolve paths relative to the script's location
+script_dir = os.path.dirname(__file__)
+parquet_dir = os.path.join(script_dir, "test_data/parquet")
+# The same partition and sort keys the Iceberg CTAS in iceberg-kit/deploy_tables.py uses
+TABLES_CONFIG_PATH = os.path.join(script_dir, "..", "iceberg-kit", "tables.json")
+
+TARGET_FILE_SIZE = 256 * 1024 * 1024
+ROW_GROUP_SIZE = 128 * 1024 * 1024
+# pyarrow writes null partition values to this directory, as Hive does
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+TABLE_ARROW_SCHEMAS = load_table_schemas()
+
+def load_cluster_keys(config_path=TABLES_CONFIG_PATH):
+    """
+    Read the partition and local sort key of every partitioned table from tables.json.
+    :return: Dictionary mapping table name to (partition_by, localsort_by).
+    """
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    return {
+        table_name: (keys["partition_by"], keys["localsort_by"])
+        for table_name, keys in config["partitioned_tables"].items()
+    }
+
+def rows_for_size(file_paths, size):
+    """Estimate how many rows fill the given number of bytes, from the compressed size per row of the flat Parquet files."""
+    rows = sum(pq.ParquetFile(f).metadata.num_rows for f in file_paths)
+    total_bytes = sum(os.path.getsize(f) for f in file_paths)
+    return max(1, int(size / max(total_bytes / max(rows, 1), 1)))
+
+def iter_row_chunks(dataset, chunk_rows):
+    """Yield tables of at most chunk_rows rows from a dataset, reading it batch by batch."""
+    batches, buffered = [], 0
+    for batch in dataset.to_batches():
+        batches.append(batch)
+        buffered += batch.num_rows
+        while buffered >= chunk_rows:
+            table = pa.Table.from_batches(batches, schema=dataset.schema)
+            yield table.slice(0, chunk_rows)
+            rest = table.slice(chunk_rows)
+            batches, buffered = rest.to_batches(), rest.num_rows
+    if buffered:
+        yield pa.Table.from_batches(batches, schema=dataset.schema)
+
+def sort_partition(table_name, partition_column, sort_column, staging_dir, output_dir, rows_per_file, rows_per_group):
+    """
+    Rewrite one staged partition as Parquet files of about rows_per_file rows, each sorted by the local sort key.
+    A partition that fits in one file ends up fully sorted; larger partitions are sorted file by file,
+    so memory stays bounded by the target file size.
+    The partition column is written back into the files, so readers that ignore the directory names still see it.
+    :return: Number of rows written.
+    """
+    schema = TABLE_ARROW_SCHEMAS[table_name]
+    field = schema.field(partition_column)
+    value = os.path.basename(staging_dir).split("=", 1)[1]
+    scalar = None if value == NULL_PARTITION else pa.array([value]).cast(field.type)[0]
+    os.makedirs(output_dir, exist_ok=True)
+
+    rows = 0
+    dataset = ds.dataset(staging_dir, format="ipc")
+    for part, chunk in enumerate(iter_row_chunks(dataset, rows_per_file)):
+        partition_values = pa.nulls(chunk.num_rows, field.type)
+        if scalar is not None:
+            partition_values = partition_values.fill_null(scalar)
+        chunk = chunk.append_column(field.name, partition_values).select(schema.names)
+        chunk = chunk.sort_by([(sort_column, "ascending")]).cast(schema)
+        pq.write_table(
+            chunk,
+            os.path.join(output_dir, f"part-{part:05d}.parquet"),
+            row_group_size=rows_per_group,
+            use_dictionary=dictionary_columns(schema),
+        )
+        rows += chunk.num_rows
+    return rows
+
+def cluster_table(table_name, file_paths, partition_column, sort_column, target_file_size=TARGET_FILE_SIZE,
+                  row_group_size=ROW_GROUP_SIZE, workers=None):
+    """
+    Rewrite the flat Parquet files of one table as Hive-partitioned, within-file-sorted Parquet in parquet/<table>/.
+    The flat files are first split by partition value into Arrow IPC staging files in a single streaming pass,
+    then each partition is sorted and written in parallel.
+    :param file_paths: Flat Parquet files of the table (whole table, chunks or byte-range parts).
+    :param target_file_size: Approximate bytes per output file.
+    :param row_group_size: Approximate bytes per row group.
+    :return: Number of rows written.
+    """
+    table_dir = os.path.join(parquet_dir, table_name)
+    staging_root = os.path.join(parquet_dir, f"_staging_{table_name}")
+    build_dir = os.path.join(parquet_dir, f"_build_{table_name}")
+    for directory in (staging_root, build_dir):
+        shutil.rmtree(directory, ignore_errors=True)
+
+    start = time.time()
+    schema = TABLE_ARROW_SCHEMAS[table_name]
+    ds.write_dataset(
+        ds.dataset(file_paths, format="parquet", schema=schema),
+        staging_root,
+        format="ipc",
+        partitioning=ds.partitioning(pa.schema([schema.field(partition_column)]), flavor="hive"),
+        max_partitions=100000,
+    )
+
+    rows_per_file = rows_for_size(file_paths, target_file_size)
+    rows_per_group = min(rows_per_file, rows_for_size(file_paths, row_group_size))
+    partitions = sorted(os.listdir(staging_root))
+    rows = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        futures = [
+            executor.submit(
+                sort_partition, table_name, partition_column, sort_column,
+                os.path.join(staging_root, partition), os.path.join(build_dir, partition), rows_per_file, rows_per_group
+            )
+            for partition in partitions
+        ]
+        for future in as_completed(futures):
+            rows += future.result()
+    shutil.rmtree(staging_root, ignore_errors=True)
+
+    # Swap the finished layout in only once it is complete
+    shutil.rmtree(table_dir, ignore_errors=True)
+    os.replace(build_dir, table_dir)
+    print(f"Clustered {table_name} into {len(partitions)} partitions by {partition_column}, sorted by {sort_column} "
+          f"({rows:,} rows in {time.time() - start:.1f}s, ~{rows_per_file:,} rows per file, ~{rows_per_group:,} rows per row group)")
+    return rows
+
+def cluster_tables(tables=None, target_file_size=TARGET_FILE_SIZE, row_group_size=ROW_GROUP_SIZE, workers=None):
+    """
+    Cluster every partitioned table in tables.json that has flat Parquet files in the parquet directory.
+    Tables without a partition key in tables.json stay flat.
+    :param tables: Optional set of table names to cluster; all partitioned tables when None.
+    """
+    cluster_keys = load_cluster_keys()
+    flat_files = [os.path.join(parquet_dir, f) for f in os.listdir(parquet_dir) if f.endswith(".parquet")]
+    for table_name, file_paths in sorted(group_files_by_table(flat_files).items()):
+        if table_name not in cluster_keys or (tables and table_name not in tables):
+            continue
+        partition_column, sort_column = cluster_keys[table_name]
+        cluster_table(table_name, file_paths, partition_column, sort_column, target_file_size, row_group_size, workers)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rewrite flat TPC-DS Parquet as Hive-partitioned, sorted Parquet using the keys in iceberg-kit/tables.json")
+    parser.add_argument("--tables", type=str, default="", help="Comma-separated list of tables to cluster (default: every partitioned table)")
+    parser.add_argument("--target_file_mb", type=int, default=TARGET_FILE_SIZE // (1024 * 1024), help="Approximate size of each output file in MB (default: 256)")
+    parser.add_argument("--row_group_mb", type=int, default=ROW_GROUP_SIZE // (1024 * 1024), help="Approximate size of each row group in MB (default: 128)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes sorting partitions (default: one per CPU)")
+    args = parser.parse_args()
+
+    tables = {t.strip() for t in args.tables.split(",") if t.strip()}
+    unknown_tables = tables - set(load_cluster_keys())
+    if unknown_tables:
+        print(f"Not a partitioned table in tables.json: {', '.join(sorted(unknown_tables))}")
+        sys.exit(1)
+    cluster_tables(tables or None, args.target_file_mb * 1024 * 1024, args.row_group_mb * 1024 * 1024, args.workers)
@@ -1,10 +1,23 @@
 import os
+import glob
+import json
+import time
 import subprocess
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from artifact_manifest import ArtifactManifest, dsdgen_version, unit_key
+from tpcds_files import CHILD_TABLES, chunk_file_name, group_files_by_table, split_chunk_name, table_name_from_file
 
 # Path to the dsdgen executable
 DSDGEN_PATH = os.path.join(os.path.dirname(__file__), "tools", "dsdgen")  # Adjusted path to tools folder
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "test_data", "raw_files")  # Updated output directory
+TOOLS_DIR = os.path.join(os.path.dirname(__file__), "tools")
+
+# Load the table list from the schema definitions
+schema_path = os.path.join(os.path.dirname(__file__), "tpcds_schema.json")
+with open(schema_path, 'r') as f:
+    TABLE_NAMES = list(json.load(f).keys())
 
 # Create the output directory if it doesn't exist
 if not os.path.exists(OUTPUT_DIR):
@@ -21,9 +34,25 @@ def compile_dsdgen():
         print("Failed to compile dsdgen. Ensure you have 'make' and necessary dependencies installed.")
         exit(1)
 
+def tables_built_by(table):
+    """Return the tables one dsdgen run writes: all tables, or the named table plus its child table."""
+    if not table:
+        return TABLE_NAMES
+    return [table] + ([CHILD_TABLES[table]] if table in CHILD_TABLES else [])
+
 # Generate data using dsdgen
-def generate_data(scale_factor):
+def generate_data(scale_factor, force=False):
+    manifest = ArtifactManifest()
+    version = dsdgen_version()
+    key = unit_key(scale_factor, version, None, 1, 1)
+    if not force and manifest.unit_complete(key):
+        print(f"TPC-DS data with scale factor {scale_factor} (dsdgen {version}) is already generated and unchanged. Skipping.")
+        return
+
     print(f"Generating TPC-DS data with scale factor {scale_factor}...")
+    # Chunk files of an earlier parallel run would sit next to the new whole-table files and be converted twice
+    remove_existing_files(TABLE_NAMES, manifest=manifest)
+    manifest.save()
     tools_dir = os.path.join(os.path.dirname(__file__), "tools")
     command = [
         DSDGEN_PATH,
@@ -38,6 +67,196 @@ def generate_data(scale_factor):
     if process.returncode != 0:
         print("Data generation failed.")
         exit(1)
+
+    # Record checksums and row counts so the next run can skip generation
+    generated_files = [os.path.join(OUTPUT_DIR, f"{table_name}.dat") for table_name in TABLE_NAMES]
+    manifest.record_unit(key, scale_factor, version, None, 1, 1, [f for f in generated_files if os.path.exists(f)])
+    print(f"Data generation complete. Files are located in {OUTPUT_DIR}.")
+
+def remove_existing_files(tables, keep=(), manifest=None):
+    """Remove whole-table and chunk .dat files left over from earlier runs of the given tables, except those in keep."""
+    for file_path in glob.glob(os.path.join(OUTPUT_DIR, "*.dat")):
+        if table_name_from_file(file_path) in tables and os.path.abspath(file_path) not in keep:
+            os.remove(file_path)
+            if manifest:
+                manifest.forget(file_path)
+
+def run_dsdgen_child(scale_factor, parallelism, child, table=None, output_dir=None):
+    """
+    Run one dsdgen child process and stream its output with a label.
+    :param scale_factor: Scale factor for data generation.
+    :param parallelism: Total number of chunks (dsdgen -PARALLEL); 1 runs an unchunked build.
+    :param child: Chunk to build, from 1 to parallelism (dsdgen -CHILD).
+    :param table: Optional single table to build (dsdgen -TABLE); all tables when None.
+    :param output_dir: Directory dsdgen writes its files to (default: OUTPUT_DIR).
+    :return: Dictionary with the table, child, return code and start/end timestamps.
+    """
+    command = [
+        DSDGEN_PATH,
+        "-SCALE", str(scale_factor),
+        "-FORCE",
+        "-DIR", output_dir or OUTPUT_DIR
+    ]
+    if parallelism > 1:
+        command.extend(["-PARALLEL", str(parallelism), "-CHILD", str(child)])
+    if table:
+        command.extend(["-TABLE", table])
+
+    label = f"[{table or 'all'} {child}/{parallelism}]"
+    start = time.time()
+    process = subprocess.Popen(command, cwd=TOOLS_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    for line in process.stdout:
+        if line.strip():
+            print(f"{label} {line.strip()}", flush=True)
+    process.wait()
+    end = time.time()
+    print(f"{label} finished in {end - start:.1f}s (exit code {process.returncode})", flush=True)
+    return {"table": table, "child": child, "returncode": process.returncode, "start": start, "end": end}
+
+def generate_unit(scale_factor, parallelism, child, table, version, manifest):
+    """Run one dsdgen child and record the non-empty chunk files it produced in the manifest."""
+    result = run_dsdgen_child(scale_factor, parallelism, child, table)
+    if result["returncode"] == 0:
+        produced = [os.path.join(OUTPUT_DIR, chunk_file_name(t, child, parallelism)) for t in tables_built_by(table)]
+        produced = [f for f in produced if os.path.exists(f) and os.path.getsize(f) > 0]
+        manifest.record_unit(unit_key(scale_factor, version, table, child, parallelism), scale_factor, version, table, child, parallelism, produced)
+    return result
+
+def label_chunk_files(parallelism, manifest=None):
+    """
+    Tidy up the chunk files of a parallel build.
+    Empty chunks (small tables are only built by child 1) are removed, and tables that ended up in a
+    single chunk are renamed to "<table>.dat" so every consumer sees the usual one-file-per-table layout.
+    :return: Dictionary mapping table name to its list of .dat files.
+    """
+    chunks = {}
+    for file_path in sorted(glob.glob(os.path.join(OUTPUT_DIR, f"*_*_{parallelism}.dat"))):
+        table_name, chunk = split_chunk_name(file_path)
+        if chunk is None:
+            continue
+        if os.path.getsize(file_path) == 0:
+            os.remove(file_path)
+            continue
+        chunks.setdefault(table_name, []).append(file_path)
+
+    for table_name, file_paths in chunks.items():
+        if len(file_paths) == 1:
+            labeled_path = os.path.join(OUTPUT_DIR, f"{table_name}.dat")
+            os.replace(file_paths[0], labeled_path)
+            if manifest:
+                manifest.rename_file(file_paths[0], labeled_path)
+            chunks[table_name] = [labeled_path]
+    if manifest:
+        manifest.save()
+    return chunks
+
+def table_windows(results):
+    """Return the (start, end) window of the dsdgen children that built each table in per-table mode."""
+    windows = {}
+    for result in results:
+        covered = [result["table"], CHILD_TABLES.get(result["table"])] if result["table"] else []
+        for table_name in covered:
+            if not table_name:
+                continue
+            start, end = windows.get(table_name, (result["start"], result["end"]))
+            windows[table_name] = (min(start, result["start"]), max(end, result["end"]))
+    return windows
+
+def chunk_child(file_path):
+    """dsdgen child that wrote a data file; whole-table files come from child 1, which builds the small tables."""
+    _, chunk = split_chunk_name(file_path)
+    return int(chunk.split("_")[0]) if chunk else 1
+
+def report_throughput(row_counts, chunk_counts, results, wall_start, wall_end, skipped_rows=None):
+    """
+    Print rows and rows/sec per table over the time the dsdgen children that built it ran.
+    :param row_counts: Rows generated by this run per table.
+    :param skipped_rows: Rows per table of chunks skipped because an earlier run completed them; they are reported
+                         but left out of the rates, since no dsdgen child of this run built them.
+    """
+    skipped_rows = skipped_rows or {}
+    windows = table_windows(results)
+    print(f"{'table':<25}{'chunks':>8}{'rows':>15}{'seconds':>10}{'rows/sec':>14}")
+    table_names = set(row_counts) | set(skipped_rows)
+    for table_name in sorted(table_names, key=lambda t: row_counts.get(t, 0) + skipped_rows.get(t, 0), reverse=True):
+        rows = row_counts.get(table_name, 0)
+        skipped = skipped_rows.get(table_name, 0)
+        if not rows and skipped:
+            print(f"{table_name:<25}{chunk_counts[table_name]:>8}{skipped:>15,}{'skipped':>10}")
+            continue
+        start, end = windows.get(table_name, (wall_start, wall_end))
+        elapsed = max(end - start, 1e-6)
+        note = f"  (+{skipped:,} rows skipped)" if skipped else ""
+        print(f"{table_name:<25}{chunk_counts[table_name]:>8}{rows:>15,}{elapsed:>10.1f}{rows / elapsed:>14,.0f}{note}")
+    total_rows = sum(row_counts.values())
+    total_elapsed = max(wall_end - wall_start, 1e-6)
+    total_skipped = sum(skipped_rows.values())
+    skipped_note = f"; {total_skipped:,} rows of skipped chunks not counted" if total_skipped else ""
+    print(f"Total: {total_rows:,} rows in {total_elapsed:.1f}s ({total_rows / total_elapsed:,.0f} rows/sec){skipped_note}")
+
+def generate_data_parallel(scale_factor, parallelism, tables=None, workers=None, force=False):
+    """
+    Generate TPC-DS data as dsdgen -PARALLEL/-CHILD chunks, running the children concurrently.
+    Chunks recorded as complete and unchanged in the manifest are skipped, so an interrupted run resumes.
+    :param scale_factor: Scale factor for data generation.
+    :param parallelism: Number of chunks to split each large table into.
+    :param tables: Optional list of tables to build one at a time with -TABLE; all tables when empty.
+    :param workers: Maximum number of dsdgen processes running at once (default: one per CPU).
+    :param force: Regenerate every chunk even if the manifest says it is complete.
+    """
+    workers = workers or os.cpu_count() or 1
+    manifest = ArtifactManifest()
+    version = dsdgen_version()
+    print(f"Generating TPC-DS data with scale factor {scale_factor} (dsdgen {version}) in {parallelism} chunks using {workers} workers...")
+
+    targets = tables or [None]
+    regenerated = {table_name for table in targets for table_name in tables_built_by(table)}
+    units = [(table, child) for table in targets for child in range(1, parallelism + 1)]
+    complete = set() if force else {
+        (table, child) for table, child in units
+        if manifest.unit_complete(unit_key(scale_factor, version, table, child, parallelism))
+    }
+    for table, child in sorted(complete, key=lambda unit: (unit[0] or "", unit[1])):
+        print(f"[{table or 'all'} {child}/{parallelism}] already generated and unchanged. Skipping.")
+    keep = manifest.kept_files(unit_key(scale_factor, version, table, child, parallelism) for table, child in complete)
+    remove_existing_files(regenerated, keep, manifest)
+    manifest.save()
+
+    results = []
+    wall_start = time.time()
+    # Each worker only supervises a dsdgen process, so threads are enough to keep every core busy
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(generate_unit, scale_factor, parallelism, child, table, version, manifest)
+            for table, child in units
+            if (table, child) not in complete
+        ]
+        for future in as_completed(futures):
+            results.append(future.result())
+    wall_end = time.time()
+
+    failed = [r for r in results if r["returncode"] != 0]
+    if failed:
+        for r in failed:
+            print(f"dsdgen child {r['child']}/{parallelism} for {r['table'] or 'all tables'} failed with exit code {r['returncode']}.")
+        print("Data generation failed. Re-run the same command to resume from the completed chunks.")
+        exit(1)
+
+    label_chunk_files(parallelism, manifest)
+    dat_files = [f for f in glob.glob(os.path.join(OUTPUT_DIR, "*.dat")) if table_name_from_file(f) in regenerated]
+    chunks = group_files_by_table(dat_files)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        described = {table_name: list(executor.map(manifest.describe, file_paths)) for table_name, file_paths in chunks.items()}
+    manifest.save()
+    # Rows of chunks an earlier run completed are kept apart, so resuming does not inflate the rates
+    row_counts, skipped_rows = {}, {}
+    for table_name, file_paths in chunks.items():
+        unit_table = next((table for table in targets if table is None or table_name in tables_built_by(table)), None)
+        for file_path, entry in zip(file_paths, described[table_name]):
+            counts = skipped_rows if (unit_table, chunk_child(file_path)) in complete else row_counts
+            counts[table_name] = counts.get(table_name, 0) + entry["rows"]
+    chunk_counts = {table_name: len(file_paths) for table_name, file_paths in chunks.items()}
+    report_throughput(row_counts, chunk_counts, results, wall_start, wall_end, skipped_rows)
     print(f"Data generation complete. Files are located in {OUTPUT_DIR}.")
 
 # Main execution
@@ -49,9 +268,45 @@ if __name__ == "__main__":
         required=True, 
         help="Scale factor for data generation (e.g., 1 for 1GB, 10 for 10GB)."
     )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Number of dsdgen chunks to generate concurrently (1 runs a single dsdgen process, 0 uses all cores)."
+    )
+    parser.add_argument(
+        "--tables",
+        type=str,
+        default="",
+        help="Comma-separated list of tables to generate one at a time with -TABLE (default: all tables)."
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate everything even if the manifest records the data as complete."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Maximum number of dsdgen processes running at once (default: one per CPU)."
+    )
     args = parser.parse_args()
 
     scale_factor = args.scale_factor
+    parallelism = args.parallel if args.parallel > 0 else (os.cpu_count() or 1)
+    tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+
+    unknown_tables = [t for t in tables if t not in TABLE_NAMES]
+    if unknown_tables:
+        print(f"Unknown table(s): {', '.join(unknown_tables)}")
+        exit(1)
+    if tables and parallelism < 2:
+        print("--tables requires --parallel of at least 2.")
+        exit(1)
 
     compile_dsdgen()
-    generate_data(scale_factor)
\ No newline at end of file
+    if parallelism > 1:
+        generate_data_parallel(scale_factor, parallelism, tables, args.workers, args.force)
+    else:
+        generate_data(scale_factor, args.force)
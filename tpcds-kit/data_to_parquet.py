@@ -1,62 +1,334 @@
 import os
 import glob
-import pandas as pd
+import time
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 import json
 from termcolor import colored
 import sys
+from arrow_schema import dictionary_columns, load_table_schemas
+from artifact_manifest import ArtifactManifest
+from cluster_parquet import ROW_GROUP_SIZE, TARGET_FILE_SIZE, cluster_tables
+from s3_stream import DEFAULT_MAX_BUFFERS, DEFAULT_PART_SIZE, MIN_PART_SIZE, S3StreamWriter
+from s3_sync import delete_stale, list_remote_objects
+from tpcds_files import PART_PATTERN, part_file_name, split_chunk_name
+from upload_parquet import create_s3_client
 
-# Load schema definitions
+# Load schema definitions; typed Arrow schemas are derived from tpds_schema.sql
 schema_path = os.path.join(os.path.dirname(__file__), "tpcds_schema.json")
 with open(schema_path, 'r') as f:
     TABLE_SCHEMAS = json.load(f)
+TABLE_ARROW_SCHEMAS = load_table_schemas()
 
 # Resolve paths relative to the script's location
 script_dir = os.path.dirname(__file__)
 input_dir = os.path.join(script_dir, "test_data/raw_files")
 output_dir = os.path.join(script_dir, "test_data/parquet")
 
+# Size of each block read from a stream; bounds memory per record batch
+STREAM_BLOCK_SIZE = 64 * 1024 * 1024
+
+# Fact tables large enough to be split into byte ranges converted by separate workers
+SPLIT_TABLES = ("store_sales", "catalog_sales", "web_sales", "inventory")
+RANGE_SIZE = 256 * 1024 * 1024
+
+# Recorded with every conversion in the manifest; changing them makes existing Parquet stale
+CONVERTER_SETTINGS = {"converter": "data_to_parquet", "engine": "pyarrow-stream", "schema": "tpds_schema.sql"}
+
+# S3 client of a worker process when streaming straight to object storage; created on first use
+_s3_client = None
+
 # Create the output directory if it doesn't exist
 if not os.path.exists(output_dir):
     os.makedirs(output_dir)
 
-# Get list of all .dat files in the input directory
-dat_files = glob.glob(os.path.join(input_dir, "*.dat"))
-
 def handle_error(message):
     """Handle errors by printing in red and stopping the process."""
     print(colored(f"ERROR: {message}", "red"))
     print("Please use the cleanup tool before beginning again.")
     sys.exit(1)
 
-if not dat_files:
-    print("No .dat files found in the input directory.")
-else:
+def csv_options(table_name, block_size=STREAM_BLOCK_SIZE):
+    """
+    Build pyarrow CSV options that parse a pipe-delimited TPC-DS table straight into its typed Arrow schema.
+    :return: Tuple of (read_options, parse_options, convert_options).
+    """
+    if table_name not in TABLE_ARROW_SCHEMAS:
+        raise ValueError(f"No schema found for table {table_name}")
+    schema = TABLE_ARROW_SCHEMAS[table_name]
+
+    # dsdgen terminates every row with the delimiter, which yields an empty trailing column;
+    # naming it and leaving it out of include_columns drops it without ever materializing it
+    read_options = pa_csv.ReadOptions(column_names=schema.names + ["_trailing"], encoding="latin1", block_size=block_size)
+    parse_options = pa_csv.ParseOptions(delimiter="|", quote_char=False)
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=schema.names,
+        column_types={field.name: field.type for field in schema},
+        strings_can_be_null=True
+    )
+    return read_options, parse_options, convert_options
+
+def convert_stream(source, table_name, output_file, block_size=STREAM_BLOCK_SIZE):
+    """
+    Convert a pipe-delimited TPC-DS stream to typed Parquet one record batch at a time.
+    Only one block is held in memory at a time, so peak memory does not grow with the table size.
+    :param source: Binary file-like object or path, e.g. a .dat file or a named pipe dsdgen is writing to.
+    :param table_name: TPC-DS table name used to look up the Arrow schema.
+    :param output_file: Path of the Parquet file to write, or a writable file object such as an S3StreamWriter.
+    :param block_size: Bytes read per record batch.
+    :return: Number of rows written (0 if the stream was empty and no file was written).
+    """
+    read_options, parse_options, convert_options = csv_options(table_name, block_size)
+    schema = TABLE_ARROW_SCHEMAS[table_name]
+    try:
+        reader = pa_csv.open_csv(source, read_options=read_options, parse_options=parse_options, convert_options=convert_options)
+    except pa.ArrowInvalid as e:
+        if "Empty CSV file" in str(e):
+            return 0
+        raise
+
+    rows = 0
+    # Low-cardinality char columns are dictionary-encoded; ids, names and numbers are not worth the dictionary
+    with reader, pq.ParquetWriter(output_file, schema, use_dictionary=dictionary_columns(schema)) as writer:
+        for batch in reader:
+            # The CSV reader marks every column nullable; re-apply the schema so NOT NULL columns stay required
+            writer.write_batch(pa.RecordBatch.from_arrays(batch.columns, schema=schema))
+            rows += batch.num_rows
+    return rows
+
+def byte_ranges(file_path, range_size=RANGE_SIZE):
+    """
+    Split a file into newline-aligned byte ranges of roughly range_size bytes each.
+    Every boundary is moved forward to just past the next newline, so no row is split between ranges.
+    :return: List of (start, end) offsets covering the whole file.
+    """
+    file_size = os.path.getsize(file_path)
+    boundaries = [0]
+    with open(file_path, "rb") as f:
+        while boundaries[-1] + range_size < file_size:
+            f.seek(boundaries[-1] + range_size)
+            f.readline()
+            if f.tell() >= file_size:
+                break
+            boundaries.append(f.tell())
+    boundaries.append(file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def plan_conversions(dat_files, range_size=RANGE_SIZE):
+    """
+    Build the list of conversion tasks: one per file, or one per byte range for large fact-table files.
+    Tasks are ordered largest first so the biggest table starts immediately and bounds the wall clock.
+    :return: List of task dictionaries with source, table, part, output, start, end and bytes.
+    """
+    tasks = []
     for file_path in dat_files:
-        try:
-            # Read the .dat file; TPC-DS files are pipe-delimited with no header
-            df = pd.read_csv(file_path, sep="|", header=None, encoding="latin1", engine="python")
-
-            # Sometimes the .dat files have a trailing empty column due to the delimiter at the end
-            if df.columns[-1] == df.columns[-1] and df[df.columns[-1]].isnull().all():
-                df = df.iloc[:, :-1]
-
-            # Get table name from file name (remove .dat extension)
-            table_name = os.path.splitext(os.path.basename(file_path))[0]
-
-            # Apply schema if available
-            if table_name in TABLE_SCHEMAS:
-                expected_columns = TABLE_SCHEMAS[table_name]["columns"]
-                if len(df.columns) == len(expected_columns):
-                    df.columns = expected_columns
-                    print(f"Applied schema for table {table_name}")
-                else:
-                    print(f"Warning: Column count mismatch for {table_name}. Expected {len(expected_columns)}, got {len(df.columns)}")
+        table_name, chunk = split_chunk_name(file_path)
+        output_name = f"{table_name}_{chunk}" if chunk else table_name
+        ranges = byte_ranges(file_path, range_size) if table_name in SPLIT_TABLES else []
+        if len(ranges) > 1:
+            for part, (start, end) in enumerate(ranges, 1):
+                output_file = os.path.join(output_dir, part_file_name(output_name, part))
+                tasks.append({"source": file_path, "table": table_name, "part": part, "output": output_file, "start": start, "end": end})
+        else:
+            output_file = os.path.join(output_dir, f"{output_name}.parquet")
+            tasks.append({"source": file_path, "table": table_name, "part": None, "output": output_file, "start": 0, "end": os.path.getsize(file_path)})
+    for task in tasks:
+        task["bytes"] = task["end"] - task["start"]
+    return sorted(tasks, key=lambda task: task["bytes"], reverse=True)
+
+def task_settings(task):
+    """Converter settings recorded for a task; byte-range parts also record their range."""
+    if task["part"] is None:
+        return CONVERTER_SETTINGS
+    return dict(CONVERTER_SETTINGS, range=[task["start"], task["end"]])
+
+def s3_key(task, s3_folder):
+    """S3 key of a task's output, the same "folder/table/file.parquet" key upload_parquet.py uploads it to."""
+    return f"{s3_folder}/{task['table']}/{os.path.basename(task['output'])}"
+
+def stream_to_s3(data, task, block_size, s3_target):
+    """
+    Convert one task straight into an S3 multipart upload, without writing the Parquet file to local disk.
+    An empty source or a failed conversion aborts the upload, so no object is left behind.
+    :return: Tuple of (rows, seconds the converter was stalled waiting for uploads).
+    """
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = create_s3_client(s3_target["max_buffers"] + 2)
+    sink = S3StreamWriter(_s3_client, s3_target["bucket"], s3_key(task, s3_target["folder"]), s3_target["part_size"], s3_target["max_buffers"])
+    try:
+        rows = convert_stream(data, task["table"], sink, block_size)
+    except BaseException:
+        sink.abort()
+        raise
+    if rows:
+        sink.close()
+    else:
+        sink.abort()
+    return rows, sink.stalled_seconds
+
+def convert_file(task, block_size=STREAM_BLOCK_SIZE, s3_target=None):
+    """
+    Convert one task (a whole .dat file or one byte range of it) to Parquet with the streaming reader.
+    Runs in a worker process; the range is read through a memory map, so nothing is copied up front.
+    :param s3_target: Optional dictionary with bucket, folder, part_size and max_buffers; when given the Parquet
+                      output is streamed to S3 instead of written to the parquet directory.
+    :return: Dictionary with the table, rows, MB read and seconds taken.
+    """
+    start = time.time()
+    stalled = None
+    with pa.memory_map(task["source"]) as source:
+        data = pa.BufferReader(source.read_at(task["bytes"], task["start"]))
+        if s3_target:
+            rows, stalled = stream_to_s3(data, task, block_size, s3_target)
+        else:
+            rows = convert_stream(data, task["table"], task["output"], block_size)
+    elapsed = max(time.time() - start, 1e-6)
+    size_mb = task["bytes"] / (1024 * 1024)
+
+    label = task["source"] if task["part"] is None else f"{task['source']} [{task['start']:,}-{task['end']:,}]"
+    target = f"s3://{s3_target['bucket']}/{s3_key(task, s3_target['folder'])}" if s3_target else task["output"]
+    detail = f", {stalled:.1f}s waiting for uploads" if stalled else ""
+    if rows:
+        print(f"Successfully converted {label} to {target} ({rows:,} rows, {size_mb:,.1f} MB in {elapsed:.1f}s, {size_mb / elapsed:,.1f} MB/s{detail})", flush=True)
+    else:
+        print(f"Warning: {label} is empty; no Parquet file written", flush=True)
+    return {"table": task["table"], "rows": rows, "mb": size_mb, "seconds": elapsed}
+
+def remove_stale_outputs(tasks, manifest):
+    """Delete Parquet files left by an earlier run of the same sources with a different range split."""
+    planned = {os.path.abspath(task["output"]) for task in tasks}
+    names = {os.path.splitext(os.path.basename(task["source"]))[0] for task in tasks}
+    for file_name in os.listdir(output_dir):
+        stem = os.path.splitext(file_name)[0]
+        part = PART_PATTERN.match(stem)
+        file_path = os.path.join(output_dir, file_name)
+        if file_name.endswith(".parquet") and (part.group("stem") if part else stem) in names and os.path.abspath(file_path) not in planned:
+            os.remove(file_path)
+            manifest.forget(file_path)
+    manifest.save()
+
+def remove_stale_objects(s3, s3_target, tasks):
+    """Delete objects under the streamed tables' prefixes that this run did not write, e.g. parts of an earlier range split."""
+    planned = {s3_key(task, s3_target["folder"]) for task in tasks}
+    stale_keys = []
+    for table_name in sorted({task["table"] for task in tasks}):
+        remote = list_remote_objects(s3, s3_target["bucket"], f"{s3_target['folder']}/{table_name}/")
+        stale_keys.extend(key for key in sorted(remote) if key not in planned)
+    if stale_keys:
+        delete_stale(s3, s3_target["bucket"], stale_keys, {})
+
+def report_tables(stats):
+    """Print rows and MB/s per table, combining the chunks of parallel-generated tables."""
+    tables = {}
+    for stat in stats:
+        total = tables.setdefault(stat["table"], {"files": 0, "rows": 0, "mb": 0.0, "seconds": 0.0})
+        total["files"] += 1
+        total["rows"] += stat["rows"]
+        total["mb"] += stat["mb"]
+        total["seconds"] += stat["seconds"]
+    if not tables:
+        return
+    print(f"{'table':<25}{'files':>7}{'rows':>15}{'MB':>12}{'seconds':>10}{'MB/s':>10}")
+    for table_name, total in sorted(tables.items(), key=lambda item: item[1]["mb"], reverse=True):
+        print(f"{table_name:<25}{total['files']:>7}{total['rows']:>15,}{total['mb']:>12,.1f}{total['seconds']:>10.1f}{total['mb'] / max(total['seconds'], 1e-6):>10,.1f}")
+
+def main(force=False, block_size=STREAM_BLOCK_SIZE, workers=None, range_size=RANGE_SIZE, cluster=False,
+         target_file_size=TARGET_FILE_SIZE, row_group_size=ROW_GROUP_SIZE, to_s3=False,
+         part_size=DEFAULT_PART_SIZE, max_buffers=DEFAULT_MAX_BUFFERS):
+    # Get list of all .dat files in the input directory
+    dat_files = glob.glob(os.path.join(input_dir, "*.dat"))
+
+    if not dat_files:
+        print("No .dat files found in the input directory.")
+        return
+
+    workers = workers or os.cpu_count() or 1
+    manifest = ArtifactManifest()
+    tasks = plan_conversions(dat_files, range_size)
+
+    # Streaming to S3 leaves no local Parquet to compare with the manifest, so every task is converted
+    s3_target = None
+    if to_s3:
+        s3 = create_s3_client()
+        if not s3:
+            sys.exit(1)
+        s3_target = {"bucket": os.environ.get("S3_BUCKET_NAME"), "folder": os.environ.get("S3_FOLDER_NAME"),
+                     "part_size": part_size, "max_buffers": max_buffers}
+        pending = tasks
+        print(f"Streaming Parquet to s3://{s3_target['bucket']}/{s3_target['folder']} in {part_size // (1024 * 1024)} MB parts "
+              f"(up to {max_buffers} buffered per file, ~{workers * (max_buffers + 1) * part_size // (1024 * 1024):,} MB across workers)")
+    else:
+        remove_stale_outputs(tasks, manifest)
+
+        # Skip work whose Parquet output is current; the manifest is only touched by this process
+        pending = []
+        for task in tasks:
+            if not force and manifest.conversion_current(task["source"], task["output"], task_settings(task)):
+                print(f"Skipping {task['output']}: built from the current {task['source']}")
             else:
-                print(f"Warning: No schema found for table {table_name}")
-
-            # Write DataFrame to Parquet using pyarrow
-            output_file = os.path.join(output_dir, f"{table_name}.parquet")
-            df.to_parquet(output_file, engine="pyarrow", index=False)
-            print(f"Successfully converted {file_path} to {output_file}")
-        except Exception as e:
-            handle_error(f"Failed to process {file_path}: {e}")
\ No newline at end of file
+                pending.append(task)
+    print(f"Converting {len(pending)} file(s) and byte range(s) with {workers} worker processes...")
+
+    stats = []
+    wall_start = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(convert_file, task, block_size, s3_target): task for task in pending}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                stat = future.result()
+            except Exception as e:
+                executor.shutdown(cancel_futures=True)
+                handle_error(f"Failed to process {task['source']}: {e}")
+            if stat["rows"] and not to_s3:
+                manifest.record_conversion(task["source"], task["output"], task_settings(task), stat["rows"])
+            stats.append(stat)
+    wall_seconds = max(time.time() - wall_start, 1e-6)
+
+    report_tables(stats)
+    total_mb = sum(stat["mb"] for stat in stats)
+    if stats:
+        print(f"Converted {total_mb:,.1f} MB in {wall_seconds:.1f}s wall clock ({total_mb / wall_seconds:,.1f} MB/s across {workers} workers)")
+
+    if to_s3:
+        remove_stale_objects(s3, s3_target, tasks)
+        return
+
+    # A table directory holds clustered (or Spark) output; it is stale once the table's flat files are rebuilt
+    converted_tables = {task["table"] for task in pending}
+    if cluster:
+        tables = {task["table"] for task in tasks if task["table"] in converted_tables or not os.path.isdir(os.path.join(output_dir, task["table"]))}
+        if tables:
+            cluster_tables(tables, target_file_size, row_group_size, workers)
+    else:
+        for table_name in converted_tables:
+            shutil.rmtree(os.path.join(output_dir, table_name), ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert TPC-DS .dat files to Parquet")
+    parser.add_argument("--force", action="store_true", help="Reconvert every file even if its Parquet output is current")
+    parser.add_argument("--workers", type=int, default=None, help="Number of conversion processes (default: one per CPU)")
+    parser.add_argument("--range_size", type=int, default=RANGE_SIZE // (1024 * 1024), help="MB per byte range when splitting large fact-table files across workers (default: 256)")
+    parser.add_argument("--cluster", action="store_true", help="Also write Hive-partitioned, sorted Parquet for the partitioned tables in iceberg-kit/tables.json")
+    parser.add_argument("--target_file_mb", type=int, default=TARGET_FILE_SIZE // (1024 * 1024), help="Approximate size of each clustered file in MB (default: 256)")
+    parser.add_argument("--row_group_mb", type=int, default=ROW_GROUP_SIZE // (1024 * 1024), help="Approximate size of each clustered row group in MB (default: 128)")
+    parser.add_argument("--to_s3", action="store_true", help="Stream the Parquet output straight into S3 multipart uploads instead of writing it to test_data/parquet")
+    parser.add_argument("--part_mb", type=int, default=DEFAULT_PART_SIZE // (1024 * 1024), help="Multipart part size in MB with --to_s3 (default: 64, minimum 5)")
+    parser.add_argument("--max_buffers", type=int, default=DEFAULT_MAX_BUFFERS, help="Parts buffered or uploading at once per file with --to_s3; conversion waits when they are all busy (default: 4)")
+    parser.add_argument("--block_size", type=int, default=STREAM_BLOCK_SIZE // (1024 * 1024), help="MB read per record batch; bounds peak memory per conversion (default: 64)")
+    args = parser.parse_args()
+
+    if args.to_s3 and args.cluster:
+        print("--cluster needs the flat Parquet files on local disk and cannot be combined with --to_s3.")
+        sys.exit(1)
+    if args.to_s3 and args.part_mb * 1024 * 1024 < MIN_PART_SIZE:
+        print(f"--part_mb must be at least {MIN_PART_SIZE // (1024 * 1024)}.")
+        sys.exit(1)
+    main(args.force, args.block_size * 1024 * 1024, args.workers, args.range_size * 1024 * 1024, args.cluster,
+         args.target_file_mb * 1024 * 1024, args.row_group_mb * 1024 * 1024, args.to_s3,
+         args.part_mb * 1024 * 1024, args.max_buffers)
@@ -0,0 +1,261 @@
+import os
+import sys
+import time
+import argparse
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from termcolor import colored
+from pyiceberg.catalog.sql import SqlCatalog
+from pyiceberg.exceptions import NamespaceAlreadyExistsError, NoSuchTableError
+from pyiceberg.partitioning import PartitionField, PartitionSpec
+from pyiceberg.schema import Schema
+from pyiceberg.table.sorting import SortField, SortOrder
+from pyiceberg.transforms import IdentityTransform
+from pyiceberg.types import DateType, DecimalType, IntegerType, LongType, NestedField, StringType, TimeType
+from arrow_schema import load_table_schemas
+from cluster_parquet import cluster_table, load_cluster_keys
+from tpcds_files import group_files_by_table
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Resolve paths relative to the script's location
+script_dir = os.path.dirname(__file__)
+parquet_dir = os.path.join(script_dir, "test_data/parquet")
+# Local SQLite catalog; Dremio does not read it, it finds the tables through the metadata pointer next to them
+CATALOG_PATH = os.path.join(script_dir, "test_data", "iceberg_catalog.db")
+NAMESPACE = "tpcds"
+
+# Rows appended at a time; bounds memory and keeps the number of snapshots small
+APPEND_ROWS = 5_000_000
+
+TABLE_ARROW_SCHEMAS = load_table_schemas()
+
+def handle_error(message):
+    """Handle errors by printing in red and stopping the process."""
+    print(colored(f"ERROR: {message}", "red"))
+    print("Please use the cleanup tool before beginning again.")
+    sys.exit(1)
+
+def default_warehouse():
+    """The Iceberg bucket and folder Dremio's CTAS writes to, e.g. s3://iceberg/sample."""
+    bucket = os.getenv("ICEBERG_BUCKET_NAME")
+    folder = os.getenv("ICEBERG_FOLDER_NAME")
+    if not bucket or not folder:
+        return None
+    return f"s3://{bucket}/{folder}"
+
+def load_catalog(warehouse):
+    """Open (or create) the local SQL catalog, with S3 credentials for the warehouse from the .env file."""
+    os.makedirs(os.path.dirname(CATALOG_PATH), exist_ok=True)
+    properties = {"uri": f"sqlite:///{CATALOG_PATH}", "warehouse": warehouse}
+    if warehouse.startswith("s3://"):
+        properties.update({
+            "s3.endpoint": os.getenv("S3_ENDPOINT_URL"),
+            "s3.access-key-id": os.getenv("S3_ACCESS_KEY"),
+            "s3.secret-access-key": os.getenv("S3_SECRET_KEY"),
+            "s3.path-style-access": "true",
+        })
+    catalog = SqlCatalog("tpcds", **properties)
+    try:
+        catalog.create_namespace(NAMESPACE)
+    except NamespaceAlreadyExistsError:
+        pass
+    return catalog
+
+def iceberg_type(arrow_field_type):
+    """Map an Arrow type from arrow_schema to the matching Iceberg type."""
+    if pa.types.is_int32(arrow_field_type):
+        return IntegerType()
+    if pa.types.is_int64(arrow_field_type):
+        return LongType()
+    if pa.types.is_decimal(arrow_field_type):
+        return DecimalType(arrow_field_type.precision, arrow_field_type.scale)
+    if pa.types.is_date(arrow_field_type):
+        return DateType()
+    if pa.types.is_time(arrow_field_type):
+        return TimeType()
+    return StringType()
+
+def iceberg_schema(table_name):
+    """Iceberg schema of a table with field ids assigned by column position, starting at 1."""
+    return Schema(*[
+        NestedField(field_id=position, name=field.name, field_type=iceberg_type(field.type), required=not field.nullable)
+        for position, field in enumerate(TABLE_ARROW_SCHEMAS[table_name], 1)
+    ])
+
+def table_layout(schema, cluster_key):
+    """
+    Partition spec and sort order matching the Dremio CTAS in deploy_tables.py:
+    PARTITION BY (partition_by) LOCALSORT BY (localsort_by), or unpartitioned and unsorted.
+    """
+    if not cluster_key:
+        return PartitionSpec(), SortOrder()
+    partition_column, sort_column = cluster_key
+    partition_spec = PartitionSpec(PartitionField(
+        source_id=schema.find_field(partition_column).field_id, field_id=1000,
+        transform=IdentityTransform(), name=partition_column
+    ))
+    sort_order = SortOrder(SortField(source_id=schema.find_field(sort_column).field_id, transform=IdentityTransform()))
+    return partition_spec, sort_order
+
+def publish_version_hint(table):
+    """
+    Write v<N>.metadata.json and version-hint.text next to the table's metadata, the layout Dremio reads
+    when it promotes an Iceberg folder in an S3 source.
+    """
+    metadata_dir = f"{table.location()}/metadata"
+    with table.io.new_input(table.metadata_location).open() as f:
+        metadata = f.read()
+    version = len(table.metadata.metadata_log) + 1
+    with table.io.new_output(f"{metadata_dir}/v{version}.metadata.json").create(overwrite=True) as f:
+        f.write(metadata)
+    with table.io.new_output(f"{metadata_dir}/version-hint.text").create(overwrite=True) as f:
+        f.write(str(version).encode())
+
+def purge_table(catalog, identifier):
+    """
+    Drop a table written by an earlier run together with its data, manifest and metadata files, so re-creating it at
+    the same location does not leave the old files behind. The copies publish_version_hint made are deleted as well.
+    """
+    try:
+        table = catalog.load_table(identifier)
+    except NoSuchTableError:
+        return
+    metadata_dir = f"{table.location()}/metadata"
+    published = [f"{metadata_dir}/v{len(table.metadata.metadata_log) + 1}.metadata.json", f"{metadata_dir}/version-hint.text"]
+    catalog.purge_table(identifier)
+    for path in published:
+        try:
+            table.io.delete(path)
+        except FileNotFoundError:
+            pass
+
+def iter_chunks(file_paths, arrow_schema, chunk_rows=APPEND_ROWS):
+    """
+    Yield the rows of Parquet files, in order, as tables of at least chunk_rows rows (the last one may be smaller).
+    Chunks are combined into contiguous arrays; pyiceberg slices them per partition, which is slow on many small chunks.
+    """
+    batches, buffered = [], 0
+    for file_path in file_paths:
+        for batch in pq.ParquetFile(file_path).iter_batches():
+            batches.append(batch.select(arrow_schema.names))
+            buffered += batch.num_rows
+            if buffered >= chunk_rows:
+                yield pa.Table.from_batches(batches).cast(arrow_schema).combine_chunks()
+                batches, buffered = [], 0
+    if batches:
+        yield pa.Table.from_batches(batches).cast(arrow_schema).combine_chunks()
+
+def directory_files(directory):
+    """Parquet files under a directory, in path order."""
+    return [
+        os.path.join(root, f)
+        for root, _, files in sorted(os.walk(directory))
+        for f in sorted(files) if f.endswith(".parquet")
+    ]
+
+def table_files():
+    """
+    Parquet files per table: a table directory (Spark or clustered output) replaces the table's flat files,
+    and directories starting with "_" are work in progress and skipped.
+    :return: Dictionary of table name to a list of file paths.
+    """
+    tables = {
+        entry: directory_files(os.path.join(parquet_dir, entry))
+        for entry in sorted(os.listdir(parquet_dir))
+        if os.path.isdir(os.path.join(parquet_dir, entry)) and not entry.startswith("_")
+    }
+    flat_files = [
+        os.path.join(parquet_dir, f) for f in sorted(os.listdir(parquet_dir))
+        if f.endswith(".parquet")
+    ]
+    for table_name, file_paths in group_files_by_table(flat_files).items():
+        tables.setdefault(table_name, file_paths)
+    return {table_name: file_paths for table_name, file_paths in tables.items() if file_paths}
+
+def is_clustered(table_dir, partition_column):
+    """
+    Whether a table directory holds cluster_parquet.py output: only <partition_column>=<value> directories.
+    Spark writes its part files straight into the table directory, unsorted, so that does not count.
+    """
+    if not os.path.isdir(table_dir):
+        return False
+    entries = [entry for entry in os.listdir(table_dir) if not entry.startswith(("_", "."))]
+    return bool(entries) and all(
+        entry.startswith(f"{partition_column}=") and os.path.isdir(os.path.join(table_dir, entry))
+        for entry in entries
+    )
+
+def clustered_files(table_name, file_paths, cluster_key):
+    """
+    Files of a partitioned table in partition order, each sorted by the sort key, as written by cluster_parquet.py.
+    The table is clustered first if it has no clustered output yet; Spark output in the table directory is
+    re-clustered in place. Appending in this order means every append touches only a few partitions, so
+    pyiceberg writes about one file per partition instead of one per append.
+    """
+    table_dir = os.path.join(parquet_dir, table_name)
+    if not is_clustered(table_dir, cluster_key[0]):
+        # cluster_table stages every input row before it replaces the table directory
+        cluster_table(table_name, file_paths, *cluster_key)
+    return directory_files(table_dir)
+
+def write_table(catalog, table_name, file_paths, cluster_key=None, chunk_rows=APPEND_ROWS):
+    """
+    Write one converted table into an Iceberg table, replacing its previous contents.
+    Partitioned tables are read from their clustered layout, so the data files pyiceberg writes per partition
+    are sorted the way Dremio's LOCALSORT would leave them. All appends are one transaction.
+    :return: Number of rows written.
+    """
+    schema = iceberg_schema(table_name)
+    partition_spec, sort_order = table_layout(schema, cluster_key)
+    identifier = (NAMESPACE, table_name)
+    purge_table(catalog, identifier)
+    location = f"{catalog.properties['warehouse'].rstrip('/')}/{table_name}"
+    table = catalog.create_table(identifier, schema=schema, location=location, partition_spec=partition_spec, sort_order=sort_order)
+
+    start = time.time()
+    rows = 0
+    source_files = clustered_files(table_name, file_paths, cluster_key) if cluster_key else file_paths
+    with table.transaction() as transaction:
+        for chunk in iter_chunks(source_files, schema.as_arrow(), chunk_rows):
+            transaction.append(chunk)
+            rows += chunk.num_rows
+    table = catalog.load_table(identifier)
+    publish_version_hint(table)
+    layout = f"partitioned by {cluster_key[0]}, sorted by {cluster_key[1]}" if cluster_key else "unpartitioned"
+    print(f"Wrote {rows:,} rows to Iceberg table {location} ({layout}) in {time.time() - start:.1f}s")
+    return rows
+
+def main(warehouse, tables=None, chunk_rows=APPEND_ROWS):
+    sources = table_files()
+    if not sources:
+        print("No .parquet files found in 'test_data/parquet'. Run the converter first.")
+        return
+
+    catalog = load_catalog(warehouse)
+    cluster_keys = load_cluster_keys()
+    for table_name, file_paths in sorted(sources.items()):
+        if tables and table_name not in tables:
+            continue
+        if table_name not in TABLE_ARROW_SCHEMAS:
+            print(f"Warning: No schema found for table {table_name}; skipping")
+            continue
+        try:
+            write_table(catalog, table_name, file_paths, cluster_keys.get(table_name), chunk_rows)
+        except Exception as e:
+            handle_error(f"Failed to write Iceberg table {table_name}: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the converted TPC-DS Parquet files straight into Iceberg tables")
+    parser.add_argument("--warehouse", type=str, default=default_warehouse(), help="Warehouse path the tables are created under (default: s3://ICEBERG_BUCKET_NAME/ICEBERG_FOLDER_NAME)")
+    parser.add_argument("--tables", type=str, default="", help="Comma-separated list of tables to write (default: all converted tables)")
+    parser.add_argument("--chunk_rows", type=int, default=APPEND_ROWS, help="Rows appended at a time (default: 5,000,000)")
+    args = parser.parse_args()
+
+    if not args.warehouse:
+        print("ICEBERG_BUCKET_NAME and ICEBERG_FOLDER_NAME must be set in the .env file, or pass --warehouse.")
+        sys.exit(1)
+    tables = {t.strip() for t in args.tables.split(",") if t.strip()}
+    main(args.warehouse, tables or None, args.chunk_rows)
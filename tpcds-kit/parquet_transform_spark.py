@@ -5,18 +5,29 @@ from pyspark.sql import SparkSession
 from pyspark.sql.utils import AnalysisException
 from termcolor import colored
 import sys
-from pyspark.sql.functions import monotonically_increasing_id, expr
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pyspark.sql.types import DateType, DecimalType, IntegerType, LongType, StringType, StructField, StructType
+import pyarrow as pa
+from arrow_schema import dictionary_columns, load_table_schemas
+from tpcds_files import group_files_by_table
 
 # Load schema definitions
 schema_path = os.path.join(os.path.dirname(__file__), "tpcds_schema.json")
 with open(schema_path, 'r') as f:
     TABLE_SCHEMAS = json.load(f)
+TABLE_ARROW_SCHEMAS = load_table_schemas()
 
 # Resolve paths relative to the script's location
 script_dir = os.path.dirname(__file__)
 input_dir = os.path.join(script_dir, "test_data/raw_files")
 output_dir = os.path.join(script_dir, "test_data/parquet")
 
+# Size of each Parquet file Spark writes, and the typical size of typed, snappy Parquet relative to the .dat text
+TARGET_FILE_SIZE = 256 * 1024 * 1024
+TEXT_TO_PARQUET_RATIO = 0.4
+
 # Create the output directory if it doesn't exist
 if not os.path.exists(output_dir):
     os.makedirs(output_dir)
@@ -27,63 +38,177 @@ def handle_error(message):
     print("Please use the cleanup tool before beginning again.")
     sys.exit(1)
 
-def calculate_partitions(file_path, base_partition_size=128 * 1024 * 1024):
+def split_size(target_file_size=TARGET_FILE_SIZE, text_ratio=TEXT_TO_PARQUET_RATIO):
+    """
+    Input split size that makes each read task write one Parquet file of about target_file_size bytes.
+    Spark writes one file per task, so sizing the splits sizes the files without a shuffle or a synthetic key.
+    :param target_file_size: Target size of each output file in bytes.
+    :param text_ratio: Expected Parquet bytes per byte of pipe-delimited text.
+    :return: Value for spark.sql.files.maxPartitionBytes in bytes.
+    """
+    return int(target_file_size / text_ratio)
+
+class StageTimer:
+    """
+    Polls the Spark status tracker and records when each stage of each table's job group was first seen running
+    and when all of its tasks had completed. Times are accurate to the polling interval.
+    """
+
+    def __init__(self, spark_context, interval=0.5):
+        self.spark_context = spark_context
+        self.interval = interval
+        self.groups = set()
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def track(self, group):
+        with self.lock:
+            self.groups.add(group)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.poll()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.poll()
+
+    def poll(self):
+        tracker = self.spark_context.statusTracker()
+        now = time.time()
+        with self.lock:
+            groups = list(self.groups)
+        for group in groups:
+            for job_id in tracker.getJobIdsForGroup(group):
+                job = tracker.getJobInfo(job_id)
+                if not job:
+                    continue
+                for stage_id in job.stageIds:
+                    stage = tracker.getStageInfo(stage_id)
+                    with self.lock:
+                        record = self.stages.get(stage_id)
+                        if stage is None:
+                            # Finished stages eventually drop out of the tracker
+                            if record and record["end"] is None:
+                                record["end"] = now
+                            continue
+                        if record is None and stage.numActiveTasks + stage.numCompletedTasks == 0:
+                            continue
+                        if record is None:
+                            record = self.stages[stage_id] = {"group": group, "job": job_id, "name": stage.name, "start": now, "end": None}
+                        record["tasks"] = stage.numTasks
+                        record["failed"] = stage.numFailedTasks
+                        if record["end"] is None and stage.numCompletedTasks >= stage.numTasks and stage.numActiveTasks == 0:
+                            record["end"] = now
+
+    def report(self, group):
+        """Print the stages of one job group with their task counts and durations."""
+        with self.lock:
+            stages = sorted((stage_id, r) for stage_id, r in self.stages.items() if r["group"] == group)
+        for stage_id, record in stages:
+            duration = (record["end"] or time.time()) - record["start"]
+            failed = f", {record['failed']} failed" if record.get("failed") else ""
+            print(f"  [{group}] job {record['job']} stage {stage_id} {record['name']}: {record.get('tasks', 0)} tasks{failed}, {duration:.1f}s")
+
+def spark_type(arrow_field_type):
+    """Map an Arrow type from arrow_schema to the matching Spark SQL type (Spark has no time type, so times stay strings)."""
+    if pa.types.is_int32(arrow_field_type):
+        return IntegerType()
+    if pa.types.is_int64(arrow_field_type):
+        return LongType()
+    if pa.types.is_decimal(arrow_field_type):
+        return DecimalType(arrow_field_type.precision, arrow_field_type.scale)
+    if pa.types.is_date(arrow_field_type):
+        return DateType()
+    return StringType()
+
+def spark_schema(table_name):
     """
-    Calculate the number of partitions based on file size.
-    :param file_path: Path to the file.
-    :param base_partition_size: Target size of each partition in bytes (default: 128MB).
-    :return: Number of partitions.
+    Build the Spark schema used to parse a table's .dat files.
+    A trailing string column absorbs the empty field after the final delimiter of every row.
     """
-    file_size = os.path.getsize(file_path)
-    return max(1, file_size // base_partition_size)
+    fields = [
+        StructField(field.name, spark_type(field.type), nullable=field.nullable)
+        for field in TABLE_ARROW_SCHEMAS[table_name]
+    ]
+    return StructType(fields + [StructField("_trailing", StringType(), nullable=True)])
 
-def process_file(spark, file_path):
-    """Process a single .dat file and convert it to Parquet."""
+def process_table(spark, table_name, file_paths, timer=None):
+    """
+    Convert the .dat file(s) of one table (a whole file or parallel chunks) to Parquet in parquet/<table>/.
+    Runs in its own thread with its own Spark job group, so several tables are converted at once.
+    :return: Dictionary with the table, MB read and seconds taken.
+    """
+    file_path = ", ".join(os.path.basename(p) for p in file_paths)
+    spark.sparkContext.setJobGroup(table_name, f"Convert {table_name} to Parquet")
+    # Jobs of one pool run FIFO, so each table gets its own pool for the FAIR scheduler to share the executors between.
+    # Pools missing from an allocation file are created with equal weight; the property is per thread (pinned threads)
+    spark.sparkContext.setLocalProperty("spark.scheduler.pool", table_name)
+    if timer:
+        timer.track(table_name)
+    start = time.time()
     try:
-        # Read the .dat file; TPC-DS files are pipe-delimited with no header
-        df = spark.read.csv(file_path, sep="|", header=False)
-
-        # Get table name from file name (remove .dat extension)
-        table_name = os.path.splitext(os.path.basename(file_path))[0]
-
-        # Apply schema if available
-        if table_name in TABLE_SCHEMAS:
-            expected_columns = TABLE_SCHEMAS[table_name]["columns"]
-            if len(df.columns) == len(expected_columns):
-                df = df.toDF(*expected_columns)
-                print(f"Applied schema for table {table_name}")
-            else:
-                print(f"Warning: Column count mismatch for {table_name}. Expected {len(expected_columns)}, got {len(df.columns)}")
-        else:
-            print(f"Warning: No schema found for table {table_name}")
-
-        # Calculate the number of partitions based on file size
-        num_partitions = calculate_partitions(file_path)
-
-        # Add a partitioning column (e.g., partition_key) based on row index
-        df = df.withColumn("partition_key", expr(f"monotonically_increasing_id() % {num_partitions}"))
-
-        # repartition
-        df = df.repartition(num_partitions)
-        # also is recommended to increase the global JAVA memory heap allocation an system wide:
-        # export _JAVA_OPTIONS="-Xmx500g"
-
-        # Write DataFrame to Parquet with partitioning
-        output_folder = os.path.join(output_dir, table_name)  # Remove .parquet from folder name
-        df.write.mode("overwrite").partitionBy("partition_key").parquet(output_folder)
-
-        # Remove the partitioning column after writing
-        df = df.drop("partition_key")
-
-        print(f"Successfully converted {file_path} to {output_folder} with {num_partitions} partitions")
+        # Read the .dat files; TPC-DS files are pipe-delimited with no header.
+        # Parsing with the typed schema avoids an inference pass and writes real integer, decimal and date columns
+        if table_name not in TABLE_ARROW_SCHEMAS:
+            handle_error(f"No schema found for table {table_name}")
+        df = spark.read.csv(file_paths, sep="|", header=False, schema=spark_schema(table_name), encoding="latin1").drop("_trailing")
+
+        # Write DataFrame to Parquet; each input split (sized by spark.sql.files.maxPartitionBytes) becomes one file
+        output_folder = os.path.join(output_dir, table_name)
+        # Dictionary-encode only the low-cardinality char columns, as data_to_parquet does
+        writer = df.write.mode("overwrite").option("parquet.enable.dictionary", "false")
+        for column in dictionary_columns(TABLE_ARROW_SCHEMAS[table_name]):
+            writer = writer.option(f"parquet.enable.dictionary#{column}", "true")
+        writer.parquet(output_folder)
+
+        elapsed = time.time() - start
+        files = [f for f in os.listdir(output_folder) if f.endswith(".parquet")]
+        size_mb = sum(os.path.getsize(p) for p in file_paths) / (1024 * 1024)
+        print(f"Successfully converted {file_path} to {output_folder} ({len(files)} files, {size_mb:,.1f} MB in {elapsed:.1f}s, {size_mb / max(elapsed, 1e-6):,.1f} MB/s)")
+        return {"table": table_name, "mb": size_mb, "seconds": elapsed}
     except AnalysisException as e:
         handle_error(f"Failed to process {file_path} due to schema mismatch: {e}")
     except Exception as e:
         handle_error(f"Failed to process {file_path}: {e}")
 
+def convert_tables(spark, dat_files, parallel_tables):
+    """
+    Convert every table with a pool of threads, each submitting its own Spark jobs, largest table first.
+    Each table runs in its own scheduler pool, which Spark's FAIR scheduler shares the executors between.
+    """
+    tables = sorted(
+        group_files_by_table(dat_files).items(),
+        key=lambda item: sum(os.path.getsize(p) for p in item[1]),
+        reverse=True
+    )
+    timer = StageTimer(spark.sparkContext)
+    timer.start()
+    wall_start = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=parallel_tables) as executor:
+            futures = {executor.submit(process_table, spark, table_name, file_paths, timer): table_name for table_name, file_paths in tables}
+            for future in as_completed(futures):
+                future.result()
+    finally:
+        timer.stop()
+
+    print(f"Converted {len(tables)} tables in {time.time() - wall_start:.1f}s wall clock with {parallel_tables} concurrent tables")
+    print("Stage timings from the Spark status tracker:")
+    for table_name, _ in tables:
+        timer.report(table_name)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Parquet transform")
-    parser.add_argument("--custom_dir", required=False, type=str, help="Directory for temporary files location, instead of default /tmp directory")
+    parser.add_argument("--custom_dir", required=False, type=str, default="", help="Directory for temporary files location, instead of default /tmp directory")
+    parser.add_argument("--parallel_tables", type=int, default=4, help="Number of tables converted concurrently as separate Spark jobs (default: 4)")
+    parser.add_argument("--target_file_mb", type=int, default=TARGET_FILE_SIZE // (1024 * 1024), help="Approximate size of each Parquet file in MB (default: 256)")
     args = parser.parse_args()
 
     # Initialize Spark session
@@ -91,6 +216,8 @@ if __name__ == "__main__":
         .config("spark.driver.memory", "8g") \
         .config("spark.executor.memory", "8g") \
         .config("spark.executor.memoryOverhead", "2g") \
+        .config("spark.scheduler.mode", "FAIR") \
+        .config("spark.sql.files.maxPartitionBytes", str(split_size(args.target_file_mb * 1024 * 1024))) \
         .appName("TPC-DS Parquet Transformer") \
         .master("local[*]")
     
@@ -105,9 +232,8 @@ if __name__ == "__main__":
     if not dat_files:
         print("No .dat files found in the input directory.")
     else:
-        # Process files sequentially on the driver node
-        for file_path in dat_files:
-            process_file(spark, file_path)
+        # Tables run concurrently as separate Spark jobs; parallel chunks of a table are read together
+        convert_tables(spark, dat_files, args.parallel_tables)
 
     # Stop the Spark session
     spark.stop()
\ No newline at end of file
@@ -0,0 +1,256 @@
+import os
+import sys
+import csv
+import time
+import shutil
+import argparse
+import tempfile
+import itertools
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from arrow_schema import dictionary_columns
+from cluster_parquet import load_cluster_keys
+from data_generator import TABLE_NAMES, compile_dsdgen, run_dsdgen_child
+from data_to_parquet import TABLE_ARROW_SCHEMAS, csv_options, handle_error
+from tpcds_files import CHILD_TABLES, chunk_file_name
+
+# Resolve paths relative to the script's location
+script_dir = os.path.dirname(__file__)
+results_dir = os.path.join(script_dir, "test_data")
+
+# Default matrix; every combination is written once. Statistics are always written since pruning depends on them
+CODECS = ["none", "snappy", "lz4", "zstd-1", "zstd-3", "zstd-9"]
+ROW_GROUP_ROWS = [128 * 1024, 1024 * 1024]
+PAGE_INDEX = [False, True]
+BLOOM_FILTER = [False, True]
+DICTIONARY = ["schema"]
+
+# Rows at scale factor 1 of the tables dsdgen splits into -PARALLEL chunks, used to size the sample's chunks. Fact
+# tables grow about linearly with the scale factor; inventory grows more slowly, so extra children are read for it
+SF1_ROWS = {
+    "store_sales": 2_880_404,
+    "store_returns": 287_514,
+    "catalog_sales": 1_441_548,
+    "catalog_returns": 144_067,
+    "web_sales": 719_384,
+    "web_returns": 71_763,
+    "inventory": 11_745_000,
+}
+
+def parse_codec(codec):
+    """Split a codec name such as "zstd-3" into (compression, level)."""
+    name, _, level = codec.partition("-")
+    return name, int(level) if level else None
+
+def sample_chunks(table_name, scale_factor, max_rows):
+    """
+    Number of dsdgen -PARALLEL chunks that makes one chunk of the table hold about max_rows rows. A child table
+    is split along with its parent, so its own row count sizes the chunks.
+    """
+    return max(1, SF1_ROWS.get(table_name, 0) * scale_factor // max_rows)
+
+def load_sample(table_name, scale_factor, max_rows):
+    """
+    Generate part of one table at the given scale factor with dsdgen in a temporary directory and load up to
+    max_rows rows. The table is split into -PARALLEL chunks of about max_rows rows and only as many children are
+    run as the sample needs (usually one), so a large scale factor does not mean generating the whole table.
+    Child tables (e.g. store_returns) are generated through their parent table, which dsdgen builds them with.
+    :return: Typed pyarrow.Table.
+    """
+    parent = {child: parent for parent, child in CHILD_TABLES.items()}.get(table_name, table_name)
+    parallelism = sample_chunks(table_name, scale_factor, max_rows)
+    read_options, parse_options, convert_options = csv_options(table_name)
+    schema = TABLE_ARROW_SCHEMAS[table_name]
+    batches, rows = [], 0
+    work_dir = tempfile.mkdtemp(prefix="tpcds_tuning_")
+    try:
+        for child in range(1, parallelism + 1):
+            result = run_dsdgen_child(scale_factor, parallelism, child, parent, output_dir=work_dir)
+            if result["returncode"] != 0:
+                handle_error(f"dsdgen failed for table {parent} with exit code {result['returncode']}")
+            file_name = chunk_file_name(table_name, child, parallelism) if parallelism > 1 else f"{table_name}.dat"
+            file_path = os.path.join(work_dir, file_name)
+            # Tables too small for dsdgen to split are built whole by child 1
+            if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+                break
+            with pa_csv.open_csv(file_path, read_options=read_options, parse_options=parse_options,
+                                 convert_options=convert_options) as reader:
+                for batch in reader:
+                    batches.append(pa.RecordBatch.from_arrays(batch.columns, schema=schema))
+                    rows += batch.num_rows
+                    if rows >= max_rows:
+                        break
+            os.remove(file_path)
+            if rows >= max_rows:
+                break
+        return pa.Table.from_batches(batches, schema=schema).slice(0, max_rows).combine_chunks()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def build_predicates(table_name, table):
+    """
+    Representative TPC-DS filters for a table, with literals taken from the sample so every filter selects rows.
+    Partitioned tables get a one-month range on their date key and a point lookup on their sort key (the
+    iceberg-kit/tables.json columns); other tables get a point lookup on their surrogate key.
+    :return: List of (name, column, expression) tuples.
+    """
+    cluster_keys = load_cluster_keys()
+    predicates = [("full_scan", None, None)]
+    if table_name in cluster_keys:
+        date_column, lookup_column = cluster_keys[table_name]
+        # December of the first sales year, the month window many TPC-DS queries filter on
+        low = pc.min(table[date_column]).as_py()
+        if low is not None:
+            predicates.append((f"{date_column} 30-day range", date_column,
+                               (ds.field(date_column) >= low + 335) & (ds.field(date_column) < low + 365)))
+    else:
+        lookup_column = table.schema.names[0]
+    value = table[lookup_column][table.num_rows // 2].as_py()
+    if value is not None:
+        predicates.append((f"{lookup_column} point lookup", lookup_column, ds.field(lookup_column) == value))
+    return predicates
+
+def writer_options(table_name, table, codec, row_group_rows, page_index, bloom_filter, dictionary, lookup_columns):
+    """Keyword arguments for pq.write_table for one point of the matrix."""
+    compression, level = parse_codec(codec)
+    schema = TABLE_ARROW_SCHEMAS[table_name]
+    options = {
+        "compression": compression,
+        "compression_level": level,
+        "row_group_size": row_group_rows,
+        "write_statistics": True,
+        "write_page_index": page_index,
+        "use_dictionary": {"schema": dictionary_columns(schema), "all": True, "none": False}[dictionary],
+    }
+    if bloom_filter:
+        options["bloom_filter_options"] = {column: {"ndv": table.num_rows, "fpp": 0.05} for column in lookup_columns}
+    return options
+
+def matching_row_groups(file_path, column, expression):
+    """
+    Count the row groups whose min/max statistics cannot rule out the filter (i.e. that a reader has to scan).
+    pyarrow prunes on row-group statistics only, so the count is the same with or without page index and bloom filters.
+    """
+    if column is None:
+        return pq.ParquetFile(file_path).metadata.num_row_groups
+    fragment = next(iter(ds.dataset(file_path, format="parquet").get_fragments()))
+    return len(fragment.split_by_row_group(expression))
+
+def time_scan(file_path, column, expression, repeat):
+    """
+    Best-of-repeat time to read the rows matching a filter (all rows for a full scan).
+    The pyarrow reader ignores the page index and bloom filters, so they do not speed up this scan.
+    """
+    best, rows = None, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = ds.dataset(file_path, format="parquet").to_table(filter=expression).num_rows
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+def run_matrix(table_name, scale_factor, codecs=CODECS, row_groups=ROW_GROUP_ROWS, page_index=PAGE_INDEX,
+               bloom_filter=BLOOM_FILTER, dictionary=DICTIONARY, max_rows=5_000_000, repeat=3):
+    """
+    Write the same sample under every combination of writer settings and measure each file.
+    :return: List of result dictionaries, one per configuration and predicate.
+    """
+    print(f"Generating {table_name} at scale factor {scale_factor} (up to {max_rows:,} rows)...")
+    table = load_sample(table_name, scale_factor, max_rows)
+    predicates = build_predicates(table_name, table)
+    lookup_columns = [column for name, column, _ in predicates if name.endswith("point lookup")]
+    arrow_mb = table.nbytes / (1024 * 1024)
+    print(f"Loaded {table.num_rows:,} rows ({arrow_mb:,.1f} MB in memory); predicates: {', '.join(p[0] for p in predicates)}")
+
+    if any(page_index) or any(bloom_filter):
+        print("Note: scans use pyarrow, which prunes on row-group statistics only. The page index and bloom filter "
+              "settings show their file size and write cost; their read-side benefit has to be measured in the query engine.")
+
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="tpcds_tuning_")
+    try:
+        for codec, rg_rows, index, bloom, dictionary_mode in itertools.product(codecs, row_groups, page_index, bloom_filter, dictionary):
+            config = {"codec": codec, "row_group_rows": rg_rows, "page_index": index, "bloom_filter": bloom, "dictionary": dictionary_mode}
+            file_path = os.path.join(work_dir, "sample.parquet")
+            options = writer_options(table_name, table, codec, rg_rows, index, bloom, dictionary_mode, lookup_columns)
+            try:
+                start = time.perf_counter()
+                pq.write_table(table, file_path, **options)
+                write_seconds = time.perf_counter() - start
+            except (TypeError, pa.ArrowNotImplementedError) as e:
+                print(f"Skipping {config}: not supported by this pyarrow version ({e})")
+                continue
+            file_mb = os.path.getsize(file_path) / (1024 * 1024)
+            for name, column, expression in predicates:
+                scan_seconds, rows = time_scan(file_path, column, expression, repeat)
+                results.append(dict(
+                    config,
+                    table=table_name,
+                    scale_factor=scale_factor,
+                    rows=table.num_rows,
+                    write_seconds=round(write_seconds, 4),
+                    write_mb_per_s=round(arrow_mb / max(write_seconds, 1e-6), 1),
+                    file_mb=round(file_mb, 2),
+                    compression_ratio=round(arrow_mb / max(file_mb, 1e-6), 2),
+                    predicate=name,
+                    matched_rows=rows,
+                    row_groups_scanned=matching_row_groups(file_path, column, expression),
+                    scan_seconds=round(scan_seconds, 4),
+                ))
+            print(f"{codec:<8} rg={rg_rows:>9,} page_index={str(index):<5} bloom={str(bloom):<5} dict={dictionary_mode:<6} "
+                  f"{file_mb:>9,.1f} MB  write {arrow_mb / max(write_seconds, 1e-6):>8,.1f} MB/s  "
+                  + "  ".join(f"{r['predicate']}: {r['scan_seconds'] * 1000:,.1f} ms" for r in results[-len(predicates):]))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def write_results(results, table_name, scale_factor):
+    """Write the results to test_data/parquet_tuning_<table>_sf<scale>.csv and return its path."""
+    os.makedirs(results_dir, exist_ok=True)
+    output_file = os.path.join(results_dir, f"parquet_tuning_{table_name}_sf{scale_factor}.csv")
+    with open(output_file, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+    return output_file
+
+def split_list(value, cast=str):
+    return [cast(v.strip()) for v in value.split(",") if v.strip()]
+
+def parse_bool(value):
+    return value.lower() in ("true", "on", "yes", "1")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Parquet writer settings on one TPC-DS table")
+    parser.add_argument("--table", type=str, required=True, help="TPC-DS table to benchmark, e.g. store_sales")
+    parser.add_argument("--scale-factor", type=int, default=1, help="Scale factor to generate the table at (default: 1)")
+    parser.add_argument("--max_rows", type=int, default=5_000_000, help="Rows of the generated table to use (default: 5,000,000)")
+    parser.add_argument("--codecs", type=str, default=",".join(CODECS), help="Comma-separated codecs; zstd levels as zstd-<level> (default: %(default)s)")
+    parser.add_argument("--row_groups", type=str, default=",".join(str(r) for r in ROW_GROUP_ROWS), help="Comma-separated row-group sizes in rows (default: %(default)s)")
+    parser.add_argument("--page_index", type=str, default="false,true", help="Write the page index: false, true or both (default: %(default)s)")
+    parser.add_argument("--bloom_filter", type=str, default="false,true", help="Write bloom filters on the point-lookup column: false, true or both (default: %(default)s)")
+    parser.add_argument("--dictionary", type=str, default=",".join(DICTIONARY), help="Dictionary encoding: schema (low-cardinality columns only), all, none (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Scan repetitions; the best time is reported (default: 3)")
+    args = parser.parse_args()
+
+    if args.table not in TABLE_NAMES or args.table not in TABLE_ARROW_SCHEMAS:
+        print(f"Unknown table: {args.table}")
+        sys.exit(1)
+
+    compile_dsdgen()
+    results = run_matrix(
+        args.table,
+        args.scale_factor,
+        split_list(args.codecs),
+        split_list(args.row_groups, int),
+        split_list(args.page_index, parse_bool),
+        split_list(args.bloom_filter, parse_bool),
+        split_list(args.dictionary),
+        args.max_rows,
+        args.repeat,
+    )
+    if results:
+        print(f"Results written to {write_results(results, args.table, args.scale_factor)}")
@@ -35,4 +35,4 @@
 define __LIMITA = "";
 define __LIMITB = "";                  -- nothing between SELECT and column list
 define __LIMITC = "limit %d";    -- append at end
-
+define _BEGIN = "-- start query " + [_QUERY] + " in stream " + [_STREAM] + " using template " + [_TEMPLATE];  -- lets multi-stream runs tell which template each query came from
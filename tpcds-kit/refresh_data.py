@@ -0,0 +1,219 @@
+import os
+import shutil
+import argparse
+import subprocess
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from botocore.exceptions import BotoCoreError, ClientError
+from upload_parquet import create_s3_client
+
+# Load environment variables from .env file
+load_dotenv()
+
+# dsdgen writes the refresh sets of the data maintenance test next to the base data
+TOOLS_DIR = os.path.join(os.path.dirname(__file__), "tools")
+DSDGEN_PATH = os.path.join(TOOLS_DIR, "dsdgen")
+REFRESH_DIR = os.path.join(os.path.dirname(__file__), "test_data", "refresh")
+
+# Column types of the refresh files; dates and times are parsed from text after reading
+INT, TEXT, DATE, TIME = pa.int64(), pa.string(), "date", "time"
+MONEY = pa.decimal128(7, 2)
+
+# Source tables the data maintenance functions read, with their columns in the order dsdgen prints them
+# (tools/s_*.c; tools/tpcds_source.sql lists s_catalog_returns in a different order)
+REFRESH_TABLES = {
+    "s_purchase": [
+        ("purc_purchase_id", INT), ("purc_store_id", TEXT), ("purc_customer_id", TEXT), ("purc_purchase_date", DATE),
+        ("purc_purchase_time", INT), ("purc_register_id", INT), ("purc_clerk_id", INT), ("purc_comment", TEXT),
+    ],
+    "s_purchase_lineitem": [
+        ("plin_purchase_id", INT), ("plin_line_number", INT), ("plin_item_id", TEXT), ("plin_promotion_id", TEXT),
+        ("plin_quantity", INT), ("plin_sale_price", MONEY), ("plin_coupon_amt", MONEY), ("plin_comment", TEXT),
+    ],
+    "s_store_returns": [
+        ("sret_store_id", TEXT), ("sret_purchase_id", INT), ("sret_line_number", INT), ("sret_item_id", TEXT),
+        ("sret_customer_id", TEXT), ("sret_return_date", DATE), ("sret_return_time", TIME), ("sret_ticket_number", INT),
+        ("sret_return_qty", INT), ("sret_return_amt", MONEY), ("sret_return_tax", MONEY), ("sret_return_fee", MONEY),
+        ("sret_return_ship_cost", MONEY), ("sret_refunded_cash", MONEY), ("sret_reversed_charge", MONEY),
+        ("sret_store_credit", MONEY), ("sret_reason_id", TEXT),
+    ],
+    "s_catalog_order": [
+        ("cord_order_id", INT), ("cord_bill_customer_id", TEXT), ("cord_ship_customer_id", TEXT), ("cord_order_date", DATE),
+        ("cord_order_time", INT), ("cord_ship_mode_id", TEXT), ("cord_call_center_id", TEXT), ("cord_order_comments", TEXT),
+    ],
+    "s_catalog_order_lineitem": [
+        ("clin_order_id", INT), ("clin_line_number", INT), ("clin_item_id", TEXT), ("clin_promotion_id", TEXT),
+        ("clin_quantity", INT), ("clin_sales_price", MONEY), ("clin_coupon_amt", MONEY), ("clin_warehouse_id", TEXT),
+        ("clin_ship_date", DATE), ("clin_catalog_number", INT), ("clin_catalog_page_number", INT), ("clin_ship_cost", MONEY),
+    ],
+    "s_catalog_returns": [
+        ("cret_call_center_id", TEXT), ("cret_order_id", INT), ("cret_line_number", INT), ("cret_item_id", TEXT),
+        ("cret_return_customer_id", TEXT), ("cret_refund_customer_id", TEXT), ("cret_return_date", DATE),
+        ("cret_return_time", TIME), ("cret_return_qty", INT), ("cret_return_amt", MONEY), ("cret_return_tax", MONEY),
+        ("cret_return_fee", MONEY), ("cret_return_ship_cost", MONEY), ("cret_refunded_cash", MONEY),
+        ("cret_reversed_charge", MONEY), ("cret_merchant_credit", MONEY), ("cret_reason_id", TEXT),
+        ("cret_shipmode_id", TEXT), ("cret_warehouse_id", TEXT), ("cret_catalog_page_id", TEXT),
+    ],
+    "s_web_order": [
+        ("word_order_id", INT), ("word_bill_customer_id", TEXT), ("word_ship_customer_id", TEXT), ("word_order_date", DATE),
+        ("word_order_time", INT), ("word_ship_mode_id", TEXT), ("word_web_site_id", TEXT), ("word_order_comments", TEXT),
+    ],
+    "s_web_order_lineitem": [
+        ("wlin_order_id", INT), ("wlin_line_number", INT), ("wlin_item_id", TEXT), ("wlin_promotion_id", TEXT),
+        ("wlin_quantity", INT), ("wlin_sales_price", MONEY), ("wlin_coupon_amt", MONEY), ("wlin_warehouse_id", TEXT),
+        ("wlin_ship_date", DATE), ("wlin_ship_cost", MONEY), ("wlin_web_page_id", TEXT),
+    ],
+    "s_web_returns": [
+        ("wret_web_site_id", TEXT), ("wret_order_id", INT), ("wret_line_number", INT), ("wret_item_id", TEXT),
+        ("wret_return_customer_id", TEXT), ("wret_refund_customer_id", TEXT), ("wret_return_date", DATE),
+        ("wret_return_time", TIME), ("wret_return_qty", INT), ("wret_return_amt", MONEY), ("wret_return_tax", MONEY),
+        ("wret_return_fee", MONEY), ("wret_return_ship_cost", MONEY), ("wret_refunded_cash", MONEY),
+        ("wret_reversed_charge", MONEY), ("wret_account_credit", MONEY), ("wret_reason_id", TEXT),
+    ],
+    "s_inventory": [
+        ("invn_warehouse_id", TEXT), ("invn_item_id", TEXT), ("invn_date", DATE), ("invn_qty_on_hand", INT),
+    ],
+}
+
+def refresh_set_dir(refresh_set):
+    return os.path.join(REFRESH_DIR, str(refresh_set))
+
+def generate_refresh_set(scale_factor, refresh_set):
+    """Generate one refresh set with dsdgen -UPDATE: the s_* source tables plus the delete date ranges."""
+    if not os.path.exists(DSDGEN_PATH):
+        print(f"\033[91mdsdgen not found at {DSDGEN_PATH}. Build the TPC-DS tools with 'make' in tpcds-kit/tools first.\033[0m")
+        exit(1)
+    output_dir = refresh_set_dir(refresh_set)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(output_dir)
+    print(f"Generating refresh set {refresh_set} for scale factor {scale_factor}...")
+    command = [DSDGEN_PATH, "-SCALE", str(scale_factor), "-UPDATE", str(refresh_set), "-FORCE", "-DIR", os.path.abspath(output_dir)]
+    result = subprocess.run(command, cwd=TOOLS_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"\033[91mdsdgen failed: {result.stdout}{result.stderr}\033[0m")
+        exit(1)
+
+def parse_dates(column):
+    """Parse YYYY-MM-DD text into dates; dsdgen prints missing dates as out-of-range values, which become null."""
+    return pc.cast(pc.strptime(column, format="%Y-%m-%d", unit="s", error_is_null=True), pa.date32())
+
+def parse_times(column):
+    """Turn HHMMSS text (dsdgen's print_time, no separators) into seconds since midnight, the value of time_dim.t_time."""
+    parts = [pc.cast(pc.utf8_slice_codeunits(column, start, start + 2), pa.int64()) for start in (0, 2, 4)]
+    return pc.add(pc.add(pc.multiply(parts[0], 3600), pc.multiply(parts[1], 60)), parts[2])
+
+def read_refresh_table(table_name, refresh_set):
+    """Read one s_*_<n>.dat file into a typed Arrow table."""
+    columns = REFRESH_TABLES[table_name]
+    names = [name for name, _ in columns]
+    path = os.path.join(refresh_set_dir(refresh_set), f"{table_name}_{refresh_set}.dat")
+    table = pa_csv.read_csv(
+        path,
+        # dsdgen terminates every row with the delimiter, which yields an empty trailing column
+        read_options=pa_csv.ReadOptions(column_names=names + ["_trailing"], encoding="latin1"),
+        parse_options=pa_csv.ParseOptions(delimiter="|", quote_char=False),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=names,
+            column_types={name: TEXT if kind in (DATE, TIME) else kind for name, kind in columns},
+            strings_can_be_null=True,
+        ),
+    )
+    for name, kind in columns:
+        if kind == DATE:
+            table = table.set_column(table.schema.get_field_index(name), name, parse_dates(table[name]))
+        elif kind == TIME:
+            table = table.set_column(table.schema.get_field_index(name), name, parse_times(table[name]))
+    return table
+
+def read_delete_dates(refresh_set, refresh_dir=REFRESH_DIR):
+    """
+    Read the date ranges the delete functions remove.
+    :return: Dictionary with "sales" and "inventory" lists of (start, end) ISO date strings.
+    """
+    ranges = {}
+    for kind, prefix in (("sales", "delete"), ("inventory", "inventory_delete")):
+        with open(os.path.join(refresh_dir, str(refresh_set), f"{prefix}_{refresh_set}.dat"), "r") as f:
+            ranges[kind] = [tuple(line.strip().strip("|").split("|")[:2]) for line in f if line.strip()]
+    return ranges
+
+def check_refresh_set(refresh_set):
+    """
+    Read every s_* file of a refresh set the way stage_refresh_set does, without uploading, so a parsing problem
+    shows before the data maintenance test. Parsed times must fall within a day.
+    :return: True if every file was read.
+    """
+    ok = True
+    for table_name, columns in REFRESH_TABLES.items():
+        try:
+            table = read_refresh_table(table_name, refresh_set)
+        except (OSError, pa.ArrowInvalid) as e:
+            print(f"\033[91m{table_name}_{refresh_set}.dat could not be read: {e}\033[0m")
+            ok = False
+            continue
+        for name, kind in columns:
+            if kind != TIME:
+                continue
+            low, high = pc.min(table[name]).as_py(), pc.max(table[name]).as_py()
+            if (low is not None and low < 0) or (high is not None and high >= 86400):
+                print(f"\033[91m{table_name}.{name} has times outside 00:00:00-23:59:59\033[0m")
+                ok = False
+        print(f"Read {table_name}_{refresh_set}.dat: {table.num_rows:,} rows")
+    unused = sorted(f for f in os.listdir(refresh_set_dir(refresh_set))
+                    if f.startswith("s_") and f.endswith(".dat") and f[:-len(f"_{refresh_set}.dat")] not in REFRESH_TABLES)
+    if unused:
+        print(f"Not used by the data maintenance functions: {', '.join(unused)}")
+    return ok
+
+def stage_refresh_set(refresh_set, s3, bucket, s3_folder):
+    """
+    Convert a refresh set to Parquet and upload it to <S3_FOLDER_NAME>/refresh_<n>/<table>/,
+    where Dremio reads it during the data maintenance test.
+    :return: Dictionary mapping table name to row count.
+    """
+    parquet_dir = os.path.join(refresh_set_dir(refresh_set), "parquet")
+    os.makedirs(parquet_dir, exist_ok=True)
+    rows = {}
+    for table_name in REFRESH_TABLES:
+        table = read_refresh_table(table_name, refresh_set)
+        parquet_file = os.path.join(parquet_dir, f"{table_name}.parquet")
+        pq.write_table(table, parquet_file)
+        key = f"{s3_folder}/refresh_{refresh_set}/{table_name}/{table_name}.parquet"
+        s3.upload_file(parquet_file, bucket, key)
+        rows[table_name] = table.num_rows
+        print(f"Staged {table_name} ({table.num_rows:,} rows) at s3://{bucket}/{key}")
+    return rows
+
+def main(refresh_sets, scale_factor=None, check=False):
+    s3 = None if check else create_s3_client()
+    if s3 is None and not check:
+        return
+    bucket, s3_folder = os.environ.get("S3_BUCKET_NAME"), os.environ.get("S3_FOLDER_NAME")
+    for refresh_set in refresh_sets:
+        if scale_factor is not None:
+            generate_refresh_set(scale_factor, refresh_set)
+        elif not os.path.isdir(refresh_set_dir(refresh_set)):
+            print(f"\033[91mRefresh set {refresh_set} not found in {REFRESH_DIR}; generate it with --scale-factor.\033[0m")
+            exit(1)
+        if check:
+            if not check_refresh_set(refresh_set):
+                exit(1)
+            print(f"Refresh set {refresh_set} reads cleanly")
+            continue
+        try:
+            stage_refresh_set(refresh_set, s3, bucket, s3_folder)
+        except (ClientError, BotoCoreError) as e:
+            print(f"\033[91mFailed to upload refresh set {refresh_set}: {e}\033[0m")
+            exit(1)
+        starts = ", ".join(f"{start}..{end}" for start, end in read_delete_dates(refresh_set)["sales"])
+        print(f"Refresh set {refresh_set} staged; sales delete ranges: {starts}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate TPC-DS refresh sets with dsdgen -UPDATE and stage them in S3 for the data maintenance test")
+    parser.add_argument("--refresh-sets", type=int, nargs="+", required=True, help="Refresh set numbers, e.g. 1 2 (one per throughput stream per maintenance run)")
+    parser.add_argument("--scale-factor", type=int, default=None, help="Generate the refresh sets for this scale factor first (default: stage the sets already in test_data/refresh)")
+    parser.add_argument("--check", action="store_true", help="Only read every s_* file of the refresh sets to check they parse; nothing is uploaded")
+    args = parser.parse_args()
+    main(args.refresh_sets, args.scale_factor, args.check)
@@ -0,0 +1,121 @@
+import io
+import time
+import base64
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# S3 rejects multipart parts smaller than this, except the last one
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 64 * 1024 * 1024
+# Parts buffered or uploading at once per stream; bounds memory to about (max_buffers + 1) * part_size
+DEFAULT_MAX_BUFFERS = 4
+
+class S3StreamWriter(io.RawIOBase):
+    """
+    Writable file object that streams into an S3 object through a multipart upload.
+    Bytes are collected into part_size buffers; each full buffer is uploaded by a background thread while the
+    writer keeps producing the next one. When max_buffers parts are in flight, write() blocks until one
+    finishes, so a producer faster than the network is slowed down instead of buffering without limit.
+    Objects smaller than one part are sent with a single PUT on close. close() completes the upload and
+    abort() (or an exception inside a with block) discards it, so a failed stream never leaves a partial object.
+    Parts are all part_size bytes, so the object gets the same ETag as a file uploaded by upload_parquet.py
+    with that chunk size.
+    """
+
+    def __init__(self, s3, bucket, key, part_size=DEFAULT_PART_SIZE, max_buffers=DEFAULT_MAX_BUFFERS):
+        super().__init__()
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE // (1024 * 1024)} MB")
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.buffer = bytearray()
+        self.position = 0
+        self.upload_id = None
+        self.parts = []
+        self.slots = threading.BoundedSemaphore(max_buffers)
+        self.executor = ThreadPoolExecutor(max_workers=max_buffers)
+        # Seconds write() spent blocked waiting for a free buffer, i.e. how far uploads fell behind
+        self.stalled_seconds = 0.0
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed S3StreamWriter")
+        self.buffer += data
+        self.position += len(data)
+        while len(self.buffer) >= self.part_size:
+            body = bytes(self.buffer[:self.part_size])
+            del self.buffer[:self.part_size]
+            self._submit_part(body)
+        return len(data)
+
+    def _submit_part(self, body):
+        """Hand a full buffer to an upload thread, waiting for a free slot first."""
+        for part in self.parts:
+            if part["future"].done() and part["future"].exception():
+                raise part["future"].exception()
+        if self.upload_id is None:
+            self.upload_id = self.s3.create_multipart_upload(Bucket=self.bucket, Key=self.key)["UploadId"]
+        start = time.perf_counter()
+        self.slots.acquire()
+        self.stalled_seconds += time.perf_counter() - start
+        part_number = len(self.parts) + 1
+        self.parts.append({"number": part_number, "future": self.executor.submit(self._upload_part, part_number, body)})
+
+    def _upload_part(self, part_number, body):
+        try:
+            response = self.s3.upload_part(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=part_number, Body=body,
+                ContentMD5=base64.b64encode(hashlib.md5(body).digest()).decode()
+            )
+            return response["ETag"]
+        finally:
+            self.slots.release()
+
+    def close(self):
+        """Upload what is left and complete the object."""
+        if self.closed:
+            return
+        try:
+            if self.upload_id is None:
+                body = bytes(self.buffer)
+                self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=body,
+                                   ContentMD5=base64.b64encode(hashlib.md5(body).digest()).decode())
+            else:
+                if self.buffer:
+                    self._submit_part(bytes(self.buffer))
+                etags = [part["future"].result() for part in self.parts]
+                self.s3.complete_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                    MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etag} for n, etag in enumerate(etags, 1)]}
+                )
+        except BaseException:
+            self.abort()
+            raise
+        self.buffer = bytearray()
+        self.executor.shutdown()
+        super().close()
+
+    def abort(self):
+        """Discard the stream: stop the part uploads and abort the multipart upload, leaving no object behind."""
+        if self.closed:
+            return
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.upload_id is not None:
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        self.buffer = bytearray()
+        super().close()
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,191 @@
+import os
+import time
+import base64
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+from s3transfer.utils import ChunksizeAdjuster
+from artifact_manifest import ArtifactManifest
+
+def part_size(chunk_size, file_size):
+    """Part size boto3 uses for a file; it grows the configured chunk size for files that would exceed 10,000 parts."""
+    return ChunksizeAdjuster().adjust_chunksize(chunk_size, file_size)
+
+def local_etag(file_path, chunk_size, manifest=None):
+    """
+    Compute the ETag S3 assigns to a file uploaded with the given multipart chunk size:
+    the MD5 of the file below one chunk, otherwise the MD5 of the part MD5s followed by "-<parts>".
+    The result is cached in the manifest, so unchanged files are hashed only once.
+    :return: Tuple of (etag, part_md5s) where part_md5s are hex digests (empty for single-part files).
+    """
+    if manifest:
+        cached = manifest.cached_etag(file_path, chunk_size)
+        if cached:
+            return cached
+
+    file_size = os.path.getsize(file_path)
+    size = part_size(chunk_size, file_size)
+    part_md5s = []
+    with open(file_path, "rb") as f:
+        while True:
+            buffer = f.read(size)
+            if not buffer and part_md5s:
+                break
+            part_md5s.append(hashlib.md5(buffer).hexdigest())
+            if len(buffer) < size:
+                break
+
+    if file_size < chunk_size:
+        etag, part_md5s = part_md5s[0], []
+    else:
+        combined = hashlib.md5(b"".join(bytes.fromhex(md5) for md5 in part_md5s))
+        etag = f"{combined.hexdigest()}-{len(part_md5s)}"
+    if manifest:
+        manifest.record_etag(file_path, chunk_size, etag, part_md5s)
+    return etag, part_md5s
+
+def list_remote_objects(s3, bucket, prefix):
+    """Return {key: {"size", "etag"}} for every object under a prefix."""
+    objects = {}
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        for item in page.get("Contents", []):
+            objects[item["Key"]] = {"size": item["Size"], "etag": item["ETag"].strip('"')}
+    return objects
+
+def list_pending_uploads(s3, bucket, prefix):
+    """Return {key: upload_id} of the most recent unfinished multipart upload of each key under a prefix."""
+    pending = {}
+    for page in s3.get_paginator("list_multipart_uploads").paginate(Bucket=bucket, Prefix=prefix):
+        for upload in sorted(page.get("Uploads", []), key=lambda u: u["Initiated"]):
+            pending[upload["Key"]] = upload["UploadId"]
+    return pending
+
+def uploaded_parts(s3, bucket, key, upload_id):
+    """Return {part_number: etag} of the parts an unfinished multipart upload already holds."""
+    parts = {}
+    for page in s3.get_paginator("list_parts").paginate(Bucket=bucket, Key=key, UploadId=upload_id):
+        for part in page.get("Parts", []):
+            parts[part["PartNumber"]] = part["ETag"].strip('"')
+    return parts
+
+def resumable_upload(s3, file_path, bucket, key, chunk_size, part_md5s, max_concurrency, upload_id=None):
+    """
+    Upload a file as a multipart upload that survives interruption.
+    Parts an earlier run already uploaded with the same content are kept; only the missing ones are sent.
+    On failure the multipart upload is left open (instead of aborted) so the next sync resumes it.
+    :return: Tuple of (MB sent, parts reused).
+    """
+    size = part_size(chunk_size, os.path.getsize(file_path))
+    existing = uploaded_parts(s3, bucket, key, upload_id) if upload_id else {}
+    if not upload_id:
+        upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+
+    def send_part(part_number):
+        with open(file_path, "rb") as f:
+            f.seek((part_number - 1) * size)
+            body = f.read(size)
+        content_md5 = base64.b64encode(bytes.fromhex(part_md5s[part_number - 1])).decode()
+        s3.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body, ContentMD5=content_md5)
+        return len(body)
+
+    missing = [n for n, md5 in enumerate(part_md5s, 1) if existing.get(n) != md5]
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        sent = sum(executor.map(send_part, missing))
+    s3.complete_multipart_upload(
+        Bucket=bucket, Key=key, UploadId=upload_id,
+        MultipartUpload={"Parts": [{"PartNumber": n, "ETag": f'"{md5}"'} for n, md5 in enumerate(part_md5s, 1)]}
+    )
+    return sent / (1024 * 1024), len(part_md5s) - len(missing)
+
+def sync_file(s3, file_path, bucket, key, remote, pending_upload, chunk_size, max_concurrency, manifest, test_mode=False):
+    """
+    Bring one remote object up to date with a local file.
+    :return: Dictionary with the key, action ("unchanged", "uploaded", "resumed" or "would upload"), MB sent and seconds.
+    """
+    start = time.time()
+    etag, part_md5s = local_etag(file_path, chunk_size, manifest)
+    if remote and remote["size"] == os.path.getsize(file_path) and remote["etag"] == etag:
+        return {"key": key, "action": "unchanged", "mb": 0.0, "seconds": time.time() - start}
+    if test_mode:
+        print(f"TEST MODE: would upload {file_path} to s3://{bucket}/{key}")
+        return {"key": key, "action": "would upload", "mb": 0.0, "seconds": 0.0}
+
+    if part_md5s:
+        sent_mb, reused = resumable_upload(s3, file_path, bucket, key, chunk_size, part_md5s, max_concurrency, pending_upload)
+    else:
+        # A single PUT, so the object's ETag is the plain MD5 compared above
+        with open(file_path, "rb") as f:
+            s3.put_object(Bucket=bucket, Key=key, Body=f, ContentMD5=base64.b64encode(bytes.fromhex(etag)).decode())
+        sent_mb, reused = os.path.getsize(file_path) / (1024 * 1024), 0
+    elapsed = max(time.time() - start, 1e-6)
+    action = "resumed" if reused else "uploaded"
+    detail = f", {reused} of {len(part_md5s)} parts already uploaded" if reused else ""
+    print(f"{action.capitalize()} {file_path} to s3://{bucket}/{key} ({sent_mb:,.1f} MB in {elapsed:.1f}s, {sent_mb / elapsed:,.1f} MB/s{detail})", flush=True)
+    return {"key": key, "action": action, "mb": sent_mb, "seconds": elapsed}
+
+def delete_stale(s3, bucket, stale_keys, stale_uploads):
+    """Delete remote objects with no local counterpart and abort multipart uploads nobody will finish."""
+    for key, upload_id in stale_uploads.items():
+        s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+    for start in range(0, len(stale_keys), 1000):
+        batch = stale_keys[start:start + 1000]
+        s3.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True})
+    print(f"Deleted {len(stale_keys)} stale object(s) and aborted {len(stale_uploads)} stale multipart upload(s).")
+
+def sync_files(s3, uploads, bucket, s3_folder, workers, chunk_size, max_concurrency, delete=False, test_mode=False):
+    """
+    Upload only the files whose remote object is missing or different, resuming unfinished multipart uploads.
+    Only the table prefixes that have local files are compared, so other tables in the bucket are never touched.
+    :param uploads: List of (file_path, key) tuples from list_uploads.
+    :param delete: Also delete remote objects under those table prefixes that no longer exist locally.
+    :return: True if every file is in sync.
+    """
+    tables = sorted({key[len(s3_folder) + 1:].split("/")[0] for _, key in uploads})
+    remote, pending = {}, {}
+    for table_name in tables:
+        prefix = f"{s3_folder}/{table_name}/"
+        remote.update(list_remote_objects(s3, bucket, prefix))
+        pending.update(list_pending_uploads(s3, bucket, prefix))
+    print(f"Comparing {len(uploads)} local files with {len(remote)} remote objects ({len(pending)} unfinished multipart uploads)...")
+
+    manifest = ArtifactManifest()
+    stats, failed = [], []
+    wall_start = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(sync_file, s3, file_path, bucket, key, remote.get(key), pending.get(key),
+                                chunk_size, max_concurrency, manifest, test_mode): file_path
+                for file_path, key in sorted(uploads, key=lambda upload: os.path.getsize(upload[0]), reverse=True)
+            }
+            for future in as_completed(futures):
+                try:
+                    stats.append(future.result())
+                except NoCredentialsError:
+                    executor.shutdown(cancel_futures=True)
+                    print("\033[91mCredentials not available. Please ensure S3_ACCESS_KEY and S3_SECRET_KEY are set.\033[0m")
+                    return False
+                except (ClientError, BotoCoreError, OSError) as e:
+                    print(f"\033[91mFailed to sync {futures[future]}: {e} (re-run to resume)\033[0m", flush=True)
+                    failed.append(futures[future])
+    finally:
+        manifest.save()
+    wall_seconds = max(time.time() - wall_start, 1e-6)
+
+    local_keys = {key for _, key in uploads}
+    stale_keys = sorted(key for key in remote if key not in local_keys)
+    stale_uploads = {key: upload_id for key, upload_id in pending.items() if key not in local_keys}
+    if delete and not test_mode:
+        delete_stale(s3, bucket, stale_keys, stale_uploads)
+    elif stale_keys:
+        print(f"{len(stale_keys)} remote object(s) have no local file; use --delete to remove them.")
+
+    counts = {}
+    for stat in stats:
+        counts[stat["action"]] = counts.get(stat["action"], 0) + 1
+    sent_mb = sum(stat["mb"] for stat in stats)
+    summary = ", ".join(f"{count} {action}" for action, count in sorted(counts.items()))
+    print(f"Sync finished in {wall_seconds:.1f}s: {summary or 'nothing to do'}; sent {sent_mb:,.1f} MB ({sent_mb / wall_seconds:,.1f} MB/s)")
+    if failed:
+        print(f"\033[91m{len(failed)} file(s) failed to sync.\033[0m")
+    return not failed
@@ -0,0 +1,288 @@
+import os
+import re
+import csv
+import math
+import sys
+import time
+import uuid
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError, ClientError
+from dotenv import load_dotenv
+from upload_parquet import create_s3_client
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Resolve paths relative to the script's location
+script_dir = os.path.dirname(__file__)
+results_dir = os.path.join(script_dir, "test_data")
+
+# Default sweep; every operation runs once per object size (or range size) and concurrency level
+OPERATIONS = ["put", "get", "range", "list", "mix"]
+OBJECT_SIZES = ["1MB", "16MB", "64MB"]
+RANGE_SIZES = ["64KB", "1MB", "8MB"]
+CONCURRENCY = [1, 8, 32]
+# Weights of the mixed workload; Dremio mostly reads, with some listing during metadata refresh
+MIX = "get=70,range=20,list=5,put=5"
+DURATION = 10
+# Objects written per size before the reads start, so concurrent GETs do not all hit one key
+OBJECTS_PER_SIZE = 32
+
+def parse_size(value):
+    """Parse a size such as "64KB", "16MB" or "1GB" into bytes."""
+    match = re.fullmatch(r"\s*(\d+)\s*(B|KB|MB|GB)?\s*", value, re.IGNORECASE)
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid size: {value}")
+    unit = (match.group(2) or "B").upper()
+    return int(match.group(1)) * {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}[unit]
+
+def format_size(size):
+    for unit, factor in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return f"{size}B"
+
+def parse_mix(value):
+    """Parse "get=70,put=20,list=10" into ([operations], [weights])."""
+    pairs = [item.split("=") for item in value.split(",") if item.strip()]
+    return [name.strip() for name, _ in pairs], [float(weight) for _, weight in pairs]
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class StorageBenchmark:
+    """
+    Measures the object store the way Dremio uses it: whole-object and ranged GETs, PUTs and LISTs
+    issued by many threads over one pooled client. Every object lives under a unique run prefix that is
+    deleted at the end. Requests are not retried, so throttling and timeouts show up as errors.
+    """
+
+    def __init__(self, s3, bucket, prefix):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.objects = {}
+        self.payloads = {}
+        self.lock = threading.Lock()
+
+    def payload(self, size):
+        """Random, incompressible bytes of the given size, generated once per size."""
+        if size not in self.payloads:
+            self.payloads[size] = os.urandom(size)
+        return self.payloads[size]
+
+    def new_key(self, size):
+        return f"{self.prefix}/{format_size(size)}/{uuid.uuid4().hex}"
+
+    def put(self, size):
+        key = self.new_key(size)
+        self.s3.put_object(Bucket=self.bucket, Key=key, Body=self.payload(size))
+        with self.lock:
+            self.objects.setdefault(size, []).append(key)
+        return size
+
+    def get(self, size):
+        key = random.choice(self.objects[size])
+        return len(self.s3.get_object(Bucket=self.bucket, Key=key)["Body"].read())
+
+    def get_range(self, range_size):
+        """Read range_size bytes at a random offset of one of the largest objects, like a Parquet column chunk read."""
+        size = max(self.objects)
+        offset = random.randrange(0, max(1, size - range_size + 1))
+        key = random.choice(self.objects[size])
+        byte_range = f"bytes={offset}-{min(size, offset + range_size) - 1}"
+        return len(self.s3.get_object(Bucket=self.bucket, Key=key, Range=byte_range)["Body"].read())
+
+    def list(self, _=None):
+        """List one page (up to 1,000 keys) of the run prefix."""
+        self.s3.list_objects_v2(Bucket=self.bucket, Prefix=f"{self.prefix}/", MaxKeys=1000)
+        return 0
+
+    def prepare(self, sizes, count, workers):
+        """Write count objects of every size for the GET scenarios."""
+        for size in sizes:
+            missing = count - len(self.objects.get(size, []))
+            if missing > 0:
+                print(f"Writing {missing} {format_size(size)} objects for the read tests...")
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    list(executor.map(self.put, [size] * missing))
+
+    def run_scenario(self, operations, weights, argument, concurrency, duration):
+        """
+        Issue requests from concurrency threads for duration seconds.
+        :param operations: Operation names to choose from; one is picked per request by weight.
+        :param argument: Object size for put/get, range size for range, ignored by list; or a dictionary of
+            operation name to its argument for a mix of operations.
+        :return: Dictionary with request count, bytes, errors by code, elapsed seconds and sorted latencies in ms.
+        """
+        calls = {"put": self.put, "get": self.get, "range": self.get_range, "list": self.list}
+        arguments = argument if isinstance(argument, dict) else dict.fromkeys(operations, argument)
+        deadline = time.perf_counter() + duration
+        results = []
+
+        def worker():
+            latencies, transferred, errors = [], 0, {}
+            while time.perf_counter() < deadline:
+                operation = random.choices(operations, weights)[0] if len(operations) > 1 else operations[0]
+                start = time.perf_counter()
+                try:
+                    transferred += calls[operation](arguments[operation])
+                    latencies.append((time.perf_counter() - start) * 1000)
+                except ClientError as e:
+                    code = e.response.get("Error", {}).get("Code", "ClientError")
+                    errors[code] = errors.get(code, 0) + 1
+                except BotoCoreError as e:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            with self.lock:
+                results.append((latencies, transferred, errors))
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for result in results for latency in result[0])
+        errors = {}
+        for _, _, worker_errors in results:
+            for code, count in worker_errors.items():
+                errors[code] = errors.get(code, 0) + count
+        return {
+            "requests": len(latencies),
+            "bytes": sum(result[1] for result in results),
+            "errors": errors,
+            "seconds": elapsed,
+            "latencies": latencies,
+        }
+
+    def cleanup(self):
+        """Delete every object written under the run prefix."""
+        keys = [key for keys in self.objects.values() for key in keys]
+        for start in range(0, len(keys), 1000):
+            self.s3.delete_objects(Bucket=self.bucket, Delete={"Objects": [{"Key": k} for k in keys[start:start + 1000]], "Quiet": True})
+        print(f"Deleted {len(keys)} benchmark objects under s3://{self.bucket}/{self.prefix}/")
+
+def summarize(operation, argument, concurrency, stats):
+    """Turn raw scenario statistics into one result row."""
+    latencies = stats["latencies"]
+    error_count = sum(stats["errors"].values())
+    attempts = stats["requests"] + error_count
+    seconds = max(stats["seconds"], 1e-6)
+    return {
+        "operation": operation,
+        "size": format_size(argument) if argument else "",
+        "concurrency": concurrency,
+        "requests": stats["requests"],
+        "requests_per_s": round(stats["requests"] / seconds, 1),
+        "mb_per_s": round(stats["bytes"] / (1024 * 1024) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+        "errors": error_count,
+        "error_rate": round(error_count / attempts, 4) if attempts else 0.0,
+        "error_codes": ";".join(f"{code}={count}" for code, count in sorted(stats["errors"].items())),
+    }
+
+def print_row(row):
+    latency = "  ".join(f"{p}={row[p + '_ms']:>9,.1f}" if row[p + "_ms"] is not None else f"{p}={'-':>9}" for p in ("p50", "p95", "p99"))
+    print(f"{row['operation']:<6}{row['size']:>7}{row['concurrency']:>5}  {row['requests']:>8,} req  {row['requests_per_s']:>9,.1f} req/s  "
+          f"{row['mb_per_s']:>9,.1f} MB/s  {latency} ms  errors {row['error_rate']:.2%}", flush=True)
+
+def run_benchmark(s3, bucket, prefix, operations=OPERATIONS, sizes=None, range_sizes=None, concurrency=CONCURRENCY,
+                  mix=MIX, duration=DURATION, objects_per_size=OBJECTS_PER_SIZE):
+    """
+    Sweep every operation over object size (or range size) and concurrency.
+    :return: List of result dictionaries, one per scenario.
+    """
+    sizes = sizes or [parse_size(s) for s in OBJECT_SIZES]
+    range_sizes = range_sizes or [parse_size(s) for s in RANGE_SIZES]
+    bench = StorageBenchmark(s3, bucket, prefix)
+    mix_operations, mix_weights = parse_mix(mix)
+    # The mixed workload reads and writes objects of the middle size, and reads the smallest ranges of the largest
+    mix_size = sorted(sizes)[len(sizes) // 2]
+    mix_arguments = {"put": mix_size, "get": mix_size, "range": min(range_sizes), "list": None}
+    results = []
+    try:
+        if any(op in operations for op in ("get", "range", "list", "mix")):
+            bench.prepare(sizes, objects_per_size, max(concurrency))
+        for operation in operations:
+            arguments = {"put": sizes, "get": sizes, "range": range_sizes, "list": [None], "mix": [mix_size]}[operation]
+            for argument in arguments:
+                for threads in concurrency:
+                    if operation == "mix":
+                        stats = bench.run_scenario(mix_operations, mix_weights, mix_arguments, threads, duration)
+                    else:
+                        stats = bench.run_scenario([operation], [1], argument, threads, duration)
+                    row = summarize(operation, argument, threads, stats)
+                    results.append(row)
+                    print_row(row)
+    finally:
+        bench.cleanup()
+    return results
+
+def write_results(results):
+    """Write the results to test_data/storage_benchmark_<timestamp>.csv and return its path."""
+    os.makedirs(results_dir, exist_ok=True)
+    output_file = os.path.join(results_dir, f"storage_benchmark_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+    with open(output_file, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+    return output_file
+
+def split_list(value, cast=str):
+    return [cast(v.strip()) for v in value.split(",") if v.strip()]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure S3-compatible storage throughput and latency with the .env S3 settings")
+    parser.add_argument("--operations", type=str, default=",".join(OPERATIONS), help="Comma-separated operations: put, get, range, list, mix (default: %(default)s)")
+    parser.add_argument("--sizes", type=str, default=",".join(OBJECT_SIZES), help="Object sizes for put and get (default: %(default)s)")
+    parser.add_argument("--ranges", type=str, default=",".join(RANGE_SIZES), help="Range sizes read from the largest objects (default: %(default)s)")
+    parser.add_argument("--concurrency", type=str, default=",".join(str(c) for c in CONCURRENCY), help="Concurrent requests (default: %(default)s)")
+    parser.add_argument("--mix", type=str, default=MIX, help="Operation weights of the mixed workload (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=DURATION, help="Seconds each scenario runs (default: %(default)s)")
+    parser.add_argument("--objects", type=int, default=OBJECTS_PER_SIZE, help="Objects written per size before the read tests (default: %(default)s)")
+    parser.add_argument("--bucket", type=str, default=os.environ.get("S3_BUCKET_NAME"), help="Bucket to test (default: S3_BUCKET_NAME)")
+    args = parser.parse_args()
+
+    operations = split_list(args.operations)
+    unknown = [op for op in operations if op not in OPERATIONS]
+    mix_unknown = [op for op in parse_mix(args.mix)[0] if op not in OPERATIONS[:-1]]
+    if unknown or mix_unknown:
+        print(f"Unknown operation(s): {', '.join(unknown + mix_unknown)}")
+        sys.exit(1)
+    concurrency = split_list(args.concurrency, int)
+
+    # No retries: a throttled or failed request is counted as an error instead of inflating the latency
+    s3 = create_s3_client(max(concurrency), retries={"max_attempts": 1, "mode": "standard"})
+    if not s3:
+        sys.exit(1)
+    folder = os.environ.get("S3_FOLDER_NAME")
+    prefix = "/".join(p for p in (folder, "_storage_benchmark", time.strftime("%Y%m%d_%H%M%S")) if p)
+
+    print(f"Benchmarking {os.environ.get('S3_ENDPOINT_URL')} bucket {args.bucket} under {prefix}/ ({args.duration:g}s per scenario)")
+    try:
+        results = run_benchmark(
+            s3, args.bucket, prefix, operations,
+            split_list(args.sizes, parse_size),
+            split_list(args.ranges, parse_size),
+            concurrency,
+            args.mix,
+            args.duration,
+            args.objects,
+        )
+    except (ClientError, BotoCoreError) as e:
+        print(f"\033[91mStorage benchmark failed: {e}\033[0m")
+        sys.exit(1)
+    if results:
+        print(f"Results written to {write_results(results)}")
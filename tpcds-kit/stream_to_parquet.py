@@ -0,0 +1,181 @@
+import os
+import sys
+import time
+import errno
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from artifact_manifest import ArtifactManifest, dsdgen_version, unit_key
+from data_generator import TABLE_NAMES, compile_dsdgen, report_throughput, run_dsdgen_child, tables_built_by
+from data_to_parquet import convert_stream, handle_error, output_dir
+from tpcds_files import chunk_file_name, group_files_by_table, table_name_from_file
+
+def convert_pipe(pipe_path, table_name, output_file):
+    """Open a named pipe (blocking until dsdgen opens it for writing) and convert what it receives."""
+    with open(pipe_path, "rb") as pipe:
+        return convert_stream(pipe, table_name, output_file)
+
+def release_pipe(pipe_path, converter):
+    """
+    Unblock a converter still waiting on a pipe dsdgen never opened (e.g. small tables in child > 1).
+    Opening the write end and closing it again gives the reader an immediate end-of-file.
+    """
+    while not converter.done():
+        try:
+            fd = os.open(pipe_path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            # ENXIO: the reader has not opened the pipe yet (or has already finished with it)
+            if e.errno != errno.ENXIO:
+                raise
+            time.sleep(0.05)
+            continue
+        os.close(fd)
+        break
+
+def stream_child(scale_factor, parallelism, child, table, pipe_dir, converters, version, manifest):
+    """
+    Run one dsdgen child whose output files are named pipes feeding Parquet converters,
+    and record the Parquet files it produced in the manifest.
+    :return: The dsdgen result dictionary with an added "rows" mapping of table name to converted rows.
+    """
+    pipes = {}
+    output_files = {}
+    for table_name in tables_built_by(table):
+        file_name = chunk_file_name(table_name, child, parallelism) if parallelism > 1 else f"{table_name}.dat"
+        pipe_path = os.path.join(pipe_dir, file_name)
+        os.mkfifo(pipe_path)
+        output_file = os.path.join(output_dir, os.path.splitext(file_name)[0] + ".parquet")
+        output_files[table_name] = output_file
+        pipes[table_name] = (pipe_path, converters.submit(convert_pipe, pipe_path, table_name, output_file))
+
+    result = run_dsdgen_child(scale_factor, parallelism, child, table, output_dir=pipe_dir)
+    for pipe_path, converter in pipes.values():
+        release_pipe(pipe_path, converter)
+
+    result["rows"] = {table_name: converter.result() for table_name, (_, converter) in pipes.items()}
+    for pipe_path, _ in pipes.values():
+        os.remove(pipe_path)
+
+    if result["returncode"] == 0:
+        produced = {output_files[t]: rows for t, rows in result["rows"].items() if rows}
+        key = unit_key(scale_factor, version, table, child, parallelism, kind="stream")
+        manifest.record_unit(key, scale_factor, version, table, child, parallelism, list(produced), rows=produced)
+    return result
+
+def label_parquet_chunks(parallelism, manifest):
+    """Rename tables that were converted from a single chunk to "<table>.parquet"."""
+    chunks = {}
+    for file_name in sorted(os.listdir(output_dir)):
+        if file_name.endswith(f"_{parallelism}.parquet"):
+            chunks.setdefault(table_name_from_file(file_name), []).append(file_name)
+    for table_name, file_names in chunks.items():
+        if len(file_names) == 1 and file_names[0] != f"{table_name}.parquet":
+            os.replace(os.path.join(output_dir, file_names[0]), os.path.join(output_dir, f"{table_name}.parquet"))
+            manifest.rename_file(os.path.join(output_dir, file_names[0]), os.path.join(output_dir, f"{table_name}.parquet"))
+            chunks[table_name] = [f"{table_name}.parquet"]
+    manifest.save()
+    return chunks
+
+def stream_data(scale_factor, parallelism=1, tables=None, workers=None, pipe_root=None, force=False):
+    """
+    Generate TPC-DS data straight into Parquet: dsdgen writes into named pipes and a converter per pipe
+    reads the stream in record batches, so generation and conversion overlap and no .dat file hits disk.
+    :param scale_factor: Scale factor for data generation.
+    :param parallelism: Number of dsdgen chunks (1 for a single dsdgen process).
+    :param tables: Optional list of tables to build one at a time with -TABLE.
+    :param workers: Maximum number of dsdgen processes running at once (default: one per CPU).
+    :param pipe_root: Directory to create the named pipes in (default: system temp directory).
+    :param force: Regenerate every chunk even if the manifest says it is complete.
+    """
+    workers = workers or os.cpu_count() or 1
+    manifest = ArtifactManifest()
+    version = dsdgen_version()
+    targets = tables or [None]
+    units = [(table, child) for table in targets for child in range(1, parallelism + 1)]
+    print(f"Streaming TPC-DS data with scale factor {scale_factor} into {output_dir} ({parallelism} chunks, {workers} workers)...")
+
+    # Skip chunks a previous run already converted, and remove any other Parquet output of the tables being regenerated
+    complete = set() if force else {
+        (table, child) for table, child in units
+        if manifest.unit_complete(unit_key(scale_factor, version, table, child, parallelism, kind="stream"))
+    }
+    for table, child in sorted(complete, key=lambda unit: (unit[0] or "", unit[1])):
+        print(f"[{table or 'all'} {child}/{parallelism}] already converted and unchanged. Skipping.")
+    keep = manifest.kept_files(unit_key(scale_factor, version, table, child, parallelism, kind="stream") for table, child in complete)
+    regenerated = {name for table in targets for name in tables_built_by(table)}
+    for file_name in os.listdir(output_dir):
+        file_path = os.path.join(output_dir, file_name)
+        if file_name.endswith(".parquet") and table_name_from_file(file_name) in regenerated and os.path.abspath(file_path) not in keep:
+            os.remove(file_path)
+            manifest.forget(file_path)
+    # Clustered output of a regenerated table is stale too
+    for table_name in regenerated:
+        shutil.rmtree(os.path.join(output_dir, table_name), ignore_errors=True)
+    manifest.save()
+    units = [unit for unit in units if unit not in complete]
+
+    pipe_dir = tempfile.mkdtemp(prefix="tpcds_pipes_", dir=pipe_root)
+    results = []
+    wall_start = time.time()
+    try:
+        # Every pipe of every running child needs its own converter, otherwise dsdgen blocks on open
+        converter_slots = max(1, min(workers, len(units)) * len(tables_built_by(None)))
+        with ThreadPoolExecutor(max_workers=converter_slots) as converters, \
+                ThreadPoolExecutor(max_workers=workers) as children:
+            futures = [
+                children.submit(stream_child, scale_factor, parallelism, child, table, pipe_dir, converters, version, manifest)
+                for table, child in units
+            ]
+            for future in as_completed(futures):
+                results.append(future.result())
+    except Exception as e:
+        handle_error(f"Streaming conversion failed: {e}")
+    finally:
+        shutil.rmtree(pipe_dir, ignore_errors=True)
+    wall_end = time.time()
+
+    failed = [r for r in results if r["returncode"] != 0]
+    if failed:
+        for r in failed:
+            print(f"dsdgen child {r['child']}/{parallelism} for {r['table'] or 'all tables'} failed with exit code {r['returncode']}.")
+        handle_error("Data generation failed.")
+
+    if parallelism > 1:
+        label_parquet_chunks(parallelism, manifest)
+    parquet_files = [
+        os.path.join(output_dir, f) for f in os.listdir(output_dir)
+        if f.endswith(".parquet") and table_name_from_file(f) in regenerated
+    ]
+    chunks = group_files_by_table(parquet_files)
+    row_counts = {
+        table_name: sum(manifest.describe(f)["rows"] for f in file_paths)
+        for table_name, file_paths in chunks.items()
+    }
+    chunk_counts = {table_name: len(file_paths) for table_name, file_paths in chunks.items()}
+    report_throughput(row_counts, chunk_counts, results, wall_start, wall_end)
+    print(f"Streaming generation complete. Parquet files are located in {output_dir}.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate TPC-DS data directly into Parquet through named pipes.")
+    parser.add_argument("--scale-factor", type=int, required=True, help="Scale factor for data generation (e.g., 1 for 1GB, 10 for 10GB).")
+    parser.add_argument("--parallel", type=int, default=1, help="Number of dsdgen chunks to generate concurrently (0 uses all cores).")
+    parser.add_argument("--tables", type=str, default="", help="Comma-separated list of tables to generate one at a time with -TABLE.")
+    parser.add_argument("--workers", type=int, default=None, help="Maximum number of dsdgen processes running at once (default: one per CPU).")
+    parser.add_argument("--force", action="store_true", help="Regenerate everything even if the manifest records the data as complete.")
+    parser.add_argument("--pipe_dir", type=str, default=None, help="Directory for the named pipes (default: system temp directory).")
+    args = parser.parse_args()
+
+    parallelism = args.parallel if args.parallel > 0 else (os.cpu_count() or 1)
+    tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+    unknown_tables = [t for t in tables if t not in TABLE_NAMES]
+    if unknown_tables:
+        print(f"Unknown table(s): {', '.join(unknown_tables)}")
+        sys.exit(1)
+    if tables and parallelism < 2:
+        print("--tables requires --parallel of at least 2.")
+        sys.exit(1)
+
+    compile_dsdgen()
+    stream_data(args.scale_factor, parallelism, tables, args.workers, args.pipe_dir, args.force)
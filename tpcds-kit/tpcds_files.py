@@ -0,0 +1,66 @@
+import os
+import re
+import hashlib
+
+# dsdgen names parallel chunks "<table>_<child>_<parallel>.dat" (see print_start in tools/print.c)
+CHUNK_PATTERN = re.compile(r"^(?P<table>[a-z_]+?)_(?P<child>\d+)_(?P<parallel>\d+)$")
+
+# The converter splits large files into byte ranges and writes one "<name>-part<k>.parquet" per range
+PART_PATTERN = re.compile(r"^(?P<stem>.+)-part(?P<part>\d+)$")
+
+# dsdgen builds these tables together with their parent; "-TABLE store_sales" also writes store_returns
+CHILD_TABLES = {
+    "store_sales": "store_returns",
+    "catalog_sales": "catalog_returns",
+    "web_sales": "web_returns",
+}
+
+def chunk_file_name(table_name, child, parallel, suffix=".dat"):
+    """Return the file name dsdgen uses for one chunk of a parallel build."""
+    return f"{table_name}_{child}_{parallel}{suffix}"
+
+def part_file_name(name, part, suffix=".parquet"):
+    """Return the file name of one byte-range part of a converted file, e.g. "store_sales_3_8-part0002.parquet"."""
+    return f"{name}-part{part:04d}{suffix}"
+
+def split_chunk_name(file_name):
+    """
+    Split a data file name into its table name and chunk label.
+    :param file_name: File name or path, e.g. "store_sales_3_8.dat", "customer.parquet" or "inventory-part0001.parquet".
+    :return: Tuple of (table_name, chunk), where chunk is "3_8" or None for a whole-table file.
+    """
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    part = PART_PATTERN.match(stem)
+    if part:
+        stem = part.group("stem")
+    match = CHUNK_PATTERN.match(stem)
+    if not match:
+        return stem, None
+    return match.group("table"), f"{match.group('child')}_{match.group('parallel')}"
+
+def table_name_from_file(file_name):
+    """Return the TPC-DS table a (possibly chunked) data file belongs to."""
+    return split_chunk_name(file_name)[0]
+
+def group_files_by_table(file_paths):
+    """Group data files by table name, keeping chunk files in a stable order."""
+    grouped = {}
+    for file_path in sorted(file_paths):
+        grouped.setdefault(table_name_from_file(file_path), []).append(file_path)
+    return grouped
+
+def scan_file(file_path, buffer_size=16 * 1024 * 1024):
+    """
+    Read a file once to get both its row count and a content checksum.
+    :return: Tuple of (rows, checksum) where checksum is a hex BLAKE2b digest.
+    """
+    rows = 0
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        while True:
+            buffer = f.read(buffer_size)
+            if not buffer:
+                break
+            rows += buffer.count(b"\n")
+            digest.update(buffer)
+    return rows, digest.hexdigest()
@@ -1,33 +1,139 @@
 import os
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import boto3
-from botocore.exceptions import NoCredentialsError
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
 from dotenv import load_dotenv
+from s3_sync import sync_files
+from tpcds_files import table_name_from_file
 
 # Load environment variables from .env file
 load_dotenv()
 
-def upload_parquet_files(parquet_dir, test_mode, specific_file=None):
-    # Retrieve S3 credentials and configuration from environment variables
-    s3_bucket = os.environ.get("S3_BUCKET_NAME")
+# Files uploaded at once, multipart part size and parts in flight per file
+DEFAULT_WORKERS = 8
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+DEFAULT_MAX_CONCURRENCY = 4
+
+def list_uploads(parquet_dir, s3_folder):
+    """
+    List the Parquet files to upload with their S3 keys.
+    Directories starting with "_" are work in progress (e.g. clustering staging) and are skipped.
+    :return: List of (file_path, key) tuples.
+    """
+    table_dirs = {
+        d for d in os.listdir(parquet_dir)
+        if os.path.isdir(os.path.join(parquet_dir, d)) and not d.startswith("_")
+    }
+    uploads = []
+    for root, dirs, files in os.walk(parquet_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("_"))
+        relative_root = os.path.relpath(root, parquet_dir)
+        for filename in sorted(files):
+            if not filename.endswith(".parquet"):
+                continue
+            if relative_root == ".":
+                # Use the base name (without extension or chunk label) as the table name
+                table_name = table_name_from_file(filename)
+                if table_name in table_dirs:
+                    continue
+                uploads.append((os.path.join(root, filename), f"{s3_folder}/{table_name}/{filename}"))
+            else:
+                uploads.append((os.path.join(root, filename), f"{s3_folder}/{relative_root.replace(os.sep, '/')}/{filename}"))
+    return uploads
+
+def create_s3_client(pool_size=DEFAULT_WORKERS * DEFAULT_MAX_CONCURRENCY, retries=None):
+    """
+    Create one S3 client shared by every upload thread.
+    Its connection pool is sized for all files and parts in flight, so threads never wait for a connection.
+    Returns None if the S3 settings are missing from the environment.
+    :param retries: botocore retry settings (default: up to 10 attempts in adaptive mode).
+    """
     s3_endpoint = os.environ.get("S3_ENDPOINT_URL")
     s3_access_key = os.environ.get("S3_ACCESS_KEY")
     s3_secret_key = os.environ.get("S3_SECRET_KEY")
-    s3_folder = os.environ.get("S3_FOLDER_NAME")
-
-    if not s3_bucket or not s3_endpoint or not s3_access_key or not s3_secret_key:
+    if not os.environ.get("S3_BUCKET_NAME") or not s3_endpoint or not s3_access_key or not s3_secret_key:
         print("\033[91mEnvironment variables S3_BUCKET_NAME, S3_ENDPOINT_URL, S3_ACCESS_KEY, and S3_SECRET_KEY must be set.\033[0m")
         print("\033[91mHint: Try running 'tpcds.py cleanup' before attempting again.\033[0m")
-        return
+        return None
 
     # Create an S3 client using environment variables
-    s3 = boto3.client(
+    return boto3.client(
         's3',
         endpoint_url=s3_endpoint,
         aws_access_key_id=s3_access_key,
-        aws_secret_access_key=s3_secret_key
+        aws_secret_access_key=s3_secret_key,
+        config=Config(max_pool_connections=pool_size, retries=retries or {"max_attempts": 10, "mode": "adaptive"})
+    )
+
+def transfer_config(chunk_size=DEFAULT_CHUNK_SIZE, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """Multipart settings for each file: files above one chunk are split into chunk_size parts sent max_concurrency at a time."""
+    return TransferConfig(
+        multipart_threshold=chunk_size,
+        multipart_chunksize=chunk_size,
+        max_concurrency=max_concurrency,
+        use_threads=True
     )
 
+def upload_file(s3, file_path, bucket, key, config):
+    """
+    Upload one file and print its throughput.
+    :return: Dictionary with the key, MB uploaded and seconds taken.
+    """
+    size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    start = time.time()
+    s3.upload_file(file_path, bucket, key, Config=config)
+    elapsed = max(time.time() - start, 1e-6)
+    print(f"Uploaded {file_path} to s3://{bucket}/{key} ({size_mb:,.1f} MB in {elapsed:.1f}s, {size_mb / elapsed:,.1f} MB/s)", flush=True)
+    return {"key": key, "mb": size_mb, "seconds": elapsed}
+
+def upload_files(s3, uploads, bucket, workers=DEFAULT_WORKERS, config=None):
+    """
+    Upload many files concurrently over the shared client, largest first, and print aggregate throughput.
+    :param uploads: List of (file_path, key) tuples.
+    :return: True if every file was uploaded.
+    """
+    config = config or transfer_config()
+    uploads = sorted(uploads, key=lambda upload: os.path.getsize(upload[0]), reverse=True)
+    stats, failed = [], []
+    wall_start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(upload_file, s3, file_path, bucket, key, config): file_path for file_path, key in uploads}
+        for future in as_completed(futures):
+            try:
+                stats.append(future.result())
+            except NoCredentialsError:
+                executor.shutdown(cancel_futures=True)
+                print("\033[91mCredentials not available. Please ensure S3_ACCESS_KEY and S3_SECRET_KEY are set.\033[0m")
+                print("\033[91mHint: Try running 'tpcds.py cleanup' before attempting again.\033[0m")
+                return False
+            except (ClientError, BotoCoreError, S3UploadFailedError) as e:
+                print(f"\033[91mFailed to upload {futures[future]}: {e}\033[0m", flush=True)
+                failed.append(futures[future])
+    wall_seconds = max(time.time() - wall_start, 1e-6)
+
+    total_mb = sum(stat["mb"] for stat in stats)
+    print(f"Uploaded {len(stats)} files, {total_mb:,.1f} MB in {wall_seconds:.1f}s "
+          f"({total_mb / wall_seconds:,.1f} MB/s aggregate, {workers} files in parallel, "
+          f"{config.max_concurrency} parts per file, {config.multipart_chunksize // (1024 * 1024)} MB parts)")
+    if failed:
+        print(f"\033[91m{len(failed)} file(s) failed to upload.\033[0m")
+    return not failed
+
+def upload_parquet_files(parquet_dir, test_mode, specific_file=None, workers=DEFAULT_WORKERS,
+                         chunk_size=DEFAULT_CHUNK_SIZE, max_concurrency=DEFAULT_MAX_CONCURRENCY, sync=False, delete=False):
+    # Retrieve S3 configuration from environment variables
+    s3_bucket = os.environ.get("S3_BUCKET_NAME")
+    s3_folder = os.environ.get("S3_FOLDER_NAME")
+
+    s3 = create_s3_client(workers * max_concurrency)
+    if not s3:
+        return
+
     if specific_file:
         # Append ".parquet" to the table name to form the file name
         specific_file = f"{specific_file}.parquet"
@@ -36,46 +142,34 @@ def upload_parquet_files(parquet_dir, test_mode, specific_file=None):
             print(f"\033[91mFile {specific_file} does not exist in the directory {parquet_dir}.\033[0m")
             return
         table_name = os.path.splitext(specific_file)[0]
-        key = f"{s3_folder}/{table_name}/{specific_file}"
+        uploads = [(file_path, f"{s3_folder}/{table_name}/{specific_file}")]
+    else:
+        # Flat files are uploaded as "table_name/filename.parquet"; a table directory (clustered or Spark output)
+        # replaces the table's flat files and is uploaded with its partition directories intact
+        uploads = list_uploads(parquet_dir, s3_folder)
+
+    # Sync mode compares with the bucket first and only sends new or changed files
+    if sync:
+        sync_files(s3, uploads, s3_bucket, s3_folder, workers, chunk_size, max_concurrency, delete and not specific_file, test_mode)
+        return
 
-        if test_mode:
+    if test_mode:
+        for file_path, key in uploads:
             print(f"TEST MODE: Source: {file_path}, Target: s3://{s3_bucket}/{key}")
-        else:
-            print(f"Uploading {file_path} to s3://{s3_bucket}/{key}")
-            try:
-                s3.upload_file(file_path, s3_bucket, key)
-                print("Upload successful")
-            except NoCredentialsError:
-                print("\033[91mCredentials not available. Please ensure S3_ACCESS_KEY and S3_SECRET_KEY are set.\033[0m")
-                print("\033[91mHint: Try running 'tpcds.py cleanup' before attempting again.\033[0m")
-                return
-    else:
-        # Iterate through each file in the parquet directory
-        for filename in os.listdir(parquet_dir):
-            if filename.endswith(".parquet"):
-                file_path = os.path.join(parquet_dir, filename)
-                # Use the base name (without extension) as the table name
-                table_name = os.path.splitext(filename)[0]
-                # Define the S3 key as "table_name/filename.parquet"
-                key = f"{s3_folder}/{table_name}/{filename}"
-
-                if test_mode:
-                    print(f"TEST MODE: Source: {file_path}, Target: s3://{s3_bucket}/{key}")
-                else:
-                    print(f"Uploading {file_path} to s3://{s3_bucket}/{key}")
-                    try:
-                        s3.upload_file(file_path, s3_bucket, key)
-                        print("Upload successful")
-                    except NoCredentialsError:
-                        print("\033[91mCredentials not available. Please ensure S3_ACCESS_KEY and S3_SECRET_KEY are set.\033[0m")
-                        print("\033[91mHint: Try running 'tpcds.py cleanup' before attempting again.\033[0m")
-                        return
+        return
+    upload_files(s3, uploads, s3_bucket, workers, transfer_config(chunk_size, max_concurrency))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Upload Parquet files to S3-compatible storage")
     parser.add_argument("--directory", default="test_data/parquet", help="Local directory containing Parquet files (default: test_data/parquet)")
     parser.add_argument("--test", action="store_true", help="Run in test mode to output source and target paths without uploading")
     parser.add_argument("--file", help="Specific Parquet file to upload (must be in the specified directory)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Files uploaded in parallel (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--chunk_mb", type=int, default=DEFAULT_CHUNK_SIZE // (1024 * 1024), help=f"Multipart part size in MB; smaller files go up in one request (default: {DEFAULT_CHUNK_SIZE // (1024 * 1024)})")
+    parser.add_argument("--max_concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help=f"Parts uploaded in parallel per file (default: {DEFAULT_MAX_CONCURRENCY})")
+
+    parser.add_argument("--sync", action="store_true", help="Only upload files whose remote object is missing or has a different size or ETag, resuming unfinished multipart uploads")
+    parser.add_argument("--delete", action="store_true", help="With --sync, delete remote objects under the synced tables that no longer exist locally")
 
     args = parser.parse_args()
-    upload_parquet_files(args.directory, args.test, args.file)
\ No newline at end of file
+    upload_parquet_files(args.directory, args.test, args.file, args.workers, args.chunk_mb * 1024 * 1024, args.max_concurrency, args.sync, args.delete)
\ No newline at end of file
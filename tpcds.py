@@ -5,6 +5,7 @@ import argparse
 import os
 import subprocess
 import shutil
+import sys
 from dotenv import load_dotenv
 
 # Adjust paths to work from the root directory
@@ -15,16 +16,37 @@ PARQUET_DIR = os.path.join(TPCDS_KIT_DIR, "test_data/parquet")
 # Load environment variables
 load_dotenv()
 
-def generate_data(scale_factor):
+sys.path.insert(0, TPCDS_KIT_DIR)
+from artifact_manifest import ArtifactManifest
+from tpcds_files import table_name_from_file
+from upload_parquet import list_uploads
+
+def generate_data(scale_factor, parallel=1, tables="", stream=False, force=False):
     print(f"You are about to generate approximately {scale_factor}GB of data.")
     confirmation = input("Do you want to proceed? (y/n): ").strip().lower()
     if confirmation != "y":
         print("Operation cancelled.")
         return
 
-    subprocess.run(["python", os.path.join(TPCDS_KIT_DIR, "data_generator.py"), "--scale-factor", str(scale_factor)])
+    # Streaming mode pipes dsdgen output straight into the Parquet converter
+    script = "stream_to_parquet.py" if stream else "data_generator.py"
+    command = ["python", os.path.join(TPCDS_KIT_DIR, script), "--scale-factor", str(scale_factor), "--parallel", str(parallel)]
+    if tables:
+        command.extend(["--tables", tables])
+    if force:
+        command.append("--force")
+    subprocess.run(command)
+
+def parquet_uploads():
+    """
+    The converted files upload_parquet.py would upload, with their S3 keys: flat files and table directories
+    (Spark output and --cluster partitions).
+    """
+    if not os.path.isdir(PARQUET_DIR):
+        return []
+    return list_uploads(PARQUET_DIR, os.environ.get("S3_FOLDER_NAME"))
 
-def upload_data(test_mode, use_spark, custom_tmp_dir=""):
+def upload_data(test_mode, use_spark, custom_tmp_dir="", force=False, workers=None, cluster=False, iceberg=False, upload_workers=None, sync=False, delete_stale=False, direct=False):
     # Retrieve S3 configuration from environment variables
     s3_bucket = os.environ.get("S3_BUCKET_NAME")
     s3_endpoint = os.environ.get("S3_ENDPOINT_URL")
@@ -33,59 +55,109 @@ def upload_data(test_mode, use_spark, custom_tmp_dir=""):
         print("Error: S3 configuration is missing in the .env file.")
         return
 
-    # Check if raw files exist
-    if not os.path.exists(RAW_FILES_DIR) or not any(f.endswith(".dat") for f in os.listdir(RAW_FILES_DIR)):
+    # Check if raw files exist; Parquet written by 'generate --stream' is uploaded without a conversion step
+    has_raw_files = os.path.exists(RAW_FILES_DIR) and any(f.endswith(".dat") for f in os.listdir(RAW_FILES_DIR))
+    has_parquet_files = bool(parquet_uploads())
+    if not has_raw_files and not has_parquet_files:
         print("No .dat files found in 'test_data/raw_files'. Nothing to convert or upload.")
         return
 
     if test_mode:
         print("TEST MODE: Listing source and target paths")
-        if os.path.exists(RAW_FILES_DIR):
+        if not has_raw_files:
+            for file_path, key in parquet_uploads():
+                print(f"Source: {file_path} Target: s3://{s3_bucket}/{key}")
+        elif os.path.exists(RAW_FILES_DIR):
             for file in os.listdir(RAW_FILES_DIR):
                 if file.endswith(".dat"):
                     parquet_file = os.path.splitext(file)[0] + ".parquet"
-                    print(f"Source: {os.path.join(PARQUET_DIR, parquet_file)} Target: s3://{s3_bucket}/{os.path.splitext(file)[0]}/{parquet_file}")
+                    print(f"Source: {os.path.join(PARQUET_DIR, parquet_file)} Target: s3://{s3_bucket}/{table_name_from_file(file)}/{parquet_file}")
+        return
+
+    # Stream the converter's output straight into S3, so only the .dat files take local disk
+    if direct:
+        if not has_raw_files:
+            print("No .dat files found in 'test_data/raw_files'. --direct converts .dat files while uploading them.")
+            return
+        command = ["python", os.path.join(TPCDS_KIT_DIR, "data_to_parquet.py"), "--to_s3"]
+        if workers:
+            command.extend(["--workers", str(workers)])
+        subprocess.run(command)
         return
 
     # Run the appropriate script to convert .dat to .parquet
-    if use_spark:
+    if not has_raw_files:
+        print("No .dat files found; uploading the Parquet files already in 'test_data/parquet'.")
+    elif use_spark:
         commandArguments = [ "python", os.path.join(TPCDS_KIT_DIR, "parquet_transform_spark.py") ]
         if custom_tmp_dir != "":
             commandArguments.append("--custom_dir")
             commandArguments.append(custom_tmp_dir)
+        if workers:
+            commandArguments.extend(["--parallel_tables", str(workers)])
         subprocess.run(commandArguments)
     else:
-        subprocess.run(["python", os.path.join(TPCDS_KIT_DIR, "data_to_parquet.py")])
+        command = ["python", os.path.join(TPCDS_KIT_DIR, "data_to_parquet.py")]
+        if force:
+            command.append("--force")
+        if workers:
+            command.extend(["--workers", str(workers)])
+        if cluster:
+            command.append("--cluster")
+        subprocess.run(command)
 
     # Check if parquet files exist
-    if not os.path.exists(PARQUET_DIR) or not any(f.endswith(".parquet") for f in os.listdir(PARQUET_DIR)):
+    if not parquet_uploads():
         print("No .parquet files found in 'test_data/parquet'. Nothing to upload.")
         return
 
+    # Write Iceberg tables straight into the warehouse, so Dremio only has to register them
+    if iceberg:
+        command = ["python", os.path.join(TPCDS_KIT_DIR, "iceberg_writer.py")]
+        subprocess.run(command)
+        return
+
     # Run the upload_parquet.py script
     command = ["python", os.path.join(TPCDS_KIT_DIR, "upload_parquet.py"), "--directory", PARQUET_DIR]
+    if upload_workers:
+        command.extend(["--workers", str(upload_workers)])
+    if sync:
+        command.append("--sync")
+        if delete_stale:
+            command.append("--delete")
     subprocess.run(command)
 
-def cleanup():
-    print("WARNING: This will delete all .dat files in 'test_data/raw_files' and all .parquet files in 'test_data/parquet'.")
+def tune_parquet(table, scale_factor, extra_args):
+    """Run the Parquet writer settings benchmark for one table."""
+    command = ["python", os.path.join(TPCDS_KIT_DIR, "parquet_tuning.py"), "--table", table, "--scale-factor", str(scale_factor)]
+    subprocess.run(command + extra_args)
+
+def benchmark_storage(extra_args):
+    """Run the object storage throughput and latency benchmark against the S3 settings in the .env file."""
+    command = ["python", os.path.join(TPCDS_KIT_DIR, "storage_benchmark.py")]
+    subprocess.run(command + extra_args)
+
+def cleanup(tables="", stage="all"):
+    selected = {t.strip() for t in tables.split(",") if t.strip()}
+    scope = f"table(s) {', '.join(sorted(selected))}" if selected else "all tables"
+    targets = []
+    if stage in ("all", "raw"):
+        targets.append((RAW_FILES_DIR, ".dat", "test_data/raw_files"))
+    if stage in ("all", "parquet"):
+        targets.append((PARQUET_DIR, ".parquet", "test_data/parquet"))
+
+    descriptions = " and ".join(f"all {suffix} files in '{label}'" for _, suffix, label in targets)
+    print(f"WARNING: This will delete {descriptions} for {scope}.")
     confirmation = input("Do you want to proceed? (y/n): ").strip().lower()
     if confirmation != "y":
         print("Operation cancelled.")
         return
 
-    # Delete .dat files
-    if os.path.exists(RAW_FILES_DIR):
-        for file in os.listdir(RAW_FILES_DIR):
-            if file.endswith(".dat"):
-                os.remove(os.path.join(RAW_FILES_DIR, file))
-        print("Deleted all .dat files in 'test_data/raw_files'.")
-
-    # Delete .parquet files
-    if os.path.exists(PARQUET_DIR):
-        for file in os.listdir(PARQUET_DIR):
-            if file.endswith(".parquet"):
-                os.remove(os.path.join(PARQUET_DIR, file))
-        print("Deleted all .parquet files in 'test_data/parquet'.")
+    # Delete the files together with their manifest entries so the next run regenerates exactly what was evicted
+    manifest = ArtifactManifest()
+    for directory, suffix, label in targets:
+        deleted = manifest.evict(directory, suffix, selected or None)
+        print(f"Deleted {deleted} {suffix} files in '{label}'.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="TPC-DS Test Kit: Manage data generation, conversion, upload, and cleanup.")
@@ -94,21 +166,51 @@ if __name__ == "__main__":
     # Subparser for data generation
     generate_parser = subparsers.add_parser("generate", help="Generate TPC-DS data")
     generate_parser.add_argument("--scale", type=int, required=True, help="Scale factor for data generation (e.g., 1 for 1GB, 10 for 10GB).")
+    generate_parser.add_argument("--parallel", type=int, default=1, help="Number of dsdgen chunks generated concurrently (1 for a single dsdgen process, 0 for one per core).")
+    generate_parser.add_argument("--tables", type=str, help="Comma-separated list of tables to generate with -TABLE (requires --parallel >= 2)", default="")
+    generate_parser.add_argument("--stream", action="store_true", help="Stream dsdgen output through named pipes straight into Parquet without writing .dat files")
+    generate_parser.add_argument("--force", action="store_true", help="Regenerate everything even if the manifest records it as complete")
 
     # Subparser for upload
     upload_parser = subparsers.add_parser("upload", help="Convert and upload Parquet files to S3")
     upload_parser.add_argument("--test", action="store_true", help="Run in test mode to output source and target paths without uploading")
     upload_parser.add_argument("--spark", action="store_true", help="Use Spark-based Parquet transformation")
     upload_parser.add_argument("--custom_dir", type=str, help="Use as temporary directory instead of /tmp", default="")
+    upload_parser.add_argument("--force", action="store_true", help="Reconvert every .dat file even if its Parquet output is current")
+    upload_parser.add_argument("--workers", type=int, default=None, help="Number of conversion processes, or of concurrent tables with --spark (default: one per CPU, 4 with --spark)")
+    upload_parser.add_argument("--cluster", action="store_true", help="Write Hive-partitioned, sorted Parquet for the partitioned tables in iceberg-kit/tables.json")
+    upload_parser.add_argument("--upload_workers", type=int, default=None, help="Files uploaded to S3 in parallel (default: 8)")
+    upload_parser.add_argument("--sync", action="store_true", help="Only upload new or changed files (compared by size and ETag), resuming interrupted multipart uploads")
+    upload_parser.add_argument("--delete_stale", action="store_true", help="With --sync, delete remote objects of the uploaded tables that no longer exist locally")
+    upload_parser.add_argument("--direct", action="store_true", help="Convert and upload in one pass, streaming Parquet into S3 multipart uploads without writing it to local disk")
+    upload_parser.add_argument("--iceberg", action="store_true", help="Write Iceberg tables directly into the Iceberg bucket instead of uploading Parquet files")
+
+    # Subparser for the Parquet writer benchmark; options not listed here are passed through to parquet_tuning.py
+    tune_parser = subparsers.add_parser("tune-parquet", help="Benchmark Parquet writer settings (codec, row groups, page index, bloom filters) on one table")
+    tune_parser.add_argument("--table", type=str, required=True, help="TPC-DS table to benchmark, e.g. store_sales")
+    tune_parser.add_argument("--scale", type=int, default=1, help="Scale factor to generate the table at (default: 1)")
+
+    # Subparser for the storage benchmark; its options are passed through to storage_benchmark.py
+    subparsers.add_parser("storage", add_help=False, help="Benchmark S3 throughput, latency and error rates (object size, concurrency, range reads, request mix)")
 
     # Subparser for cleanup
     cleanup_parser = subparsers.add_parser("cleanup", help="Cleanup .dat and .parquet files")
+    cleanup_parser.add_argument("--tables", type=str, help="Comma-separated list of tables to evict (default: all tables)", default="")
+    cleanup_parser.add_argument("--stage", choices=["all", "raw", "parquet"], default="all", help="Evict only raw .dat files, only Parquet files, or both")
 
-    args = parser.parse_args()
+    args, extra_args = parser.parse_known_args()
+    if extra_args and args.command not in ("tune-parquet", "storage"):
+        parser.error(f"unrecognized arguments: {' '.join(extra_args)}")
+    if args.command == "upload" and args.direct and (args.spark or args.cluster or args.iceberg or args.sync):
+        parser.error("--direct cannot be combined with --spark, --cluster, --iceberg or --sync")
 
     if args.command == "generate":
-        generate_data(args.scale)
+        generate_data(args.scale, args.parallel, args.tables, args.stream, args.force)
     elif args.command == "upload":
-        upload_data(args.test, args.spark, args.custom_dir)
+        upload_data(args.test, args.spark, args.custom_dir, args.force, args.workers, args.cluster, args.iceberg, args.upload_workers, args.sync, args.delete_stale, args.direct)
+    elif args.command == "tune-parquet":
+        tune_parquet(args.table, args.scale, extra_args)
+    elif args.command == "storage":
+        benchmark_storage(extra_args)
     elif args.command == "cleanup":
-        cleanup()
\ No newline at end of file
+        cleanup(args.tables, args.stage)
\ No newline at end of file